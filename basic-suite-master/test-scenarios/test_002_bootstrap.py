@@ -6,7 +6,6 @@
 #
 from __future__ import absolute_import
 
-import functools
 import logging
 import os
 import random
@@ -28,6 +27,7 @@ from ost_utils import host_utils
 from ost_utils.ansible import AnsibleExecutionError
 from ost_utils.ansible.collection import CollectionMapper
 from ost_utils.ansible.collection import image_template
+from ost_utils.pytest import depends_on
 from ost_utils.pytest import order_by
 from ost_utils.pytest.fixtures import root_password
 from ost_utils.pytest.fixtures.backend import tested_ip_version
@@ -39,7 +39,6 @@ from ost_utils.storage_utils import lun
 from ost_utils.storage_utils import nfs
 from ost_utils import shell
 from ost_utils import test_utils
-from ost_utils import utils
 from ost_utils import versioning
 from ost_utils import keycloak
 
@@ -180,6 +179,7 @@ _TEST_LIST = [
     ],
 )
 @order_by(_TEST_LIST)
+@depends_on()
 def test_verify_engine_certs(key_format, verification_fn, engine_fqdn, engine_download):
     url = 'http://{}/ovirt-engine/services/pki-resource?resource=ca-certificate&format={}'
 
@@ -195,6 +195,7 @@ def test_verify_engine_certs(key_format, verification_fn, engine_fqdn, engine_do
 
 @pytest.mark.parametrize("scheme", ["http", "https"])
 @order_by(_TEST_LIST)
+@depends_on()
 def test_engine_health_status(scheme, engine_fqdn, engine_download):
     url = f'{scheme}://{engine_fqdn}/ovirt-engine/services/health'
 
@@ -202,6 +203,7 @@ def test_engine_health_status(scheme, engine_fqdn, engine_download):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_add_dc(engine_api, ost_dc_name):
     if ost_dc_name != engine_object_names.TEST_DC_NAME:
         pytest.skip(' [2020-12-01] hosted-engine suites only use Default DC')
@@ -219,6 +221,7 @@ def test_add_dc(engine_api, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_update_default_dc', resources=['data_centers'])
 def test_remove_default_dc(engine_api, ost_dc_name):
     if ost_dc_name != engine_object_names.TEST_DC_NAME:
         pytest.skip(' [2020-12-01] hosted-engine suites only use Default DC')
@@ -230,6 +233,7 @@ def test_remove_default_dc(engine_api, ost_dc_name):
 
 # Can't set Default DC to local storage, because we want both hosts in it.
 @order_by(_TEST_LIST)
+@depends_on(resources=['data_centers'])
 def test_update_default_dc(engine_api, ost_dc_name):
     if ost_dc_name != engine_object_names.TEST_DC_NAME:
         pytest.skip(' [2020-12-01] hosted-engine suites only use Default DC')
@@ -240,6 +244,7 @@ def test_update_default_dc(engine_api, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on(resources=['clusters'])
 def test_update_default_cluster(engine_api):
     engine = engine_api.system_service()
     cluster_service = test_utils.get_cluster_service(engine, 'Default')
@@ -250,6 +255,7 @@ def test_update_default_cluster(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_update_default_cluster', 'test_add_mac_pool', 'test_remove_default_dc', resources=['clusters'])
 def test_remove_default_cluster(engine_api, ost_cluster_name):
     if ost_cluster_name != engine_object_names.TEST_CLUSTER_NAME:
         pytest.skip(' [2020-12-01] hosted-engine suites only use Default cluster')
@@ -260,6 +266,7 @@ def test_remove_default_cluster(engine_api, ost_cluster_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_dc')
 def test_add_dc_quota(engine_api, ost_dc_name):
     datacenters_service = engine_api.system_service().data_centers_service()
     datacenter = datacenters_service.list(search=f'name={ost_dc_name}')[0]
@@ -276,6 +283,7 @@ def test_add_dc_quota(engine_api, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_dc')
 def test_add_cluster(engine_api, ost_cluster_name, ost_dc_name):
     if ost_cluster_name != engine_object_names.TEST_CLUSTER_NAME:
         pytest.skip(' [2020-12-01] hosted-engine suites only use Default cluster')
@@ -317,6 +325,7 @@ def test_add_cluster(engine_api, ost_cluster_name, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_cluster')
 def test_add_hosts(
     engine_api,
     root_password,
@@ -350,6 +359,7 @@ def test_add_hosts(
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_hosts')
 def test_verify_add_hosts(hosts_service, ost_dc_name):
     up_host = None
 
@@ -358,22 +368,29 @@ def test_verify_add_hosts(hosts_service, ost_dc_name):
         up_host = host_utils.find_single_up_host(hosts_service, ost_dc_name)
         return up_host is not None
 
-    assert assert_utils.true_within(find_up_host, timeout=constants.ADD_HOST_TIMEOUT)
+    assert assert_utils.true_within(
+        find_up_host,
+        timeout=constants.ADD_HOST_TIMEOUT,
+        wakeup=host_utils.events_wakeup(hosts_service),
+    )
 
     host_utils.wait_for_flapping_host(hosts_service, ost_dc_name, up_host.id)
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_hosts')
 def test_verify_add_all_hosts(hosts_service, ost_dc_name):
     assert assert_utils.true_within(
         lambda: host_utils.all_hosts_up(hosts_service, ost_dc_name),
         timeout=constants.ADD_HOST_TIMEOUT,
+        wakeup=host_utils.events_wakeup(hosts_service),
     )
 
     host_utils.wait_for_flapping_host(hosts_service, ost_dc_name)
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_all_hosts')
 def test_complete_hosts_setup(ansible_hosts):
     if not os.environ.get('ENABLE_DEBUG_LOGGING'):
         pytest.skip('Skip vdsm debug logging')
@@ -420,6 +437,7 @@ def sd_iscsi_host_luns(sd_iscsi_host_lun_uuids, sd_iscsi_host_ip, sd_iscsi_port,
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_hosts')
 def test_add_iscsi_master_storage_domain(
     master_storage_domain_type, engine_api, hosts_service, sd_iscsi_host_luns, ost_dc_name
 ):
@@ -429,6 +447,7 @@ def test_add_iscsi_master_storage_domain(
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_hosts')
 def test_add_nfs_master_storage_domain(
     master_storage_domain_type, engine_api, hosts_service, sd_nfs_host_storage_name, ost_dc_name
 ):
@@ -468,81 +487,44 @@ def add_second_nfs_storage_domain(engine_api, hosts_service, sd_nfs_host_storage
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_nfs_master_storage_domain', 'test_add_iscsi_master_storage_domain')
 def test_add_secondary_storage_domains(
     master_storage_domain_type,
-    engine_api,
-    hosts_service,
+    engine_api_pool,
     sd_nfs_host_storage_name,
     sd_iscsi_host_luns,
     ost_dc_name,
 ):
+    # each domain is added over a connection of its own, so that the
+    # requests don't wait for each other
+    def adding(add_domain, *args):
+        def add(api):
+            add_domain(api, api.system_service().hosts_service(), *args, ost_dc_name)
+
+        return add
+
     if master_storage_domain_type == 'iscsi':
-        vt = utils.VectorThread(
-            [
-                functools.partial(
-                    add_nfs_storage_domain,
-                    engine_api,
-                    hosts_service,
-                    sd_nfs_host_storage_name,
-                    ost_dc_name,
-                ),
-                # 12/07/2017 commenting out iso domain creation until we know why it causing random failures
-                # Bug-Url: http://bugzilla.redhat.com/1463263
-                #                functools.partial(add_iso_storage_domain, engine_api,
-                #                                  hosts_service, sd_nfs_host_storage_name,
-                #                                  ost_dc_name),
-                functools.partial(
-                    add_templates_storage_domain,
-                    engine_api,
-                    hosts_service,
-                    sd_nfs_host_storage_name,
-                    ost_dc_name,
-                ),
-                functools.partial(
-                    add_second_nfs_storage_domain,
-                    engine_api,
-                    hosts_service,
-                    sd_nfs_host_storage_name,
-                    ost_dc_name,
-                ),
-            ],
+        engine_api_pool.gather(
+            adding(add_nfs_storage_domain, sd_nfs_host_storage_name),
+            # 12/07/2017 commenting out iso domain creation until we know why it causing random failures
+            # Bug-Url: http://bugzilla.redhat.com/1463263
+            #            adding(add_iso_storage_domain, sd_nfs_host_storage_name),
+            adding(add_templates_storage_domain, sd_nfs_host_storage_name),
+            adding(add_second_nfs_storage_domain, sd_nfs_host_storage_name),
         )
     else:
-        vt = utils.VectorThread(
-            [
-                functools.partial(
-                    add_iscsi_storage_domain,
-                    engine_api,
-                    hosts_service,
-                    sd_iscsi_host_luns,
-                    ost_dc_name,
-                ),
-                # 12/07/2017 commenting out iso domain creation until we know why it causing random failures
-                # Bug-Url: http://bugzilla.redhat.com/1463263
-                #                functools.partial(add_iso_storage_domain, engine_api,
-                #                                  hosts_service, sd_nfs_host_storage_name,
-                #                                  ost_dc_name),
-                functools.partial(
-                    add_templates_storage_domain,
-                    engine_api,
-                    hosts_service,
-                    sd_nfs_host_storage_name,
-                    ost_dc_name,
-                ),
-                functools.partial(
-                    add_second_nfs_storage_domain,
-                    engine_api,
-                    hosts_service,
-                    sd_nfs_host_storage_name,
-                    ost_dc_name,
-                ),
-            ],
+        engine_api_pool.gather(
+            adding(add_iscsi_storage_domain, sd_iscsi_host_luns),
+            # 12/07/2017 commenting out iso domain creation until we know why it causing random failures
+            # Bug-Url: http://bugzilla.redhat.com/1463263
+            #            adding(add_iso_storage_domain, sd_nfs_host_storage_name),
+            adding(add_templates_storage_domain, sd_nfs_host_storage_name),
+            adding(add_second_nfs_storage_domain, sd_nfs_host_storage_name),
         )
-    vt.start_all()
-    vt.join_all()
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_iscsi_master_storage_domain', 'test_add_secondary_storage_domains')
 def test_resize_and_refresh_storage_domain(sd_iscsi_ansible_host, engine_api, sd_iscsi_host_luns):
     sd_iscsi_ansible_host.shell('lvresize --size +3000M /dev/mapper/vg1_storage-lun0_bdev')
 
@@ -610,6 +592,7 @@ def add_templates_storage_domain(engine_api, hosts_service, sd_host_storage_ip,
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_dc', resources=['data_centers'])
 def test_set_dc_quota_audit(engine_api, ost_dc_name):
     dcs_service = engine_api.system_service().data_centers_service()
     dc = dcs_service.list(search=f'name={ost_dc_name}')[0]
@@ -622,6 +605,7 @@ def test_set_dc_quota_audit(engine_api, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_dc_quota', 'test_add_nfs_master_storage_domain', 'test_add_iscsi_master_storage_domain')
 def test_add_quota_storage_limits(engine_api, ost_dc_name):
 
     # Find the data center and the service that manages it:
@@ -671,6 +655,7 @@ def test_add_quota_storage_limits(engine_api, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_dc_quota')
 def test_add_quota_cluster_limits(engine_api, ost_dc_name):
     datacenters_service = engine_api.system_service().data_centers_service()
     datacenter = datacenters_service.list(search=f'name={ost_dc_name}')[0]
@@ -684,6 +669,7 @@ def test_add_quota_cluster_limits(engine_api, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_cluster', resources=['networks'])
 def test_add_vm_network(engine_api, ost_dc_name, ost_cluster_name):
     engine = engine_api.system_service()
 
@@ -704,6 +690,7 @@ def test_add_vm_network(engine_api, ost_dc_name, ost_cluster_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_cluster', resources=['networks'])
 def test_add_non_vm_network(engine_api, ost_dc_name, ost_cluster_name):
     engine = engine_api.system_service()
 
@@ -726,6 +713,7 @@ def test_add_non_vm_network(engine_api, ost_dc_name, ost_cluster_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_add_role(engine_api):
     engine = engine_api.system_service()
     roles_service = engine.roles_service()
@@ -746,6 +734,7 @@ def test_add_role(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_add_affinity_label(engine_api):
     engine = engine_api.system_service()
     affinity_labels_service = engine.affinity_labels_service()
@@ -758,6 +747,7 @@ def test_add_affinity_label(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_cluster')
 def test_add_affinity_group(engine_api, ost_cluster_name):
     engine = engine_api.system_service()
     cluster_service = test_utils.get_cluster_service(engine, ost_cluster_name)
@@ -778,6 +768,7 @@ def test_add_affinity_group(engine_api, ost_cluster_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_add_bookmark(engine_api):
     engine = engine_api.system_service()
     bookmarks_service = engine.bookmarks_service()
@@ -791,6 +782,7 @@ def test_add_bookmark(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_cluster')
 def test_add_cpu_profile(engine_api, ost_cluster_name):
     engine = engine_api.system_service()
     cpu_profiles_service = engine.cpu_profiles_service()
@@ -807,6 +799,7 @@ def test_add_cpu_profile(engine_api, ost_cluster_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_dc')
 def test_add_qos(engine_api, ost_dc_name):
     engine = engine_api.system_service()
     dc_service = test_utils.data_center_service(engine, ost_dc_name)
@@ -831,6 +824,7 @@ def test_add_qos(engine_api, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_nfs_master_storage_domain', 'test_add_iscsi_master_storage_domain')
 def test_add_disk_profile(engine_api, ost_dc_name):
     engine = engine_api.system_service()
     disk_profiles_service = engine.disk_profiles_service()
@@ -850,6 +844,7 @@ def test_add_disk_profile(engine_api, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_get_version(engine_api):
     product_info = engine_api.system_service().get().product_info
     name = product_info.name
@@ -859,6 +854,7 @@ def test_get_version(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_cluster')
 def test_get_cluster_enabled_features(engine_api, ost_cluster_name):
     cluster_service = test_utils.get_cluster_service(engine_api.system_service(), ost_cluster_name)
     enabled_features_service = cluster_service.enabled_features_service()
@@ -875,6 +871,7 @@ def test_get_cluster_enabled_features(engine_api, ost_cluster_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_get_cluster_levels(engine_api):
     cluster_levels_service = engine_api.system_service().cluster_levels_service()
     cluster_levels = sorted(cluster_levels_service.list(), key=lambda level: level.id)
@@ -892,6 +889,7 @@ def test_get_cluster_levels(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_get_domains(engine_api):
     domains_service = engine_api.system_service().domains_service()
     domains = sorted(domains_service.list(), key=lambda domain: domain.name)
@@ -902,6 +900,7 @@ def test_get_domains(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_hosts')
 def test_get_host_devices(hosts_service, ost_dc_name):
     host_service = host_utils.random_up_host_service(hosts_service, ost_dc_name)
     # See common/libvirt-templates/vm_template.
@@ -920,6 +919,7 @@ def test_get_host_devices(hosts_service, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_hosts')
 def test_get_host_hook(hosts_service, ost_dc_name, ansible_hosts, root_dir):
     # add hook to host
     hook_full_path = os.path.join(root_dir, 'common/test-scenarios-files/vds_hooks/add_mdevs.py')
@@ -944,6 +944,7 @@ def test_get_host_hook(hosts_service, ost_dc_name, ansible_hosts, root_dir):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_hosts')
 def test_get_host_stats(hosts_service, ost_dc_name):
     host_service = host_utils.random_up_host_service(hosts_service, ost_dc_name)
     stats_service = host_service.statistics_service()
@@ -958,6 +959,7 @@ def test_get_host_stats(hosts_service, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_hosts')
 def test_get_host_numa_nodes(hosts_service, ost_dc_name):
     host_service = host_utils.random_up_host_service(hosts_service, ost_dc_name)
 
@@ -975,12 +977,12 @@ def test_get_host_numa_nodes(hosts_service, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_hosts')
 def test_check_update_host(engine_api, hosts_service, ost_dc_name, is_node_suite):
     if is_node_suite:
         pytest.skip('Skip test_check_update_host on node suites - done later')
     engine = engine_api.system_service()
     host_service = host_utils.random_up_host_service(hosts_service, ost_dc_name)
-    events_service = engine.events_service()
     with engine_utils.wait_for_event(engine, [884, 885]):
         # HOST_AVAILABLE_UPDATES_STARTED(884)
         # HOST_AVAILABLE_UPDATES_FINISHED(885)
@@ -988,6 +990,7 @@ def test_check_update_host(engine_api, hosts_service, ost_dc_name, is_node_suite
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_add_scheduling_policy(engine_api):
     engine = engine_api.system_service()
     scheduling_policies_service = engine.scheduling_policies_service()
@@ -1018,12 +1021,14 @@ def test_add_scheduling_policy(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_get_system_options(engine_api):
     # TODO: get some option
     options_service = engine_api.system_service().options_service()
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_get_operating_systems(engine_api):
     operating_systems_service = engine_api.system_service().operating_systems_service()
     os_list = sorted(operating_systems_service.list(), key=lambda os: os.name)
@@ -1038,6 +1043,7 @@ def test_get_operating_systems(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_hosts')
 def test_add_fence_agent(hosts_service, ost_dc_name):
     # TODO: This just adds a fence agent to host, does not enable it.
     # Of course, we need to find a fence agents that can work on
@@ -1064,6 +1070,7 @@ def test_add_fence_agent(hosts_service, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_add_tag(engine_api):
     engine = engine_api.system_service()
     tags_service = engine.tags_service()
@@ -1076,6 +1083,7 @@ def test_add_tag(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on(resources=['clusters'])
 def test_add_mac_pool(engine_api):
     engine = engine_api.system_service()
     pools_service = engine.mac_pools_service()
@@ -1105,6 +1113,7 @@ def test_add_mac_pool(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_verify_notifier(ansible_engine, ost_dc_name):
     if ost_dc_name != engine_object_names.TEST_DC_NAME:
         # basic-suite-master configures and starts it in
@@ -1179,6 +1188,7 @@ def test_verify_engine_backup(ansible_engine, engine_api, engine_fqdn, engine_do
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_notifier')
 def test_verify_notifier_restart(ansible_engine, engine_api, ost_dc_name):
     if ost_dc_name != engine_object_names.TEST_DC_NAME:
         pytest.skip(' [2020-12-14] Do not test ovirt-engine-notifier on HE suites')
@@ -1196,6 +1206,7 @@ def test_verify_notifier_restart(ansible_engine, engine_api, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_notifier_restart')
 def test_verify_notifier_trap(ansible_engine, engine_api, ost_dc_name):
     if ost_dc_name != engine_object_names.TEST_DC_NAME:
         pytest.skip(' [2020-12-14] Do not test ovirt-engine-notifier on HE suites')
@@ -1204,6 +1215,7 @@ def test_verify_notifier_trap(ansible_engine, engine_api, ost_dc_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_remove_default_dc')
 def test_add_vnic_passthrough_profile(engine_api):
     engine = engine_api.system_service()
     vnic_service = test_utils.get_vnic_profiles_service(engine, MANAGEMENT_NETWORK)
@@ -1219,6 +1231,7 @@ def test_add_vnic_passthrough_profile(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_vnic_passthrough_profile')
 def test_remove_vnic_passthrough_profile(engine_api):
     engine = engine_api.system_service()
     vnic_service = test_utils.get_vnic_profiles_service(engine, MANAGEMENT_NETWORK)
@@ -1239,6 +1252,7 @@ def test_remove_vnic_passthrough_profile(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_cluster', 'test_set_dc_quota_audit')
 def test_add_blank_vms(engine_api, ost_cluster_name):
     engine = engine_api.system_service()
     vms_service = engine.vms_service()
@@ -1296,6 +1310,7 @@ def test_add_blank_vms(engine_api, ost_cluster_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_hosts', 'test_set_dc_quota_audit', resources=['vm2'])
 def test_add_blank_high_perf_vm2(engine_api, ost_dc_name, ost_cluster_name):
     engine = engine_api.system_service()
     hosts_service = engine.hosts_service()
@@ -1388,6 +1403,7 @@ def test_add_blank_high_perf_vm2(engine_api, ost_dc_name, ost_cluster_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_blank_high_perf_vm2', resources=['vm2'])
 def test_configure_high_perf_vm2(engine_api):
     engine = engine_api.system_service()
     vm2_service = test_utils.get_vm_service(engine, VM2_NAME)
@@ -1428,6 +1444,7 @@ def test_configure_high_perf_vm2(engine_api):
 
 @versioning.require_version(4, 1)
 @order_by(_TEST_LIST)
+@depends_on('test_add_blank_high_perf_vm2', 'test_add_secondary_storage_domains', resources=['vm2'])
 def test_add_vm2_lease(engine_api):
     engine = engine_api.system_service()
     vm2_service = test_utils.get_vm_service(engine, VM2_NAME)
@@ -1445,6 +1462,7 @@ def test_add_vm2_lease(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_blank_vms', 'test_configure_high_perf_vm2', 'test_remove_default_dc', resources=['vm2'])
 def test_add_nic(engine_api):
     NIC_NAME = 'eth0'
     # Locate the vnic profiles service and use it to find the ovirmgmt
@@ -1490,6 +1508,7 @@ def test_add_nic(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_blank_vms')
 def test_add_graphics_console(engine_api, ansible_host0_facts):
     # remove VNC
     engine = engine_api.system_service()
@@ -1510,6 +1529,7 @@ def test_add_graphics_console(engine_api, ansible_host0_facts):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_nic')
 def test_add_filter(engine_api, tested_ip_version):
     engine = engine_api.system_service()
     nics_service = test_utils.get_nics_service(engine, VM0_NAME)
@@ -1535,6 +1555,7 @@ def test_add_filter(engine_api, tested_ip_version):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_filter')
 def test_add_filter_parameter(engine_api, management_gw_ip):
     engine = engine_api.system_service()
     network_filter_parameters_service = test_utils.get_network_fiter_parameters_service(engine, VM0_NAME)
@@ -1546,6 +1567,7 @@ def test_add_filter_parameter(engine_api, management_gw_ip):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_blank_high_perf_vm2', resources=['vm2'])
 def test_add_serial_console_vm2(engine_api):
     engine = engine_api.system_service()
     # Find the virtual machine. Note the use of the `all_content` parameter, it is
@@ -1559,6 +1581,7 @@ def test_add_serial_console_vm2(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_add_instance_type(engine_api):
     engine = engine_api.system_service()
     instance_types_service = engine.instance_types_service()
@@ -1585,6 +1608,7 @@ def test_add_instance_type(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_cluster')
 def test_add_event(engine_api, ost_cluster_name):
     events_service = engine_api.system_service().events_service()
     assert events_service.add(  # Add a new event to the system
@@ -1621,6 +1645,7 @@ def sd_iscsi_host_direct_luns(
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_blank_vms', 'test_add_nfs_master_storage_domain', 'test_add_iscsi_master_storage_domain')
 def test_add_direct_lun_vm0(engine_api, sd_iscsi_host_direct_luns):
     dlun_params = sdk4.types.Disk(
         name=DLUN_DISK_NAME,
@@ -1647,6 +1672,7 @@ def test_add_direct_lun_vm0(engine_api, sd_iscsi_host_direct_luns):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_add_nonadmin_user(
     engine_api,
     engine_api_url,
@@ -1725,6 +1751,7 @@ def nonadmin_user(keycloak_enabled, engine_api, ansible_engine, nonadmin_usernam
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_blank_vms', 'test_add_nonadmin_user')
 def test_add_vm_permissions_to_user(engine_api, nonadmin_user):
     vms_service = engine_api.system_service().vms_service()
     vm = vms_service.list(search='name=vm0')[0]
@@ -1741,6 +1768,7 @@ def test_add_vm_permissions_to_user(engine_api, nonadmin_user):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_nfs_master_storage_domain', 'test_add_iscsi_master_storage_domain')
 def test_upload_cirros_image(
     ansible_engine,
     engine_fqdn,
@@ -1751,11 +1779,7 @@ def test_upload_cirros_image(
 ):
     collection = CollectionMapper(ansible_engine)
 
-    ovirt_auth = collection.ovirt_auth(
-        hostname=engine_fqdn,
-        username=engine_full_username,
-        password=engine_password,
-    )[
+    ovirt_auth = collection.ovirt_auth(hostname=engine_fqdn, username=engine_full_username, password=engine_password,)[
         "ansible_facts"
     ]["ovirt_auth"]
 
@@ -1771,6 +1795,7 @@ def test_upload_cirros_image(
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_nfs_master_storage_domain', 'test_add_iscsi_master_storage_domain')
 def test_create_cirros_template(
     ansible_engine,
     ansible_inventory,
@@ -1803,6 +1828,7 @@ def test_create_cirros_template(
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_upload_cirros_image', 'test_create_cirros_template')
 def test_verify_uploaded_image_and_template(
     engine_api,
     cirros_image_template_name,
@@ -6,7 +6,6 @@
 #
 from __future__ import absolute_import
 
-import functools
 import logging
 import os
 from os import EX_OK
@@ -29,8 +28,8 @@ from ost_utils import host_utils
 from ost_utils.shell import shell
 from ost_utils import ssh
 from ost_utils import test_utils
-from ost_utils import utils
 from ost_utils import versioning
+from ost_utils.pytest import depends_on
 from ost_utils.pytest import order_by
 from ost_utils.pytest.fixtures.backend import tested_ip_version
 from ost_utils.pytest.fixtures.network import management_subnet
@@ -183,10 +182,12 @@ def vm_ssh(get_vm_ip, vm_user, vm_password):
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_verify_add_all_hosts(hosts_service, ost_dc_name):
     assert assert_utils.true_within(
         lambda: host_utils.all_hosts_up(hosts_service, ost_dc_name),
         timeout=constants.ADD_HOST_TIMEOUT,
+        wakeup=host_utils.events_wakeup(hosts_service),
     )
 
 
@@ -225,6 +226,7 @@ def _disk_attachment(**params):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_verify_add_vm1_from_template')
 def test_add_disks(engine_api, cirros_image_disk_name, secondary_storage_domain_name):
     engine = engine_api.system_service()
     vm_service = test_utils.get_vm_service(engine, VM0_NAME)
@@ -301,7 +303,7 @@ def test_add_disks(engine_api, cirros_image_disk_name, secondary_storage_domain_
         disk_attachments_service = test_utils.get_disk_attachments_service(engine, vm_name)
         assert disk_attachments_service.add(_disk_attachment(**disk_attachment_params))
 
-    disk_services = (test_utils.get_disk_service(engine, disk_name) for _, disk_name in disks_params)
+    disk_services = test_utils.get_disk_services(engine, [disk_name for _, disk_name in disks_params])
     assert assert_utils.true_within_short(
         lambda: all(disk_service.get().status == types.DiskStatus.OK for disk_service in disk_services)
     )
@@ -310,6 +312,7 @@ def test_add_disks(engine_api, cirros_image_disk_name, secondary_storage_domain_
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_disks')
 def test_copy_template_disk(system_service, cirros_image_disk_name, secondary_storage_domain_name):
     cirros_disk = test_utils.get_disk_service(system_service, cirros_image_disk_name)
 
@@ -317,6 +320,7 @@ def test_copy_template_disk(system_service, cirros_image_disk_name, secondary_st
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_add_floating_disk(engine_api, disks_service):
     disks_service.add(
         types.Disk(
@@ -368,6 +372,7 @@ def test_sparsify_disk1(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_disks', resources=['vm2'])
 def test_add_snapshot_for_backup(engine_api):
     engine = engine_api.system_service()
 
@@ -388,7 +393,10 @@ def test_add_snapshot_for_backup(engine_api):
         # USER_CREATE_SNAPSHOT_FINISHED_SUCCESS(68) event
         vm2_snapshots_service.add(backup_snapshot_params, query={'correlation_id': correlation_id})
 
-        assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id))
+        assert assert_utils.true_within_long(
+            lambda: test_utils.all_jobs_finished(engine, correlation_id),
+            wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id),
+        )
         assert assert_utils.equals_within_long(
             lambda: vm2_snapshots_service.list()[-1].snapshot_status,
             types.SnapshotStatus.OK,
@@ -396,6 +404,7 @@ def test_add_snapshot_for_backup(engine_api):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_floating_disk')
 def test_clone_powered_off_vm(system_service, vms_service, ost_cluster_name):
     # Prepare a VM with minimal disk size to clone
     vms_service.add(
@@ -432,6 +441,7 @@ def test_clone_powered_off_vm(system_service, vms_service, ost_cluster_name):
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_copy_template_disk')
 def test_verify_template_disk_copied_and_removed(
     system_service, cirros_image_disk_name, secondary_storage_domain_name
 ):
@@ -504,7 +514,10 @@ def test_verify_transient_folder(assert_vm_is_alive, engine_api, get_ansible_hos
 def test_verify_and_remove_cloned_vm(system_service, get_disk_services_for_vm_or_template, get_vm_service_for_vm):
     correlation_id = 'clone_powered_off_vm'
 
-    assert assert_utils.true_within_short(lambda: test_utils.all_jobs_finished(system_service, correlation_id))
+    assert assert_utils.true_within_short(
+        lambda: test_utils.all_jobs_finished(system_service, correlation_id),
+        wakeup=test_utils.all_jobs_finished_wakeup(system_service, correlation_id),
+    )
 
     cloned_vm_service = _verify_vm_state(system_service, CLONED_VM_NAME, types.VmStatus.DOWN)
     _verify_vm_disks_state(
@@ -567,7 +580,10 @@ def snapshot_cold_merge(engine_api):
 
     vm1_snapshots_service.add(dead_snap1_params, query={'correlation_id': correlation_id})
 
-    assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id))
+    assert assert_utils.true_within_long(
+        lambda: test_utils.all_jobs_finished(engine, correlation_id),
+        wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id),
+    )
     assert assert_utils.equals_within_long(
         lambda: vm1_snapshots_service.list()[-1].snapshot_status,
         types.SnapshotStatus.OK,
@@ -582,7 +598,10 @@ def snapshot_cold_merge(engine_api):
 
     vm1_snapshots_service.add(dead_snap2_params, query={'correlation_id': correlation_id_snap2})
 
-    assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id_snap2))
+    assert assert_utils.true_within_long(
+        lambda: test_utils.all_jobs_finished(engine, correlation_id_snap2),
+        wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id_snap2),
+    )
     assert assert_utils.equals_within_long(
         lambda: vm1_snapshots_service.list()[-1].snapshot_status,
         types.SnapshotStatus.OK,
@@ -625,7 +644,10 @@ def test_make_snapshot_with_memory(engine_api):
 def test_preview_snapshot_with_memory(engine_api):
     engine = engine_api.system_service()
     correlation_id = "make_preview_snapshot_with_memory"
-    assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id))
+    assert assert_utils.true_within_long(
+        lambda: test_utils.all_jobs_finished(engine, correlation_id),
+        wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id),
+    )
     vm_service = test_utils.get_vm_service(engine, VM0_NAME)
     vm_service.stop()
     _verify_vm_state(engine, VM0_NAME, types.VmStatus.DOWN)
@@ -721,7 +743,10 @@ def test_live_storage_migration(engine_api):
         query={'correlation_id': correlation_id},
     )
 
-    assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id))
+    assert assert_utils.true_within_long(
+        lambda: test_utils.all_jobs_finished(engine, correlation_id),
+        wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id),
+    )
 
     # Assert that the disk is on the correct storage domain,
     # its status is OK and the snapshot created for the migration
@@ -798,7 +823,10 @@ def test_verify_template_exported(engine_api, cirros_image_template_name):
     template_service = test_utils.get_template_service(engine, cirros_image_template_name)
     if template_service is None:
         pytest.skip(f'{test_verify_template_exported.__name__}: template {cirros_image_template_name} is missing')
-    assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id))
+    assert assert_utils.true_within_long(
+        lambda: test_utils.all_jobs_finished(engine, correlation_id),
+        wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id),
+    )
 
 
 @order_by(_TEST_LIST)
@@ -829,7 +857,10 @@ def test_verify_vm_import_preallocated(engine_api, get_vm_service_for_vm, get_di
     engine = engine_api.system_service()
     correlation_id = "test_validate_ova_import_vm"
 
-    assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id))
+    assert assert_utils.true_within_long(
+        lambda: test_utils.all_jobs_finished(engine, correlation_id),
+        wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id),
+    )
     assert assert_utils.true_within_short(lambda: test_utils.get_vm_service(engine, IMPORTED_VM_NAME) is not None)
 
     vm_service = get_vm_service_for_vm(IMPORTED_VM_NAME)
@@ -873,7 +904,10 @@ def test_verify_template_import(engine_api, get_template_service_for_template, g
     engine = engine_api.system_service()
     correlation_id = "test_validate_ova_import_temp"
 
-    assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id))
+    assert assert_utils.true_within_long(
+        lambda: test_utils.all_jobs_finished(engine, correlation_id),
+        wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id),
+    )
     assert assert_utils.true_within_short(
         lambda: get_template_service_for_template(IMPORTED_TEMP_NAME) is not None,
         allowed_exceptions=[RuntimeError],
@@ -894,6 +928,7 @@ def test_verify_template_import(engine_api, get_template_service_for_template, g
 
 
 @order_by(_TEST_LIST)
+@depends_on()
 def test_add_vm1_from_template(engine_api, cirros_image_template_name, ost_cluster_name):
     engine = engine_api.system_service()
     templates_service = engine.templates_service()
@@ -944,6 +979,7 @@ def test_add_vm1_from_template(engine_api, cirros_image_template_name, ost_clust
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_vm1_from_template')
 def test_verify_add_vm1_from_template(engine_api, get_disk_services_for_vm_or_template, get_vm_service_for_vm):
     engine = engine_api.system_service()
     _verify_vm_state(engine, VM1_NAME, types.VmStatus.DOWN)
@@ -956,6 +992,7 @@ def test_verify_add_vm1_from_template(engine_api, get_disk_services_for_vm_or_te
 
 
 @order_by(_TEST_LIST)
+@depends_on('test_add_snapshot_for_backup', resources=['vm2'])
 def test_cold_incremental_backup_vm2(engine_api, get_vm_service_for_vm):
     vm2_service = _verify_vm_state(engine_api.system_service(), VM2_NAME, types.VmStatus.DOWN)
     vm2_backups_service = vm2_service.backups_service()
@@ -1222,7 +1259,10 @@ def test_update_vm_pool(engine_api):
         query={'correlation_id': correlation_id},
     )
     assert pool_service.get().max_user_vms == 2
-    assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id))
+    assert assert_utils.true_within_long(
+        lambda: test_utils.all_jobs_finished(engine, correlation_id),
+        wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id),
+    )
 
 
 @versioning.require_version(4, 1)
@@ -1253,7 +1293,10 @@ def test_remove_vm_pool(engine_api):
         pool_service.remove(query={'correlation_id': correlation_id})
         vm_pools_service = engine_api.system_service().vm_pools_service()
         assert len(vm_pools_service.list()) == 0
-    assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id))
+    assert assert_utils.true_within_long(
+        lambda: test_utils.all_jobs_finished(engine, correlation_id),
+        wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id),
+    )
 
 
 @order_by(_TEST_LIST)
@@ -1269,15 +1312,8 @@ def test_template_update(engine_api, cirros_image_template_name):
 
 
 @order_by(_TEST_LIST)
-def test_disk_operations(engine_api):
-    vt = utils.VectorThread(
-        [
-            functools.partial(cold_storage_migration, engine_api),
-            functools.partial(snapshot_cold_merge, engine_api),
-        ],
-    )
-    vt.start_all()
-    vt.join_all()
+def test_disk_operations(engine_api_pool):
+    engine_api_pool.gather(cold_storage_migration, snapshot_cold_merge)
 
 
 @pytest.fixture(scope="session")
@@ -1448,7 +1484,10 @@ def test_hotunplug_disk(engine_api):
             types.DiskAttachment(active=False),
             query={'correlation_id': correlation_id},
         )
-        assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(engine, correlation_id))
+        assert assert_utils.true_within_long(
+            lambda: test_utils.all_jobs_finished(engine, correlation_id),
+            wakeup=test_utils.all_jobs_finished_wakeup(engine, correlation_id),
+        )
 
         assert assert_utils.equals_within_short(lambda: disk_service.get().status, types.DiskStatus.OK)
 
@@ -91,7 +91,10 @@ def migrate_vm(all_hosts_hostnames, ansible_by_hostname, system_service):
 
     correlation_id = uuid.uuid4()
     vm_service.migrate(host=Host(name=dst_host), query={'correlation_id': correlation_id})
-    assert assert_utils.true_within_long(lambda: test_utils.all_jobs_finished(system_service, correlation_id))
+    assert assert_utils.true_within_long(
+        lambda: test_utils.all_jobs_finished(system_service, correlation_id),
+        wakeup=test_utils.all_jobs_finished_wakeup(system_service, correlation_id),
+    )
 
     # Verify that VDSM cleaned the vm in the source host
     def vm_is_not_on_host():
@@ -8,6 +8,7 @@ from __future__ import print_function
 
 from datetime import datetime
 from functools import cache
+import functools
 import logging
 import os
 import shutil
@@ -26,6 +27,7 @@ from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 from ost_utils import assert_utils
 from ost_utils import test_utils
 from ost_utils import constants
+from ost_utils import utils
 from ost_utils.constants import *
 from ost_utils.pytest.fixtures.ansible import ansible_host0_facts
 from ost_utils.pytest.fixtures.ansible import ansible_host1_facts
@@ -49,6 +51,8 @@ from ost_utils.shell import shell
 
 LOGGER = logging.getLogger(__name__)
 
+VM_MEMORY = 256 * 2**20
+
 
 # This is a variable that describes how long the client code will wait for a
 # response from the server. The default timeout is 5 mins. On the server side
@@ -120,15 +124,12 @@ def test_secure_connection_should_succeed_with_root_ca(engine_fqdn, engine_ip_ur
     )
 
 
-@pytest.fixture(scope="session")
-def ovirt_driver(
-    engine_webadmin_url, selenium_browser_options, selenium_grid_url, selenium_screen_width, selenium_screen_height
-):
+def _create_driver(engine_webadmin_url, grid_url, options, screen_width, screen_height):
     driver = None
     exception = None
     for i in range(5):
         try:
-            driver = webdriver.Remote(command_executor=selenium_grid_url, options=selenium_browser_options)
+            driver = webdriver.Remote(command_executor=grid_url, options=options)
             driver.implicitly_wait(5)
             driver.set_script_timeout(5)
             break
@@ -140,13 +141,91 @@ def ovirt_driver(
         raise exception
 
     ovirt_driver = Driver(driver)
-    ovirt_driver.set_window_size(selenium_screen_width, selenium_screen_height)
+    ovirt_driver.set_window_size(screen_width, screen_height)
     ovirt_driver.get(engine_webadmin_url)
+    return ovirt_driver
+
+
+class BrowserUnavailable(Exception):
+    pass
+
+
+def _available(ovirt_drivers):
+    return {name: driver for name, driver in ovirt_drivers.items() if not isinstance(driver, Exception)}
+
+
+def _in_all_browsers(ovirt_drivers, test, at_once=True):
+    """Calls test(browser_name, ovirt_driver) for all the browsers, at the
+    same time unless at_once is False because the test changes something
+    the other browsers would change too. A browser without a driver fails
+    without keeping the others from running. The failure of every browser
+    is logged, the first one is raised after the test ran in all of them"""
+    errors = {
+        name: BrowserUnavailable(f'{name} is not available: {driver}')
+        for name, driver in ovirt_drivers.items()
+        if isinstance(driver, Exception)
+    }
+    drivers = _available(ovirt_drivers)
+    names = list(drivers)
+    if at_once:
+        group = utils.TaskGroup(
+            [functools.partial(test, name, drivers[name]) for name in names],
+            fail_fast=False,
+            names=[f'{test.__qualname__} {name}' for name in names],
+        )
+        results = group.start().join(raise_exceptions=False)
+        errors.update(
+            (name, result) for name, result, span in zip(names, results, group.spans) if span.error is not None
+        )
+    else:
+        for name in names:
+            try:
+                test(name, drivers[name])
+            except Exception as e:
+                errors[name] = e
+    for name, error in errors.items():
+        LOGGER.error(f'{test.__qualname__} failed in {name}', exc_info=error)
+    if errors:
+        raise next(errors[name] for name in ovirt_drivers if name in errors)
+
+
+def _own(entities):
+    """Browser name -> the one of the entities the browser edits, so that the
+    browsers can edit at the same time without seeing each other's changes"""
+    names = sorted(BROWSERS)
+    assert len(entities) >= len(names), f'{len(names)} browsers need as many entities, got {entities}'
+    return dict(zip(names, entities))
 
+
+@pytest.fixture(scope="session")
+def ovirt_drivers(
+    engine_webadmin_url, selenium_grid, selenium_video_recorder, selenium_screen_width, selenium_screen_height
+):
+    """Browser name -> Driver, or the exception that kept the browser from
+    getting one, the drivers of all browsers are created at once"""
+    up = [name for name, node in selenium_grid.items() if node.error is None]
+    group = utils.TaskGroup(
+        [
+            functools.partial(
+                _create_driver,
+                engine_webadmin_url,
+                selenium_grid[name].url,
+                BROWSERS[name](),
+                selenium_screen_width,
+                selenium_screen_height,
+            )
+            for name in up
+        ],
+        fail_fast=False,
+        names=[f'webdriver {name}' for name in up],
+    )
+    created = dict(zip(up, group.start().join(raise_exceptions=False)))
+    drivers = {name: created.get(name, node.error) for name, node in selenium_grid.items()}
     try:
-        yield ovirt_driver
+        yield drivers
     finally:
-        ovirt_driver.quit()
+        for driver in _available(drivers).values():
+            driver.quit()
 
 
 @pytest.fixture(scope="session")
@@ -159,70 +238,82 @@ def selenium_artifacts_dir(artifacts_dir):
 
 
 @pytest.fixture(scope="session")
-def selenium_artifact_filename(selenium_browser_name):
-    def _selenium_artifact_filename(description, extension):
+def selenium_artifact_filename():
+    def _selenium_artifact_filename(browser_name, description, extension):
         date = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        return f"{date}_{selenium_browser_name}_{description}.{extension}"
+        return f"{date}_{browser_name}_{description}.{extension}"
 
     return _selenium_artifact_filename
 
 
 @pytest.fixture(scope="session")
 def selenium_artifact_full_path(selenium_artifacts_dir, selenium_artifact_filename):
-    def _selenium_artifact_full_path(description, extension):
+    def _selenium_artifact_full_path(browser_name, description, extension):
         return os.path.join(
             selenium_artifacts_dir,
-            selenium_artifact_filename(description, extension),
+            selenium_artifact_filename(browser_name, description, extension),
         )
 
     return _selenium_artifact_full_path
 
 
 @pytest.fixture(scope="session")
-def console_file_full_path(selenium_artifacts_dir):
-    return os.path.join(selenium_artifacts_dir, 'console.vv')
+def console_file_full_paths(selenium_artifacts_dir, selenium_grid):
+    """Browser name -> path of the console file it downloads, the browsers
+    can't share it"""
+    paths = {}
+    for name in selenium_grid:
+        path = os.path.join(selenium_artifacts_dir, name)
+        os.makedirs(path, exist_ok=True)
+        paths[name] = os.path.join(path, 'console.vv')
+    return paths
 
 
 @pytest.fixture(scope="session")
-def save_screenshot(ovirt_driver, selenium_artifact_full_path):
-    def save(description):
-        ovirt_driver.save_screenshot(selenium_artifact_full_path(description, 'png'))
+def save_screenshot(ovirt_drivers, selenium_artifact_full_path):
+    def save(browser_name, description):
+        ovirt_drivers[browser_name].save_screenshot(selenium_artifact_full_path(browser_name, description, 'png'))
 
     return save
 
 
 @pytest.fixture(scope="session")
-def save_page_source(ovirt_driver, selenium_artifact_full_path):
-    def save(description):
-        ovirt_driver.save_page_source(selenium_artifact_full_path(description, 'html'))
+def save_page_source(ovirt_drivers, selenium_artifact_full_path):
+    def save(browser_name, description):
+        ovirt_drivers[browser_name].save_page_source(selenium_artifact_full_path(browser_name, description, 'html'))
 
     return save
 
 
 @pytest.fixture(scope="session")
-def save_logs_from_browser(ovirt_driver, selenium_artifact_full_path):
-    def save(description):
+def save_logs_from_browser(ovirt_drivers, selenium_artifact_full_path):
+    def save(browser_name, description):
+        ovirt_driver = ovirt_drivers[browser_name]
         if ovirt_driver.get_capability('browserName') == 'chrome':
-            ovirt_driver.save_console_log(selenium_artifact_full_path(description, 'txt'))
-            ovirt_driver.save_performance_log(selenium_artifact_full_path(description, 'perf.txt'))
+            ovirt_driver.save_console_log(selenium_artifact_full_path(browser_name, description, 'txt'))
+            ovirt_driver.save_performance_log(selenium_artifact_full_path(browser_name, description, 'perf.txt'))
 
     return save
 
 
 @pytest.fixture(scope="function", autouse=True)
-def after_test(request, save_screenshot, save_page_source, save_logs_from_browser):
+def after_test(request, ovirt_drivers, save_screenshot, save_page_source, save_logs_from_browser):
     yield
     status = "failed" if request.session.testsfailed else "success"
     file_name = f'{request.node.originalname}_{status}'
-    save_screenshot(file_name)
-    if request.session.testsfailed:
-        save_logs_from_browser(file_name)
-        save_page_source(file_name)
+
+    def save(browser_name, ovirt_driver):
+        save_screenshot(browser_name, file_name)
+        if request.session.testsfailed:
+            save_logs_from_browser(browser_name, file_name)
+            save_page_source(browser_name, file_name)
+
+    _in_all_browsers(_available(ovirt_drivers), save)
 
 
 @pytest.fixture(scope="session")
-def user_login(ovirt_driver, keycloak_enabled):
-    def login(username, password):
+def user_login(keycloak_enabled):
+    def login(ovirt_driver, username, password):
         login_screen = LoginScreen(ovirt_driver, keycloak_enabled)
         login_screen.wait_for_displayed()
         login_screen.set_user_name(username)
@@ -233,452 +324,556 @@ def user_login(ovirt_driver, keycloak_enabled):
 
 
 def test_userportal(
-    ovirt_driver,
+    ovirt_drivers,
     nonadmin_username,
     nonadmin_password,
     user_login,
     engine_webadmin_url,
     save_screenshot,
 ):
-    welcome_screen = WelcomeScreen(ovirt_driver)
-    welcome_screen.wait_for_displayed()
-    welcome_screen.open_user_portal()
+    def in_browser(browser_name, ovirt_driver):
+        welcome_screen = WelcomeScreen(ovirt_driver)
+        welcome_screen.wait_for_displayed()
+        welcome_screen.open_user_portal()
 
-    user_login(nonadmin_username, nonadmin_password)
+        user_login(ovirt_driver, nonadmin_username, nonadmin_password)
 
-    vm_portal = VmPortal(ovirt_driver)
-    vm_portal.wait_for_displayed()
+        vm_portal = VmPortal(ovirt_driver)
+        vm_portal.wait_for_displayed()
 
-    # using vm0 requires logic from 002 _bootstrap::test_add_vm_permissions_to_user
-    assert assert_utils.equals_within_short(vm_portal.get_vm_count, 1)
-    vm0_status = vm_portal.get_vm_status('vm0')
-    assert vm0_status == 'Powering up' or vm0_status == 'Running'
-    save_screenshot('userportal')
+        # using vm0 requires logic from 002 _bootstrap::test_add_vm_permissions_to_user
+        assert assert_utils.equals_within_short(vm_portal.get_vm_count, 1)
+        vm0_status = vm_portal.get_vm_status('vm0')
+        assert vm0_status == 'Powering up' or vm0_status == 'Running'
+        save_screenshot(browser_name, 'userportal')
 
-    vm_portal.logout()
-    save_screenshot('userportal-logout')
+        vm_portal.logout()
+        save_screenshot(browser_name, 'userportal-logout')
 
-    welcome_screen = WelcomeScreen(ovirt_driver)
-    welcome_screen.wait_for_displayed()
-    assert welcome_screen.is_user_logged_out()
+        welcome_screen = WelcomeScreen(ovirt_driver)
+        welcome_screen.wait_for_displayed()
+        assert welcome_screen.is_user_logged_out()
+
+    _in_all_browsers(ovirt_drivers, in_browser)
 
 
 def test_non_admin_login_to_webadmin(
-    ovirt_driver,
+    ovirt_drivers,
     nonadmin_username,
     nonadmin_password,
     engine_webadmin_url,
     user_login,
 ):
-    welcome_screen = WelcomeScreen(ovirt_driver)
-    welcome_screen.wait_for_displayed()
-    welcome_screen.open_administration_portal()
-    user_login(nonadmin_username, nonadmin_password)
+    def in_browser(browser_name, ovirt_driver):
+        welcome_screen = WelcomeScreen(ovirt_driver)
+        welcome_screen.wait_for_displayed()
+        welcome_screen.open_administration_portal()
+        user_login(ovirt_driver, nonadmin_username, nonadmin_password)
+
+        assert welcome_screen.is_error_message_displayed()
+        assert 'not authorized' in welcome_screen.get_error_message()
+        assert welcome_screen.is_user_logged_in(nonadmin_username)
+        welcome_screen.logout()
+        assert welcome_screen.is_user_logged_out()
 
-    assert welcome_screen.is_error_message_displayed()
-    assert 'not authorized' in welcome_screen.get_error_message()
-    assert welcome_screen.is_user_logged_in(nonadmin_username)
-    welcome_screen.logout()
-    assert welcome_screen.is_user_logged_out()
+    _in_all_browsers(ovirt_drivers, in_browser)
 
 
 def test_login(
-    ovirt_driver,
+    ovirt_drivers,
     save_screenshot,
     engine_username,
     engine_password,
     engine_cert,
     keycloak_enabled,
 ):
+    def in_browser(browser_name, ovirt_driver):
+        save_screenshot(browser_name, 'welcome-screen')
 
-    save_screenshot('welcome-screen')
-
-    welcome_screen = WelcomeScreen(ovirt_driver)
-    welcome_screen.wait_for_displayed()
-    welcome_screen.open_administration_portal()
-
-    login_screen = LoginScreen(ovirt_driver, keycloak_enabled)
-    login_screen.wait_for_displayed()
-    login_screen.set_user_name(engine_username)
-    login_screen.set_user_password(engine_password)
-    login_screen.login()
-
-    webadmin_left_menu = WebAdminLeftMenu(ovirt_driver)
-    webadmin_left_menu.wait_for_displayed()
-
-    webadmin_top_menu = WebAdminTopMenu(ovirt_driver)
-    webadmin_top_menu.wait_for_displayed()
-
-    assert webadmin_left_menu.is_displayed()
-    assert webadmin_top_menu.is_displayed()
+        welcome_screen = WelcomeScreen(ovirt_driver)
+        welcome_screen.wait_for_displayed()
+        welcome_screen.open_administration_portal()
 
+        login_screen = LoginScreen(ovirt_driver, keycloak_enabled)
+        login_screen.wait_for_displayed()
+        login_screen.set_user_name(engine_username)
+        login_screen.set_user_password(engine_password)
+        login_screen.login()
 
-def test_clusters(ovirt_driver, save_screenshot, selenium_browser_name, ost_cluster_name):
-    cluster_description = f'Cluster description for {selenium_browser_name}'
+        webadmin_left_menu = WebAdminLeftMenu(ovirt_driver)
+        webadmin_left_menu.wait_for_displayed()
 
-    # Open cluster list view
-    webadmin_menu = WebAdminLeftMenu(ovirt_driver)
-    cluster_list_view = webadmin_menu.open_cluster_list_view()
-    save_screenshot('cluster-list-view')
+        webadmin_top_menu = WebAdminTopMenu(ovirt_driver)
+        webadmin_top_menu.wait_for_displayed()
 
-    # Test cluster list view
-    clusters = cluster_list_view.get_entities()
-    assert ost_cluster_name in clusters
+        assert webadmin_left_menu.is_displayed()
+        assert webadmin_top_menu.is_displayed()
 
-    cluster_list_view.select_entity(ost_cluster_name)
-    assert cluster_list_view.is_new_button_enabled() is True
-    assert cluster_list_view.is_edit_button_enabled() is True
-    assert cluster_list_view.is_upgrade_button_enabled() is True
+    _in_all_browsers(ovirt_drivers, in_browser)
 
-    # Edit cluster using dialog
-    cluster_dialog = cluster_list_view.edit(ost_cluster_name)
-    cluster_dialog.setDescription(cluster_description)
-    save_screenshot('cluster-edit-dialog')
-    cluster_dialog.ok()
 
-    # Test the edited value in the details view
-    cluster_list_view.wait_for_displayed()
-    cluster_detail_view = cluster_list_view.open_detail_view(ost_cluster_name)
-    assert cluster_detail_view.get_name() == ost_cluster_name
-    assert cluster_detail_view.get_description() == cluster_description
+@pytest.fixture
+def browser_clusters(engine_api, ost_cluster_name):
+    """Browser name -> name of an empty cluster of its own, like the OST
+    cluster, removed after the test"""
+    engine = engine_api.system_service()
+    ost_cluster = test_utils.get_cluster_service(engine, ost_cluster_name).get()
+    clusters_service = engine.clusters_service()
+    names = {browser_name: f'{browser_name}-cluster' for browser_name in BROWSERS}
+    added = []
+    try:
+        for name in names.values():
+            added.append(
+                clusters_service.add(
+                    types.Cluster(
+                        name=name,
+                        data_center=types.DataCenter(id=ost_cluster.data_center.id),
+                        cpu=types.Cpu(type=ost_cluster.cpu.type, architecture=ost_cluster.cpu.architecture),
+                        version=ost_cluster.version,
+                    )
+                )
+            )
+        yield names
+    finally:
+        for cluster in added:
+            clusters_service.cluster_service(cluster.id).remove()
 
 
-def test_cluster_upgrade(
-    ovirt_driver, engine_api, save_screenshot, ost_cluster_name, ansible_host0_facts, ansible_host1_facts
-):
-    host0_name = ansible_host0_facts.get("ansible_hostname")
-    host1_name = ansible_host1_facts.get("ansible_hostname")
-    cluster_service = test_utils.get_cluster_service(engine_api.system_service(), ost_cluster_name)
-    original_schedulling_policy_id = cluster_service.get().scheduling_policy.id
-    cluster_maintenance_schedulling_policy_id = '7677771e-5eab-422e-83fa-dc04080d21b7'
+def test_clusters(ovirt_drivers, save_screenshot, ost_cluster_name, browser_clusters):
+    def in_browser(browser_name, ovirt_driver):
+        cluster_name = browser_clusters[browser_name]
+        cluster_description = f'Cluster description for {browser_name}'
 
-    # cluster is not set to cluster_maintenance policy yet
-    assert original_schedulling_policy_id != cluster_maintenance_schedulling_policy_id
+        # Open cluster list view
+        webadmin_menu = WebAdminLeftMenu(ovirt_driver)
+        cluster_list_view = webadmin_menu.open_cluster_list_view()
+        save_screenshot(browser_name, 'cluster-list-view')
 
-    cluster_list_view = ClusterListView(ovirt_driver)
-    upgrade_dialog = cluster_list_view.upgrade(ost_cluster_name)
+        # Test cluster list view
+        clusters = cluster_list_view.get_entities()
+        assert ost_cluster_name in clusters
 
-    # UI plugin may need more time to settle. Adding because of frequent:
-    # selenium.common.exceptions.ElementClickInterceptedException: Message: element click intercepted:
-    # Element <input aria-label="Select all rows" name="check-all" type="checkbox"> is not clickable at
-    # point (13, 755). Other element would receive the click: <div class="pf-l-bullseye">
-    time.sleep(1)
+        cluster_list_view.select_entity(ost_cluster_name)
+        assert cluster_list_view.is_new_button_enabled() is True
+        assert cluster_list_view.is_edit_button_enabled() is True
+        assert cluster_list_view.is_upgrade_button_enabled() is True
 
-    upgrade_dialog.toggle_check_all_hosts()
-    save_screenshot('cluster-upgrade-dialog-select-hosts')
-    upgrade_dialog.next()
+        # Edit the browser's own cluster using dialog
+        assert cluster_name in clusters
+        cluster_dialog = cluster_list_view.edit(cluster_name)
+        cluster_dialog.setDescription(cluster_description)
+        save_screenshot(browser_name, 'cluster-edit-dialog')
+        cluster_dialog.ok()
 
-    upgrade_dialog.toggle_check_for_upgrade()
-    upgrade_dialog.toggle_reboot_hosts()
-    save_screenshot('cluster-upgrade-dialog-options')
-    upgrade_dialog.next()
+        # Test the edited value in the details view
+        cluster_list_view.wait_for_displayed()
+        cluster_detail_view = cluster_list_view.open_detail_view(cluster_name)
+        assert cluster_detail_view.get_name() == cluster_name
+        assert cluster_detail_view.get_description() == cluster_description
 
-    save_screenshot('cluster-upgrade-dialog-review')
-    upgrade_dialog.upgrade()
+    _in_all_browsers(ovirt_drivers, in_browser)
 
-    save_screenshot('cluster-upgrade-dialog-progress')
 
-    events_view = upgrade_dialog.go_to_event_log()
-    assert assert_utils.true_within_short(lambda: events_view.events_contain('Cluster upgrade progress: 0%'))
-    assert assert_utils.true_within_short(lambda: events_view.events_contain('Successfully set upgrade running flag'))
-
-    # cluster is set to cluster_maintenance policy
-    assert assert_utils.true_within_short(
-        lambda: cluster_service.get().scheduling_policy.id == cluster_maintenance_schedulling_policy_id
-    )
+def test_cluster_upgrade(
+    ovirt_drivers, engine_api, save_screenshot, ost_cluster_name, ansible_host0_facts, ansible_host1_facts
+):
+    def in_browser(browser_name, ovirt_driver):
+        host0_name = ansible_host0_facts.get("ansible_hostname")
+        host1_name = ansible_host1_facts.get("ansible_hostname")
+        cluster_service = test_utils.get_cluster_service(engine_api.system_service(), ost_cluster_name)
+        original_schedulling_policy_id = cluster_service.get().scheduling_policy.id
+        cluster_maintenance_schedulling_policy_id = '7677771e-5eab-422e-83fa-dc04080d21b7'
+
+        # cluster is not set to cluster_maintenance policy yet
+        assert original_schedulling_policy_id != cluster_maintenance_schedulling_policy_id
+
+        cluster_list_view = ClusterListView(ovirt_driver)
+        upgrade_dialog = cluster_list_view.upgrade(ost_cluster_name)
+
+        # UI plugin may need more time to settle. Adding because of frequent:
+        # selenium.common.exceptions.ElementClickInterceptedException: Message: element click intercepted:
+        # Element <input aria-label="Select all rows" name="check-all" type="checkbox"> is not clickable at
+        # point (13, 755). Other element would receive the click: <div class="pf-l-bullseye">
+        time.sleep(1)
+
+        upgrade_dialog.toggle_check_all_hosts()
+        save_screenshot(browser_name, 'cluster-upgrade-dialog-select-hosts')
+        upgrade_dialog.next()
+
+        upgrade_dialog.toggle_check_for_upgrade()
+        upgrade_dialog.toggle_reboot_hosts()
+        save_screenshot(browser_name, 'cluster-upgrade-dialog-options')
+        upgrade_dialog.next()
+
+        save_screenshot(browser_name, 'cluster-upgrade-dialog-review')
+        upgrade_dialog.upgrade()
+
+        save_screenshot(browser_name, 'cluster-upgrade-dialog-progress')
+
+        events_view = upgrade_dialog.go_to_event_log()
+        assert assert_utils.true_within_short(lambda: events_view.events_contain('Cluster upgrade progress: 0%'))
+        assert assert_utils.true_within_short(
+            lambda: events_view.events_contain('Successfully set upgrade running flag')
+        )
 
-    # upgrade finished on both hosts
-    assert assert_utils.true_within_short(
-        lambda: events_view.events_contain(f'Upgrade of cluster {ost_cluster_name} finished successfully')
-    )
-    assert assert_utils.true_within_short(lambda: events_view.events_contain('Cluster upgrade progress: 100%'))
-    assert assert_utils.true_within_short(
-        lambda: events_view.events_contain('Successfully cleared upgrade running flag')
-    )
+        # cluster is set to cluster_maintenance policy
+        assert assert_utils.true_within_short(
+            lambda: cluster_service.get().scheduling_policy.id == cluster_maintenance_schedulling_policy_id
+        )
 
-    # cluster is set to the original policy
-    assert assert_utils.true_within_short(
-        lambda: cluster_service.get().scheduling_policy.id == original_schedulling_policy_id
-    )
+        # upgrade finished on both hosts
+        assert assert_utils.true_within_short(
+            lambda: events_view.events_contain(f'Upgrade of cluster {ost_cluster_name} finished successfully')
+        )
+        assert assert_utils.true_within_short(lambda: events_view.events_contain('Cluster upgrade progress: 100%'))
+        assert assert_utils.true_within_short(
+            lambda: events_view.events_contain('Successfully cleared upgrade running flag')
+        )
 
+        # cluster is set to the original policy
+        assert assert_utils.true_within_short(
+            lambda: cluster_service.get().scheduling_policy.id == original_schedulling_policy_id
+        )
 
-def test_hosts(ovirt_driver, ansible_host0_facts, save_screenshot, selenium_browser_name):
-    host_name = ansible_host0_facts.get("ansible_hostname")
-    host_comment = f'Host comment for {selenium_browser_name}'
-
-    # Open host list view
-    webadmin_menu = WebAdminLeftMenu(ovirt_driver)
-    host_list_view = webadmin_menu.open_host_list_view()
-    save_screenshot('host-list-view')
-
-    # Test host list view
-    hosts = host_list_view.get_entities()
-    assert host_name in hosts
-    assert host_list_view.is_new_button_enabled() is True
-    assert host_list_view.is_edit_button_enabled() is False
-    assert host_list_view.is_remove_button_enabled() is False
-    assert host_list_view.is_management_button_enabled() is False
-    assert host_list_view.is_install_button_enabled() is False
-    assert host_list_view.is_host_console_button_enabled() is False
-
-    host_list_view.select_entity(host_name)
-    assert host_list_view.is_new_button_enabled() is True
-    assert host_list_view.is_edit_button_enabled() is True
-    assert host_list_view.is_remove_button_enabled() is False
-    assert host_list_view.is_management_button_enabled() is True
-    assert host_list_view.is_install_button_enabled() is True
-    assert host_list_view.is_host_console_button_enabled() is True
-
-    # Edit host using dialog
-    host_dialog = host_list_view.edit(host_name)
-    host_dialog.set_comment(host_comment)
-    host_dialog.ok()
-
-    host_list_view.wait_for_displayed()
-    host_dialog = host_list_view.edit(host_name)
-    save_screenshot('host-edit-dialog')
-    assert host_dialog.get_comment() == host_comment
-    host_dialog.cancel()
-
-    # Test the hostname in the details view
-    host_list_view.wait_for_displayed()
-    host_detail_view = host_list_view.open_detail_view(host_name)
-    assert host_detail_view.get_hostname() == host_name
-
-
-def test_templates(ovirt_driver, cirros_image_template_name, save_screenshot, selenium_browser_name):
+    # the only cluster with hosts is upgraded by one browser at a time
+    _in_all_browsers(ovirt_drivers, in_browser, at_once=False)
+
+
+def test_hosts(ovirt_drivers, ansible_host0_facts, ansible_host1_facts, save_screenshot):
+    host_names = _own([ansible_host0_facts.get("ansible_hostname"), ansible_host1_facts.get("ansible_hostname")])
+
+    def in_browser(browser_name, ovirt_driver):
+        host_name = host_names[browser_name]
+        host_comment = f'Host comment for {browser_name}'
+
+        # Open host list view
+        webadmin_menu = WebAdminLeftMenu(ovirt_driver)
+        host_list_view = webadmin_menu.open_host_list_view()
+        save_screenshot(browser_name, 'host-list-view')
+
+        # Test host list view
+        hosts = host_list_view.get_entities()
+        assert host_name in hosts
+        assert host_list_view.is_new_button_enabled() is True
+        assert host_list_view.is_edit_button_enabled() is False
+        assert host_list_view.is_remove_button_enabled() is False
+        assert host_list_view.is_management_button_enabled() is False
+        assert host_list_view.is_install_button_enabled() is False
+        assert host_list_view.is_host_console_button_enabled() is False
+
+        host_list_view.select_entity(host_name)
+        assert host_list_view.is_new_button_enabled() is True
+        assert host_list_view.is_edit_button_enabled() is True
+        assert host_list_view.is_remove_button_enabled() is False
+        assert host_list_view.is_management_button_enabled() is True
+        assert host_list_view.is_install_button_enabled() is True
+        assert host_list_view.is_host_console_button_enabled() is True
+
+        # Edit host using dialog
+        host_dialog = host_list_view.edit(host_name)
+        host_dialog.set_comment(host_comment)
+        host_dialog.ok()
+
+        host_list_view.wait_for_displayed()
+        host_dialog = host_list_view.edit(host_name)
+        save_screenshot(browser_name, 'host-edit-dialog')
+        assert host_dialog.get_comment() == host_comment
+        host_dialog.cancel()
+
+        # Test the hostname in the details view
+        host_list_view.wait_for_displayed()
+        host_detail_view = host_list_view.open_detail_view(host_name)
+        assert host_detail_view.get_hostname() == host_name
+
+    # each browser edits the comment of a host of its own
+    _in_all_browsers(ovirt_drivers, in_browser)
+
+
+def test_templates(ovirt_drivers, cirros_image_template_name, save_screenshot):
     blank_template_name = 'Blank'
-    blank_template_description = f'Blank template description for {selenium_browser_name}'
     imported_template = 'imported_temp'
-    imported_template_description = f'Imported template description for {selenium_browser_name}'
-
-    # Open template list view
-    webadmin_menu = WebAdminLeftMenu(ovirt_driver)
-    template_list_view = webadmin_menu.open_template_list_view()
-    save_screenshot('host-list-view')
-
-    # Test templates list view
-    templates = template_list_view.get_entities()
-    assert blank_template_name in templates
-    assert cirros_image_template_name in templates
-    assert imported_template in templates
-    assert template_list_view.is_new_vm_button_enabled() is False
-    assert template_list_view.is_import_button_enabled() is True
-    assert template_list_view.is_edit_button_enabled() is False
-    assert template_list_view.is_remove_button_enabled() is False
-    assert template_list_view.is_export_button_enabled() is False
-
-    template_list_view.select_entity(blank_template_name)
-    assert template_list_view.is_new_vm_button_enabled() is True
-    assert template_list_view.is_import_button_enabled() is True
-    assert template_list_view.is_edit_button_enabled() is True
-    assert template_list_view.is_remove_button_enabled() is False
-    assert template_list_view.is_export_button_enabled() is False
-
-    template_list_view.select_entity(cirros_image_template_name)
-    assert template_list_view.is_new_vm_button_enabled() is True
-    assert template_list_view.is_import_button_enabled() is True
-    assert template_list_view.is_edit_button_enabled() is True
-    assert template_list_view.is_remove_button_enabled() is True
-    assert template_list_view.is_export_button_enabled() is True
-
-    # Edit templates using dialog
-    template_dialog = template_list_view.edit(blank_template_name)
-    template_dialog.setDescription(blank_template_description)
-    save_screenshot('blank-template-edit-dialog')
-    template_dialog.ok()
-
-    template_list_view.wait_for_displayed()
-    template_dialog = template_list_view.edit(imported_template)
-    template_dialog.setDescription(imported_template_description)
-    save_screenshot('imported-template-edit-dialog')
-    template_dialog.ok()
-
-    # Test the edited values in the details view
-    template_list_view.wait_for_displayed()
-    template_detail_view = template_list_view.open_detail_view(blank_template_name)
-    save_screenshot('blank-template-detail')
-    assert template_detail_view.get_name() == blank_template_name
-    assert template_detail_view.get_description() == blank_template_description
-
-    webadmin_menu.open_template_list_view()
-    template_detail_view = template_list_view.open_detail_view(imported_template)
-    assert template_detail_view.get_name() == imported_template
-    assert template_detail_view.get_description() == imported_template_description
-
-
-def test_pools(ovirt_driver):
-    webadmin_menu = WebAdminLeftMenu(ovirt_driver)
-    pool_list_view = webadmin_menu.open_pool_list_view()
-
-    pools = pool_list_view.get_entities()
-    assert not pools
-    assert pool_list_view.is_new_button_enabled() is True
-    assert pool_list_view.is_edit_button_enabled() is False
-    assert pool_list_view.is_remove_button_enabled() is False
+    edited_templates = _own([blank_template_name, imported_template])
+
+    def in_browser(browser_name, ovirt_driver):
+        edited_template = edited_templates[browser_name]
+        edited_template_description = f'Template description for {browser_name}'
+
+        # Open template list view
+        webadmin_menu = WebAdminLeftMenu(ovirt_driver)
+        template_list_view = webadmin_menu.open_template_list_view()
+        save_screenshot(browser_name, 'host-list-view')
+
+        # Test templates list view
+        templates = template_list_view.get_entities()
+        assert blank_template_name in templates
+        assert cirros_image_template_name in templates
+        assert imported_template in templates
+        assert template_list_view.is_new_vm_button_enabled() is False
+        assert template_list_view.is_import_button_enabled() is True
+        assert template_list_view.is_edit_button_enabled() is False
+        assert template_list_view.is_remove_button_enabled() is False
+        assert template_list_view.is_export_button_enabled() is False
+
+        template_list_view.select_entity(blank_template_name)
+        assert template_list_view.is_new_vm_button_enabled() is True
+        assert template_list_view.is_import_button_enabled() is True
+        assert template_list_view.is_edit_button_enabled() is True
+        assert template_list_view.is_remove_button_enabled() is False
+        assert template_list_view.is_export_button_enabled() is False
+
+        template_list_view.select_entity(cirros_image_template_name)
+        assert template_list_view.is_new_vm_button_enabled() is True
+        assert template_list_view.is_import_button_enabled() is True
+        assert template_list_view.is_edit_button_enabled() is True
+        assert template_list_view.is_remove_button_enabled() is True
+        assert template_list_view.is_export_button_enabled() is True
+
+        # Edit the browser's own template using dialog
+        template_dialog = template_list_view.edit(edited_template)
+        template_dialog.setDescription(edited_template_description)
+        save_screenshot(browser_name, 'template-edit-dialog')
+        template_dialog.ok()
+
+        # Test the edited value in the details view
+        template_list_view.wait_for_displayed()
+        template_detail_view = template_list_view.open_detail_view(edited_template)
+        save_screenshot(browser_name, 'template-detail')
+        assert template_detail_view.get_name() == edited_template
+        assert template_detail_view.get_description() == edited_template_description
+
+    # each browser edits the description of a template of its own
+    _in_all_browsers(ovirt_drivers, in_browser)
+
+
+def test_pools(ovirt_drivers):
+    def in_browser(browser_name, ovirt_driver):
+        webadmin_menu = WebAdminLeftMenu(ovirt_driver)
+        pool_list_view = webadmin_menu.open_pool_list_view()
+
+        pools = pool_list_view.get_entities()
+        assert not pools
+        assert pool_list_view.is_new_button_enabled() is True
+        assert pool_list_view.is_edit_button_enabled() is False
+        assert pool_list_view.is_remove_button_enabled() is False
+
+    _in_all_browsers(ovirt_drivers, in_browser)
+
+
+@pytest.fixture
+def browser_vms(engine_api, ost_cluster_name):
+    """Browser name -> name of a diskless VM of its own, down, removed after
+    the test"""
+    vms_service = engine_api.system_service().vms_service()
+    names = {browser_name: f'{browser_name}-vm' for browser_name in BROWSERS}
+    vm_services = []
+    try:
+        for name in names.values():
+            vm = vms_service.add(
+                types.Vm(
+                    name=name,
+                    cluster=types.Cluster(name=ost_cluster_name),
+                    template=types.Template(name='Blank'),
+                    memory=VM_MEMORY,
+                    memory_policy=types.MemoryPolicy(guaranteed=VM_MEMORY, max=VM_MEMORY),
+                )
+            )
+            vm_services.append(vms_service.vm_service(vm.id))
+        for vm_service in vm_services:
+            assert assert_utils.equals_within_short(lambda: vm_service.get().status, types.VmStatus.DOWN)
+        yield names
+    finally:
+        for vm_service in vm_services:
+            # e.g. while a template is made of it
+            assert assert_utils.true_within_short(lambda: vm_service.get().status != types.VmStatus.IMAGE_LOCKED)
+            if vm_service.get().status != types.VmStatus.DOWN:
+                vm_service.stop()
+                assert assert_utils.equals_within_short(lambda: vm_service.get().status, types.VmStatus.DOWN)
+            vm_service.remove()
 
 
 @pytest.fixture
 def setup_virtual_machines(engine_api):
-    vm_service = test_utils.get_vm_service(engine_api.system_service(), 'vm0')
-    if vm_service.get().status == types.VmStatus.DOWN:
-        vm_service.start()
-        assert assert_utils.equals_within_long(lambda: vm_service.get().status, types.VmStatus.POWERING_UP)
+    def setup(vm_name):
+        vm_service = test_utils.get_vm_service(engine_api.system_service(), vm_name)
+        if vm_service.get().status == types.VmStatus.DOWN:
+            vm_service.start()
+            assert assert_utils.true_within_long(
+                lambda: vm_service.get().status in (types.VmStatus.POWERING_UP, types.VmStatus.UP)
+            )
+
+    return setup
 
 
 @pytest.fixture
-def console_file_helper(console_file_full_path, selenium_artifact_full_path):
-    try:
-        os.remove(console_file_full_path)
-    except FileNotFoundError:
-        pass
+def console_file_helper(console_file_full_paths, selenium_artifact_full_path):
+    for console_file_full_path in console_file_full_paths.values():
+        try:
+            os.remove(console_file_full_path)
+        except FileNotFoundError:
+            pass
 
     yield
 
-    try:
-        os.rename(
-            console_file_full_path,
-            selenium_artifact_full_path('console', 'vv'),
-        )
-    except FileNotFoundError:
-        pass
+    for browser_name, console_file_full_path in console_file_full_paths.items():
+        try:
+            os.rename(
+                console_file_full_path,
+                selenium_artifact_full_path(browser_name, 'console', 'vv'),
+            )
+        except FileNotFoundError:
+            pass
 
 
 def test_virtual_machines(
     ansible_storage,
-    ovirt_driver,
+    ovirt_drivers,
     setup_virtual_machines,
     save_screenshot,
-    console_file_full_path,
+    console_file_full_paths,
     console_file_helper,
-    selenium_remote_artifacts_dir,
+    selenium_grid,
+    browser_vms,
 ):
-    vm_name = 'vm0'
-    vm_description = f'VM description for {selenium_browser_name}'
-
-    # Open VM list view
-    webadmin_menu = WebAdminLeftMenu(ovirt_driver)
-    vm_list_view = webadmin_menu.open_vm_list_view()
-    save_screenshot('vm-list-view')
-
-    # Test VM list view
-    vms = vm_list_view.get_entities()
-    assert vm_name in vms
-    assert vm_list_view.is_new_button_enabled() is True
-    assert vm_list_view.is_edit_button_enabled() is False
-    assert vm_list_view.is_shutdown_button_enabled() is False
-    assert vm_list_view.is_migrate_button_enabled() is False
-
-    vm_list_view.select_entity(vm_name)
-    assert vm_list_view.is_new_button_enabled() is True
-    assert vm_list_view.is_edit_button_enabled() is True
-    assert vm_list_view.is_shutdown_button_enabled() is True
-    assert vm_list_view.is_migrate_button_enabled() is True
-
-    vm_list_view.poweroff()
-    assert vm_list_view.is_new_button_enabled() is True
-    assert vm_list_view.is_edit_button_enabled() is True
-    assert vm_list_view.is_shutdown_button_enabled() is False
-    assert vm_list_view.is_migrate_button_enabled() is False
-
-    # Edit VM using dialog
-    vm_dialog = vm_list_view.edit(vm_name)
-    vm_dialog.setDescription(vm_description)
-    save_screenshot('vm-edit-dialog')
-    vm_dialog.ok()
-
-    # Test the VM details view
-    vm_list_view.wait_for_displayed()
-    vm_detail_view = vm_list_view.open_detail_view(vm_name)
-    save_screenshot('vm-detail')
-    assert vm_detail_view.get_name() == vm_name
-    assert vm_detail_view.get_description() == vm_description
-    assert vm_detail_view.get_status() == 'Down'
-
-    # Test Run Once
-    run_once_dialog = vm_list_view.run_once()
-    run_once_dialog.toggle_console_options()
-    run_once_dialog.select_vnc()
-    run_once_dialog.run()
-
-    # Waiting for Powering Up instead of Up to speed up the test execution
-    vm_detail_view.wait_for_statuses(['Powering Up', 'Up'])
-    vm_status = vm_detail_view.get_status()
-    save_screenshot('vms-after-run-once')
-    assert vm_status == 'Powering Up' or vm_status == 'Up'
-
-    # Test Manage VGPU dialog
-    vm_detail_host_devices_tab = vm_detail_view.open_host_devices_tab()
-    vm_vgpu_dialog = vm_detail_host_devices_tab.open_manage_vgpu_dialog()
-
-    assert vm_vgpu_dialog.get_title() == 'Manage vGPU'
-
-    vgpu_table_row_1_data = vm_vgpu_dialog.get_row_data(1)
-    assert vgpu_table_row_1_data[2] == 'nvidia-11'
-    assert vgpu_table_row_1_data[3] == 'GRID M10-2B'
-    assert vgpu_table_row_1_data[4] == '2'
-    assert vgpu_table_row_1_data[5] == '45'
-    assert vgpu_table_row_1_data[6] == '4096x2160'
-    assert vgpu_table_row_1_data[7] == '2048M'
-    assert vgpu_table_row_1_data[8] == '4'
-    assert vgpu_table_row_1_data[9] == '0'
-
-    save_screenshot('vms-vgpu')
-
-    vm_vgpu_dialog.cancel()
-
-    # Teste console file download
-    vm_list_view.download_console_file(console_file_full_path, ansible_storage, selenium_remote_artifacts_dir)
-
-    with open(console_file_full_path, encoding='utf-8') as f:
-        console_file_text = f.read()
-        assert '[virt-viewer]' in console_file_text
-        assert '[ovirt]' in console_file_text
+    def in_browser(browser_name, ovirt_driver):
+        vm_name = browser_vms[browser_name]
+        setup_virtual_machines(vm_name)
+        vm_description = f'VM description for {browser_name}'
+
+        # Open VM list view
+        webadmin_menu = WebAdminLeftMenu(ovirt_driver)
+        vm_list_view = webadmin_menu.open_vm_list_view()
+        save_screenshot(browser_name, 'vm-list-view')
+
+        # Test VM list view
+        vms = vm_list_view.get_entities()
+        assert vm_name in vms
+        assert vm_list_view.is_new_button_enabled() is True
+        assert vm_list_view.is_edit_button_enabled() is False
+        assert vm_list_view.is_shutdown_button_enabled() is False
+        assert vm_list_view.is_migrate_button_enabled() is False
+
+        vm_list_view.select_entity(vm_name)
+        assert vm_list_view.is_new_button_enabled() is True
+        assert vm_list_view.is_edit_button_enabled() is True
+        assert vm_list_view.is_shutdown_button_enabled() is True
+        assert vm_list_view.is_migrate_button_enabled() is True
+
+        vm_list_view.poweroff()
+        assert vm_list_view.is_new_button_enabled() is True
+        assert vm_list_view.is_edit_button_enabled() is True
+        assert vm_list_view.is_shutdown_button_enabled() is False
+        assert vm_list_view.is_migrate_button_enabled() is False
+
+        # Edit VM using dialog
+        vm_dialog = vm_list_view.edit(vm_name)
+        vm_dialog.setDescription(vm_description)
+        save_screenshot(browser_name, 'vm-edit-dialog')
+        vm_dialog.ok()
+
+        # Test the VM details view
+        vm_list_view.wait_for_displayed()
+        vm_detail_view = vm_list_view.open_detail_view(vm_name)
+        save_screenshot(browser_name, 'vm-detail')
+        assert vm_detail_view.get_name() == vm_name
+        assert vm_detail_view.get_description() == vm_description
+        assert vm_detail_view.get_status() == 'Down'
+
+        # Test Run Once
+        run_once_dialog = vm_list_view.run_once()
+        run_once_dialog.toggle_console_options()
+        run_once_dialog.select_vnc()
+        run_once_dialog.run()
+
+        # Waiting for Powering Up instead of Up to speed up the test execution
+        vm_detail_view.wait_for_statuses(['Powering Up', 'Up'])
+        vm_status = vm_detail_view.get_status()
+        save_screenshot(browser_name, 'vms-after-run-once')
+        assert vm_status == 'Powering Up' or vm_status == 'Up'
+
+        # Test Manage VGPU dialog
+        vm_detail_host_devices_tab = vm_detail_view.open_host_devices_tab()
+        vm_vgpu_dialog = vm_detail_host_devices_tab.open_manage_vgpu_dialog()
+
+        assert vm_vgpu_dialog.get_title() == 'Manage vGPU'
+
+        vgpu_table_row_1_data = vm_vgpu_dialog.get_row_data(1)
+        assert vgpu_table_row_1_data[2] == 'nvidia-11'
+        assert vgpu_table_row_1_data[3] == 'GRID M10-2B'
+        assert vgpu_table_row_1_data[4] == '2'
+        assert vgpu_table_row_1_data[5] == '45'
+        assert vgpu_table_row_1_data[6] == '4096x2160'
+        assert vgpu_table_row_1_data[7] == '2048M'
+        assert vgpu_table_row_1_data[8] == '4'
+        assert vgpu_table_row_1_data[9] == '0'
+
+        save_screenshot(browser_name, 'vms-vgpu')
+
+        vm_vgpu_dialog.cancel()
+
+        # Teste console file download
+        console_file_full_path = console_file_full_paths[browser_name]
+        vm_list_view.download_console_file(
+            console_file_full_path, ansible_storage, selenium_grid[browser_name].remote_dir
+        )
+
+        with open(console_file_full_path, encoding='utf-8') as f:
+            console_file_text = f.read()
+            assert '[virt-viewer]' in console_file_text
+            assert '[ovirt]' in console_file_text
+
+    # each browser powers a VM of its own off and runs it again
+    _in_all_browsers(ovirt_drivers, in_browser)
 
 
 def test_make_template(
     ansible_storage,
-    ovirt_driver,
-    selenium_browser_name,
+    ovirt_drivers,
     save_screenshot,
-    console_file_full_path,
     console_file_helper,
-    selenium_remote_artifacts_dir,
+    browser_vms,
 ):
-    webadmin_menu = WebAdminLeftMenu(ovirt_driver)
-    vm_list_view = webadmin_menu.open_vm_list_view()
+    def in_browser(browser_name, ovirt_driver):
+        webadmin_menu = WebAdminLeftMenu(ovirt_driver)
+        vm_list_view = webadmin_menu.open_vm_list_view()
+
+        template_name = f'{browser_name}_{int(time.time())}'
 
-    template_name = f'{selenium_browser_name}_{int(time.time())}'
+        vm_list_view = VmListView(ovirt_driver)
+        vm_list_view.select_entity(browser_vms[browser_name])
+        template_dialog = vm_list_view.new_template()
+        save_screenshot(browser_name, 'new-template-dialog')
+        template_dialog.set_name_and_ok(template_name)
 
-    vm_list_view = VmListView(ovirt_driver)
-    vm_list_view.select_entity('vm1')
-    template_dialog = vm_list_view.new_template()
-    save_screenshot('new-template-dialog')
-    template_dialog.set_name_and_ok(template_name)
+        webadmin_menu = WebAdminLeftMenu(ovirt_driver)
+        template_list_view = webadmin_menu.open_template_list_view()
+        templates = template_list_view.get_entities()
+        assert template_name in templates
+        assert assert_utils.equals_within_short(lambda: template_list_view.get_status(template_name), 'OK')
 
-    webadmin_menu = WebAdminLeftMenu(ovirt_driver)
-    template_list_view = webadmin_menu.open_template_list_view()
-    templates = template_list_view.get_entities()
-    assert template_name in templates
-    assert assert_utils.equals_within_short(lambda: template_list_view.get_status(template_name), 'OK')
+    # each browser makes a template of a VM of its own, which is locked
+    # meanwhile
+    _in_all_browsers(ovirt_drivers, in_browser)
 
 
-def test_storage_domains(ovirt_driver):
-    webadmin_menu = WebAdminLeftMenu(ovirt_driver)
-    storage_domain_list_view = webadmin_menu.open_storage_domain_list_view()
+def test_storage_domains(ovirt_drivers):
+    def in_browser(browser_name, ovirt_driver):
+        webadmin_menu = WebAdminLeftMenu(ovirt_driver)
+        storage_domain_list_view = webadmin_menu.open_storage_domain_list_view()
 
-    domains = storage_domain_list_view.get_entities()
-    assert constants.SD_NFS_NAME in domains
-    assert storage_domain_list_view.is_new_button_enabled() is True
-    assert storage_domain_list_view.is_import_button_enabled() is True
-    assert storage_domain_list_view.is_manage_button_enabled() is False
-    assert storage_domain_list_view.is_remove_button_enabled() is False
+        domains = storage_domain_list_view.get_entities()
+        assert constants.SD_NFS_NAME in domains
+        assert storage_domain_list_view.is_new_button_enabled() is True
+        assert storage_domain_list_view.is_import_button_enabled() is True
+        assert storage_domain_list_view.is_manage_button_enabled() is False
+        assert storage_domain_list_view.is_remove_button_enabled() is False
 
-    storage_domain_list_view.select_entity(constants.SD_NFS_NAME)
-    assert storage_domain_list_view.is_new_button_enabled() is True
-    assert storage_domain_list_view.is_import_button_enabled() is True
-    assert storage_domain_list_view.is_manage_button_enabled() is True
-    assert storage_domain_list_view.is_remove_button_enabled() is False
+        storage_domain_list_view.select_entity(constants.SD_NFS_NAME)
+        assert storage_domain_list_view.is_new_button_enabled() is True
+        assert storage_domain_list_view.is_import_button_enabled() is True
+        assert storage_domain_list_view.is_manage_button_enabled() is True
+        assert storage_domain_list_view.is_remove_button_enabled() is False
+
+    _in_all_browsers(ovirt_drivers, in_browser)
 
 
 @pytest.fixture(scope="session")
@@ -690,79 +885,86 @@ def image_local_path():
     return "/etc/hostname"
 
 
-def test_disks(ovirt_driver, selenium_browser_name, image_local_path):
+def test_disks(ovirt_drivers, image_local_path):
+    def in_browser(browser_name, ovirt_driver):
+        webadmin_menu = WebAdminLeftMenu(ovirt_driver)
+        disks_list_view = webadmin_menu.open_disks_list_view()
+
+        disks = disks_list_view.get_entities()
+        assert 'vm0_disk0' in disks
+        assert disks_list_view.is_new_button_enabled() is True
+        assert disks_list_view.is_edit_button_enabled() is False
+        assert disks_list_view.is_remove_button_enabled() is False
+        assert disks_list_view.is_move_button_enabled() is False
+        assert disks_list_view.is_copy_button_enabled() is False
+        assert disks_list_view.is_upload_button_enabled() is True
 
-    webadmin_menu = WebAdminLeftMenu(ovirt_driver)
-    disks_list_view = webadmin_menu.open_disks_list_view()
+        disks_list_view.select_entity('vm0_disk0')
+        assert disks_list_view.is_new_button_enabled() is True
+        assert disks_list_view.is_edit_button_enabled() is True
+        assert disks_list_view.is_remove_button_enabled() is True
+        assert disks_list_view.is_move_button_enabled() is True
+        assert disks_list_view.is_copy_button_enabled() is True
+        assert disks_list_view.is_upload_button_enabled() is True
 
-    disks = disks_list_view.get_entities()
-    assert 'vm0_disk0' in disks
-    assert disks_list_view.is_new_button_enabled() is True
-    assert disks_list_view.is_edit_button_enabled() is False
-    assert disks_list_view.is_remove_button_enabled() is False
-    assert disks_list_view.is_move_button_enabled() is False
-    assert disks_list_view.is_copy_button_enabled() is False
-    assert disks_list_view.is_upload_button_enabled() is True
+        image_name = f"{browser_name}-{int(time.time())}"
+        disks_list_view.upload(image_local_path, image_name)
+        assert assert_utils.equals_within_short(lambda: disks_list_view.get_status(image_name), 'OK')
 
-    disks_list_view.select_entity('vm0_disk0')
-    assert disks_list_view.is_new_button_enabled() is True
-    assert disks_list_view.is_edit_button_enabled() is True
-    assert disks_list_view.is_remove_button_enabled() is True
-    assert disks_list_view.is_move_button_enabled() is True
-    assert disks_list_view.is_copy_button_enabled() is True
-    assert disks_list_view.is_upload_button_enabled() is True
+    _in_all_browsers(ovirt_drivers, in_browser)
 
-    image_name = f"{selenium_browser_name}-{int(time.time())}"
-    disks_list_view.upload(image_local_path, image_name)
-    assert assert_utils.equals_within_short(lambda: disks_list_view.get_status(image_name), 'OK')
 
+def test_dashboard(ovirt_drivers):
+    def in_browser(browser_name, ovirt_driver):
+        webadmin_menu = WebAdminLeftMenu(ovirt_driver)
+        dashboard = webadmin_menu.open_dashboard_view()
 
-def test_dashboard(ovirt_driver):
-    webadmin_menu = WebAdminLeftMenu(ovirt_driver)
-    dashboard = webadmin_menu.open_dashboard_view()
+        assert dashboard.data_centers_count() is 1
+        assert dashboard.clusters_count() is 1
+        assert dashboard.hosts_count() is 2
+        assert dashboard.storage_domains_count() is 3
+        assert dashboard.vm_count() is 5
+        assert dashboard.events_count() > 0
 
-    assert dashboard.data_centers_count() is 1
-    assert dashboard.clusters_count() is 1
-    assert dashboard.hosts_count() is 2
-    assert dashboard.storage_domains_count() is 3
-    assert dashboard.vm_count() is 5
-    assert dashboard.events_count() > 0
+    _in_all_browsers(ovirt_drivers, in_browser)
 
 
 @pytest.mark.xfail(reason='Grafana update broke the test', strict=True)
 def test_grafana(
-    ovirt_driver,
+    ovirt_drivers,
     save_screenshot,
     engine_username,
     engine_password,
     engine_webadmin_url,
     engine_fqdn,
 ):
+    def in_browser(browser_name, ovirt_driver):
+        ovirt_driver.get(engine_webadmin_url)
 
-    ovirt_driver.get(engine_webadmin_url)
+        welcome_screen = WelcomeScreen(ovirt_driver)
+        welcome_screen.wait_for_displayed()
+        welcome_screen.open_monitoring_portal()
 
-    welcome_screen = WelcomeScreen(ovirt_driver)
-    welcome_screen.wait_for_displayed()
-    welcome_screen.open_monitoring_portal()
+        grafana_login = GrafanaLoginScreen(ovirt_driver)
+        grafana_login.wait_for_displayed()
+        save_screenshot(browser_name, 'grafana-login')
+        grafana_login.use_ovirt_engine_auth()
 
-    grafana_login = GrafanaLoginScreen(ovirt_driver)
-    grafana_login.wait_for_displayed()
-    save_screenshot('grafana-login')
-    grafana_login.use_ovirt_engine_auth()
+        grafana = Grafana(ovirt_driver)
+        grafana.wait_for_displayed()
+        save_screenshot(browser_name, 'grafana')
 
-    grafana = Grafana(ovirt_driver)
-    grafana.wait_for_displayed()
-    save_screenshot('grafana')
+        # navigate directly to Grafana Configuration/Data Sources page
+        ovirt_driver.get(f'https://{engine_fqdn}/ovirt-engine-grafana/datasources')
+        assert grafana.db_connection()
+        save_screenshot(browser_name, 'grafana-datasource-connection')
 
-    # navigate directly to Grafana Configuration/Data Sources page
-    ovirt_driver.get(f'https://{engine_fqdn}/ovirt-engine-grafana/datasources')
-    assert grafana.db_connection()
-    save_screenshot('grafana-datasource-connection')
+        grafana.open_dashboard('oVirt Executive Dashboards', '02 Data Center Dashboard')
+        assert not grafana.is_error_visible()
+        save_screenshot(browser_name, 'grafana-dashboard-1')
 
-    grafana.open_dashboard('oVirt Executive Dashboards', '02 Data Center Dashboard')
-    assert not grafana.is_error_visible()
-    save_screenshot('grafana-dashboard-1')
+        grafana.open_dashboard('oVirt Inventory Dashboards', '02 Hosts Inventory Dashboard')
+        assert not grafana.is_error_visible()
+        save_screenshot(browser_name, 'grafana-dashboard-2')
 
-    grafana.open_dashboard('oVirt Inventory Dashboards', '02 Hosts Inventory Dashboard')
-    assert not grafana.is_error_visible()
-    save_screenshot('grafana-dashboard-2')
+    _in_all_browsers(ovirt_drivers, in_browser)
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+
+"""Measures the per-call latency of ModuleMapper calls.
+
+Runs the same trivial module call repeatedly against a running deployment,
+once with a new ssh connection and the module uploaded for every call, like
+before ost_utils kept them, and once with the persistent connection
+settings used by ost_utils, and prints latency statistics for both.
+
+usage: ansible_call_latency.py inventory_dir host_pattern [calls]
+
+e.g.: ansible_call_latency.py $OST_DEPLOYMENT/ansible_inventory '*' 20
+"""
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# pylint: disable=wrong-import-position
+from ost_utils.ansible import config_builder as cb  # noqa: E402
+from ost_utils.ansible import event_log  # noqa: E402
+from ost_utils.ansible import module_mappers  # noqa: E402
+from ost_utils.ansible import private_dir  # noqa: E402
+
+DEFAULT_CALLS = 20
+# no control master, so every call connects and authenticates again, and no
+# pipelining, so the module is uploaded before it's run
+NO_PERSISTENT_CONNECTION_ENVVARS = {
+    'ANSIBLE_SSH_ARGS': '-C -o ControlMaster=no',
+    'ANSIBLE_PIPELINING': 'False',
+}
+
+
+def _exit_control_masters(control_path_dir):
+    for name in os.listdir(control_path_dir):
+        subprocess.run(
+            ['ssh', '-O', 'exit', '-o', f'ControlPath={os.path.join(control_path_dir, name)}', 'localhost'],
+            capture_output=True,
+            check=False,
+        )
+
+
+def measure(inventory, host_pattern, calls, envvars):
+    # a control path dir of its own, so that the variant starts from a cold
+    # connection and only the control masters it started are exited after it
+    control_path_dir = tempfile.mkdtemp(prefix='ost-latency-cp-')
+    envvars = dict(envvars, ANSIBLE_SSH_CONTROL_PATH_DIR=control_path_dir)
+    latencies = []
+    try:
+        for _ in range(calls):
+            mapper = module_mappers.ModuleArgsMapper(inventory, host_pattern, 'command')
+            mapper.config_builder.envvars = envvars
+            start = time.monotonic()
+            mapper('true')
+            latencies.append(time.monotonic() - start)
+    finally:
+        _exit_control_masters(control_path_dir)
+        shutil.rmtree(control_path_dir, ignore_errors=True)
+    return latencies
+
+
+def report(name, latencies):
+    print(
+        f'{name:>12}: calls={len(latencies)} '
+        f'first={latencies[0]:.3f}s '
+        f'mean={statistics.mean(latencies):.3f}s '
+        f'median={statistics.median(latencies):.3f}s '
+        f'min={min(latencies):.3f}s '
+        f'max={max(latencies):.3f}s'
+    )
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (3, 4):
+        basename = os.path.basename(sys.argv[0])
+        print(f'usage: {basename} inventory_dir host_pattern [calls]')
+        sys.exit(1)
+
+    inventory_dir, pattern = sys.argv[1:3]
+    count = int(sys.argv[3]) if len(sys.argv) == 4 else DEFAULT_CALLS
+
+    try:
+        report('reconnecting', measure(inventory_dir, pattern, count, NO_PERSISTENT_CONNECTION_ENVVARS))
+        report('persistent', measure(inventory_dir, pattern, count, cb.PERSISTENT_CONNECTION_ENVVARS))
+    finally:
+        private_dir.PrivateDir.cleanup()
+        event_log.EventLog.discard_session()
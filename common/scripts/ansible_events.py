@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+
+"""Prints the events of a saved ansible event log.
+
+usage: ansible_events.py [--host HOST] [--module MODULE] [--since TIME]
+                         [--until TIME] [--failed] [--json] log_dir
+
+e.g.: ansible_events.py exported-artifacts/ansible_logs/events --failed
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# pylint: disable=wrong-import-position
+from ost_utils.ansible import event_log  # noqa: E402
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Prints the events of a saved ansible event log')
+    parser.add_argument('log_dir')
+    parser.add_argument('--host')
+    parser.add_argument('--module')
+    parser.add_argument('--since', help='ISO 8601 UTC timestamp, inclusive')
+    parser.add_argument('--until', help='ISO 8601 UTC timestamp, exclusive')
+    parser.add_argument('--failed', action='store_true', default=None, help='only failed or unreachable events')
+    parser.add_argument('--json', action='store_true', help='print the events as JSON lines')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.log_dir):
+        parser.error(f'{args.log_dir} is not a directory')
+    log = event_log.EventLog(args.log_dir)
+    for event in log.query(args.host, args.module, args.since, args.until, args.failed):
+        if args.json:
+            print(json.dumps(event))
+        elif event.get('stdout'):
+            host = event.get('event_data', {}).get('host', event_log.RUNNER)
+            print(f"{event.get('created', '')} {host} {event.get('event')}")
+            print(event['stdout'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
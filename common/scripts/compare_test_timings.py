@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+
+"""Compares the test timings of two runs and lists the tests and fixtures
+that got slower. Exits with 1 if any did.
+
+usage: compare_test_timings.py [--threshold FRACTION] [--min-seconds SECONDS]
+                               reference current
+
+reference and current are test_timings.jsonl files or the exported-artifacts
+directories of the runs, e.g.:
+
+    compare_test_timings.py last-night/exported-artifacts exported-artifacts
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# pylint: disable=wrong-import-position
+from ost_utils.pytest import timings  # noqa: E402
+
+
+def _seconds(value):
+    return '-' if value is None else f'{value:.1f}s'
+
+
+def _report(title, entries):
+    print(f'{title}:')
+    for entry in entries:
+        change = entry['delta'] / entry['reference'] * 100 if entry['reference'] else float('inf')
+        print(
+            f"  {entry['kind']:<7} {entry['name']}: {_seconds(entry['reference'])} -> "
+            f"{_seconds(entry['current'])} ({entry['delta']:+.1f}s, {change:+.0f}%)"
+        )
+        for phase, (old, new) in entry.get('phases', {}).items():
+            print(f'            {phase:<8} {_seconds(old)} -> {_seconds(new)}')
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Lists the tests and fixtures that got slower between two runs')
+    parser.add_argument('reference')
+    parser.add_argument('current')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=timings.DEFAULT_THRESHOLD,
+        help='relative slowdown to report, as a fraction (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--min-seconds',
+        type=float,
+        default=timings.DEFAULT_MIN_SECONDS,
+        help='absolute slowdown to report (default: %(default)s)',
+    )
+    args = parser.parse_args(argv)
+
+    result = timings.compare(args.reference, args.current, args.threshold, args.min_seconds)
+    _report('Regressions', result['regressions'])
+    _report('Improvements', result['improvements'])
+    for key, title in (('new_tests', 'New tests'), ('missing_tests', 'Missing tests')):
+        if result[key]:
+            print(f'{title}:')
+            for nodeid in result[key]:
+                print(f'  {nodeid}')
+    return 1 if result['regressions'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
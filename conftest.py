@@ -3,9 +3,12 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 #
 import pytest
+
 pytest.register_assert_rewrite('ost_utils')
 
 from ost_utils.pytest import pytest_addoption
 
 
 from ost_utils.pytest import pytest_fixture_setup
+from ost_utils.pytest import pytest_runtestloop
+from ost_utils.pytest import pytest_runtest_teardown
@@ -51,6 +51,7 @@ def ansible_clean_private_dirs():
 
 @pytest.fixture(scope="session", autouse=True)
 def ansible_collect_logs(artifacts_dir, ansible_clean_private_dirs):
+    ansible.LogsCollector.start(artifacts_dir)
     try:
         yield
     finally:
@@ -14,13 +14,14 @@ class AnsibleExecutionFailure(Exception):
 
 
 class Playbook:
-    def __init__(self, playbook, private_dir, extra_vars=None):
+    def __init__(self, playbook, private_dir, extra_vars=None, event_handler=None):
         self._execution_stats = None
         self._idempotency_check_stats = None
         self._playbook = playbook
         self._extra_vars = extra_vars if extra_vars else {}
         self._extra_vars['ansible_python_interpreter'] = 'python3'
         self._private_dir = private_dir
+        self._event_handler = event_handler
 
     @property
     def execution_stats(self):
@@ -40,6 +41,7 @@ class Playbook:
             extravars=self._extra_vars,
             inventory='localhost ansible_connection=local',
             private_data_dir=self._private_dir,
+            event_handler=self._event_handler,
         )
         if runner.status != 'successful':
             LOGGER.error(
@@ -151,6 +151,7 @@ class Cluster(SDKRootEntity):
             exec_func=self.is_empty,
             exec_func_args=(),
             success_criteria=lambda empty: empty,
+            wakeup=self.system.events_wakeup(),
         )
         self._report_is_empty('after')
 
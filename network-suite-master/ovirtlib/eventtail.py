@@ -0,0 +1,208 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+import collections
+import contextlib
+import logging
+import threading
+import time
+import weakref
+
+from ovirtsdk4 import services
+
+DEFAULT_TAIL_INTERVAL = 1
+DEFAULT_BUFFER_SIZE = 10000
+
+LOGGER = logging.getLogger(__name__)
+
+# connection -> EventTailer, the tailers only refer to their connection
+# weakly so that the entry goes away with the connection
+_TAILERS = weakref.WeakKeyDictionary()
+_TAILERS_LOCK = threading.Lock()
+
+
+def tailer(service):
+    """Returns the EventTailer shared by all users of the engine connection
+    `service` belongs to.
+
+    :param service: any ovirtsdk4 service, e.g. the system service
+    """
+    connection = service._connection  # pylint: disable=protected-access
+    with _TAILERS_LOCK:
+        if connection not in _TAILERS:
+            system_service = services.SystemService(weakref.proxy(connection), '')
+            event_tailer = EventTailer(system_service.events_service())
+            # stops the thread of connections dropped without stop()
+            weakref.finalize(connection, event_tailer.close)
+            _TAILERS[connection] = event_tailer
+        return _TAILERS[connection]
+
+
+def stop(connection):
+    """Stops the EventTailer of the connection, if it has one, to be called
+    before the connection is closed"""
+    with _TAILERS_LOCK:
+        event_tailer = _TAILERS.pop(connection, None)
+    if event_tailer is not None:
+        event_tailer.close()
+
+
+class EventTailer:
+    """Streams new engine events into an in-memory ring buffer.
+
+    A single background thread asks the engine only for the events newer than
+    the last one it has seen, and only while someone is subscribed. Waiters
+    block on a condition variable that is notified whenever new events
+    arrive, so any number of concurrent waits cost one REST call per tail
+    interval. Events are indexed by code and by correlation id.
+
+    Usage:
+
+        with tailer(system_service).subscribe() as subscription:
+            ...  # trigger the action
+            assert subscription.wait_for(codes=[950], timeout=60)
+    """
+
+    def __init__(
+        self,
+        events_service,
+        interval=DEFAULT_TAIL_INTERVAL,
+        buffer_size=DEFAULT_BUFFER_SIZE,
+    ):
+        self._events_service = events_service
+        self._interval = interval
+        self._buffer = collections.deque()
+        self._buffer_size = buffer_size
+        self._by_code = collections.defaultdict(collections.deque)
+        self._by_correlation_id = collections.defaultdict(collections.deque)
+        self._last_event_id = None
+        self._subscribers = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    @contextlib.contextmanager
+    def subscribe(self):
+        """Keeps the tailer running and yields a Subscription that only
+        sees the events newer than the moment of subscribing"""
+        latest = self._latest_event_id()
+        with self._cond:
+            if self._subscribers == 0 or self._last_event_id is None:
+                # nobody needs the events that arrived while idle
+                self._last_event_id = latest
+            self._subscribers += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+        try:
+            yield Subscription(self, latest)
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+
+    def events(self, since, codes=None, correlation_id=None):
+        """Buffered events newer than `since`, oldest first"""
+        with self._cond:
+            return self._find(since, codes, correlation_id)
+
+    def wait_for(self, since, timeout, codes=None, correlation_id=None):
+        """Blocks until an event newer than `since` matching the filters
+        arrives. Returns the matching events, or an empty list on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                found = self._find(since, codes, correlation_id)
+                remaining = deadline - time.monotonic()
+                if found or remaining <= 0 or self._closed:
+                    return found
+                self._cond.wait(remaining)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _find(self, since, codes, correlation_id):
+        if correlation_id is not None:
+            candidates = self._by_correlation_id.get(str(correlation_id), ())
+        elif codes is not None:
+            candidates = sorted(
+                (event for code in codes for event in self._by_code.get(code, ())),
+                key=lambda event: int(event.id),
+            )
+        else:
+            candidates = self._buffer
+        return [event for event in candidates if int(event.id) > since and (codes is None or event.code in codes)]
+
+    def _latest_event_id(self):
+        events = self._events_service.list(max=1)
+        return int(events[0].id) if events else 0
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='engine-event-tailer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._subscribers == 0 and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                last_event_id = self._last_event_id
+            try:
+                new_events = self._events_service.list(from_=last_event_id)
+            except Exception:
+                # e.g. the engine is being restarted, just try again later
+                LOGGER.debug('Failed tailing engine events', exc_info=True)
+                new_events = []
+            if new_events:
+                with self._cond:
+                    self._add(sorted(new_events, key=lambda event: int(event.id)))
+                    self._cond.notify_all()
+            time.sleep(self._interval)
+
+    def _add(self, new_events):
+        for event in new_events:
+            if int(event.id) <= self._last_event_id:
+                continue
+            self._buffer.append(event)
+            self._by_code[event.code].append(event)
+            if event.correlation_id:
+                self._by_correlation_id[event.correlation_id].append(event)
+            self._last_event_id = int(event.id)
+        while len(self._buffer) > self._buffer_size:
+            self._evict(self._buffer.popleft())
+
+    def _evict(self, event):
+        self._by_code[event.code].popleft()
+        if not self._by_code[event.code]:
+            del self._by_code[event.code]
+        if event.correlation_id:
+            self._by_correlation_id[event.correlation_id].popleft()
+            if not self._by_correlation_id[event.correlation_id]:
+                del self._by_correlation_id[event.correlation_id]
+
+
+class Subscription:
+    """Events seen by an EventTailer since a subscription started"""
+
+    def __init__(self, event_tailer, since):
+        self._tailer = event_tailer
+        self.since = since
+
+    def events(self, codes=None, correlation_id=None):
+        return self._tailer.events(self.since, codes, correlation_id)
+
+    def wait_for(self, timeout, codes=None, correlation_id=None):
+        return self._tailer.wait_for(self.since, timeout, codes, correlation_id)
+
+    def wait(self, timeout, codes=None, correlation_id=None):
+        """Waits for a matching event newer than the last one waited for,
+        suitable as a pollutil wakeup"""
+        found = self.wait_for(timeout, codes, correlation_id)
+        if found:
+            self.since = int(found[-1].id)
+        return bool(found)
@@ -90,7 +90,7 @@ class Host(SDKRootEntity):
     @property
     def bonds(self):
         bonds = []
-        for sdk_nic in self._service.nics_service().list():
+        for sdk_nic in self._list_sdk_nics():
             if sdk_nic.bonding:
                 bond = Bond(self)
                 bond.import_by_id(sdk_nic.id)
@@ -336,6 +336,7 @@ class Host(SDKRootEntity):
             exec_func_args=(),
             success_criteria=self._host_up_status_success_criteria,
             timeout=timeout,
+            wakeup=self.system.events_wakeup(),
         )
 
     def wait_for_non_operational_status(self):
@@ -344,6 +345,7 @@ class Host(SDKRootEntity):
             exec_func=lambda: self.status,
             exec_func_args=(),
             success_criteria=lambda s: s == NONOP,
+            wakeup=self.system.events_wakeup(),
         )
 
     def wait_for_networks_in_sync(self, networks=None):
@@ -351,6 +353,7 @@ class Host(SDKRootEntity):
             exec_func=self.networks_in_sync,
             exec_func_args=(networks,),
             success_criteria=lambda s: s,
+            wakeup=self.system.events_wakeup(),
         )
 
     def wait_for_networks_out_of_sync(self, networks=None):
@@ -358,6 +361,7 @@ class Host(SDKRootEntity):
             exec_func=self.networks_out_of_sync,
             exec_func_args=(networks,),
             success_criteria=lambda s: s,
+            wakeup=self.system.events_wakeup(),
         )
 
     def workaround_bz_1779280(self):
@@ -423,7 +427,7 @@ class Host(SDKRootEntity):
         :param nic_names: []str
         :return: []types.HostNic
         """
-        return [host_nic for host_nic in self._service.nics_service().list() if host_nic.name in nic_names]
+        return [host_nic for host_nic in self._list_sdk_nics() if host_nic.name in nic_names]
 
     def _get_network_by_id(self, network_id):
         dc = self._get_data_center()
@@ -442,8 +446,17 @@ class Host(SDKRootEntity):
         return self.get_cluster().mgmt_network()
 
     def _get_existing_attachments(self):
+        attachments = self._followed('network_attachments')
+        if attachments is not None:
+            return list(attachments)
         return list(self.service.network_attachments_service().list())
 
+    def _list_sdk_nics(self):
+        nics = self._followed('nics')
+        if nics is not None:
+            return list(nics)
+        return self._service.nics_service().list()
+
     def refresh_capabilities(self):
         self.service.refresh()
 
@@ -462,7 +475,7 @@ class Host(SDKRootEntity):
 
     def nics(self):
         nics = []
-        for sdk_nic in self._service.nics_service().list():
+        for sdk_nic in self._list_sdk_nics():
             nic = HostNic(self)
             nic.import_by_id(sdk_nic.id)
             nics.append(nic)
@@ -574,6 +587,7 @@ class HostNic(SDKSubEntity):
             exec_func_args=(),
             success_criteria=lambda s: s,
             timeout=timeout,
+            wakeup=self.system.events_wakeup(),
         )
 
     def __repr__(self):
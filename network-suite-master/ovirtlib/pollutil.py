@@ -0,0 +1,352 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+import contextlib
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+from . import eventtail
+
+DEFAULT_INITIAL_INTERVAL = 0.5
+DEFAULT_MAX_INTERVAL = 6
+DEFAULT_FACTOR = 1.5
+DEFAULT_JITTER = 0.1
+
+# the origin of the events the engine itself logs, the ones added through the
+# API, e.g. by the retries of syncutil, carry the origin their author chose
+ENGINE_EVENTS_ORIGIN = 'oVirt'
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Backoff:
+    """Iterable of the intervals to sleep between two probes.
+
+    The first interval is short so that fast transitions are detected
+    quickly, the following ones grow by `factor` up to `max_interval` so that
+    slow transitions don't hammer the probed service. Every interval is
+    randomized by +-`jitter` (a fraction of the interval) so that concurrent
+    waiters don't probe in lockstep.
+    """
+
+    def __init__(
+        self,
+        initial=DEFAULT_INITIAL_INTERVAL,
+        max_interval=DEFAULT_MAX_INTERVAL,
+        factor=DEFAULT_FACTOR,
+        jitter=DEFAULT_JITTER,
+    ):
+        self._initial = initial
+        self._max_interval = max(initial, max_interval)
+        self._factor = factor
+        self._jitter = jitter
+
+    @classmethod
+    def fixed(cls, interval):
+        return cls(initial=interval, max_interval=interval, factor=1, jitter=0)
+
+    def __iter__(self):
+        interval = self._initial
+        while True:
+            yield interval * random.uniform(1 - self._jitter, 1 + self._jitter)
+            interval = min(interval * self._factor, self._max_interval)
+
+
+class SleepWakeup:
+    """Sleeps for the whole interval between two probes"""
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return False
+
+
+class EngineEventsWakeup(contextlib.AbstractContextManager):
+    """Ends the sleep between two probes as soon as a relevant engine
+    event arrives.
+
+    The events come from the EventTailer shared by all the waiters using
+    the same engine connection. Any new event logged by the engine is
+    considered relevant unless `codes` or `correlation_id` is given, the
+    events added through the API don't end the sleep, so that a poller that
+    adds some doesn't wake itself up. Pollers enter the wakeup for the
+    duration of the polling loop.
+
+    :param service: any ovirtsdk4 service of the engine connection
+    :param codes: optional collection of event codes to wake up on
+    :param correlation_id: optional correlation id to wake up on
+    """
+
+    def __init__(self, service, codes=None, correlation_id=None):
+        self._tailer = eventtail.tailer(service)
+        self._codes = set(codes) if codes else None
+        self._correlation_id = correlation_id
+        self._stack = contextlib.ExitStack()
+        self._subscription = None
+
+    def __enter__(self):
+        self._subscription = self._stack.enter_context(self._tailer.subscribe())
+        return self
+
+    def __exit__(self, *exc_info):
+        self._subscription = None
+        return self._stack.__exit__(*exc_info)
+
+    def wait(self, timeout):
+        if self._subscription is None:
+            time.sleep(timeout)
+            return False
+        deadline = time.monotonic() + timeout
+        while True:
+            found = self._subscription.wait_for(max(0, deadline - time.monotonic()), self._codes, self._correlation_id)
+            if not found:
+                return False
+            self._subscription.since = int(found[-1].id)
+            if any(event.origin == ENGINE_EVENTS_ORIGIN for event in found):
+                return True
+
+
+class Poller:
+    """Drives a polling loop and records statistics about it.
+
+    Iterating over a poller yields the number of the current probe and
+    sleeps between the probes according to `backoff`, until the loop is
+    broken or `timeout` expires. A last probe is made when the timeout
+    expires. The caller reports success by calling `succeeded()` and the
+    exceptions it retries on by calling `swallowed()`:
+
+        with Poller(timeout, name='vm_is_up') as poller:
+            for _ in poller:
+                try:
+                    if vm_is_up():
+                        poller.succeeded()
+                        break
+                except ConnectionError as e:
+                    poller.swallowed(e)
+
+    :param timeout: seconds after which no more probes are made
+    :param name: name of the probed predicate, used in statistics
+    :param backoff: Backoff instance, an adaptive one by default
+    :param wakeup: object with a wait(timeout) method used to sleep between
+                   probes, e.g. EngineEventsWakeup; plain sleep by default
+    :param call_site: 'file:line' of the wait, by default the first caller
+                      outside of this module
+    """
+
+    def __init__(self, timeout, name, backoff=None, wakeup=None, call_site=None):
+        self.timeout = timeout
+        self.name = name
+        self.call_site = call_site or caller_location()
+        self.probes = 0
+        self.success = False
+        self.exceptions = {}
+        self._backoff = backoff or Backoff()
+        self._wakeup = wakeup or SleepWakeup()
+        self._stack = contextlib.ExitStack()
+        self._start_time = None
+        self._start_wall_time = None
+
+    def __enter__(self):
+        if isinstance(self._wakeup, contextlib.AbstractContextManager):
+            self._stack.enter_context(self._wakeup)
+        self._start_time = time.monotonic()
+        self._start_wall_time = time.time()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.success:
+            outcome = 'success'
+        elif exc_info[0] is not None:
+            outcome = 'error'
+        else:
+            outcome = 'timeout'
+        STATS.record(
+            self.call_site,
+            self.name,
+            self.probes,
+            self.running_time,
+            self.success,
+            outcome=outcome,
+            timeout=self.timeout,
+            exceptions=self.exceptions,
+            start=self._start_wall_time,
+        )
+        return self._stack.__exit__(*exc_info)
+
+    @property
+    def running_time(self):
+        return time.monotonic() - self._start_time
+
+    def __iter__(self):
+        if self._start_time is None:
+            self._start_time = time.monotonic()
+        deadline = self._start_time + self.timeout
+        intervals = iter(self._backoff)
+        while True:
+            self.probes += 1
+            yield self.probes - 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._wakeup.wait(min(next(intervals), remaining))
+
+    def succeeded(self):
+        self.success = True
+
+    def swallowed(self, exception):
+        name = type(exception).__name__
+        self.exceptions[name] = self.exceptions.get(name, 0) + 1
+
+
+class WaitStats:
+    """Statistics of all the polling loops run by Pollers.
+
+    Every wait is recorded along with the test it ran for, which is set by
+    the test runner with `set_test()` for the thread running the test. Waits
+    in threads without a test of their own are attributed to the last test
+    started.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_call_site = {}
+        self._records = []
+        self._thread_test = threading.local()
+        self._last_test = None
+
+    def set_test(self, test):
+        self._thread_test.name = test
+        self._last_test = test
+
+    def current_test(self):
+        return getattr(self._thread_test, 'name', None) or self._last_test
+
+    def record(
+        self,
+        call_site,
+        name,
+        probes,
+        duration,
+        success,
+        outcome=None,
+        timeout=None,
+        exceptions=None,
+        start=None,
+    ):
+        exceptions = dict(exceptions or {})
+        with self._lock:
+            self._records.append(
+                {
+                    'test': self.current_test(),
+                    'call_site': call_site,
+                    'name': name,
+                    'start': start,
+                    'duration': duration,
+                    'timeout': timeout,
+                    'probes': probes,
+                    'outcome': outcome or ('success' if success else 'timeout'),
+                    'exceptions': exceptions,
+                }
+            )
+            if call_site not in self._by_call_site:
+                self._by_call_site[call_site] = _new_site_stats(call_site, name)
+            _accumulate(self._by_call_site[call_site], duration, probes, success, exceptions)
+
+    def records(self):
+        """All the waits, in the order they finished"""
+        with self._lock:
+            return [dict(record) for record in self._records]
+
+    def summary(self):
+        """List of the per call site statistics, longest total time first"""
+        with self._lock:
+            return sorted(
+                (dict(stats, exceptions=dict(stats['exceptions'])) for stats in self._by_call_site.values()),
+                key=lambda stats: stats['total_time'],
+                reverse=True,
+            )
+
+    def by_test(self):
+        """Test -> per call site statistics of the waits of the test, the
+        tests with the longest total wait time first"""
+        tests = {}
+        for record in self.records():
+            test = tests.setdefault(record['test'], {'test': record['test'], 'total_time': 0.0, 'call_sites': {}})
+            test['total_time'] += record['duration']
+            if record['call_site'] not in test['call_sites']:
+                test['call_sites'][record['call_site']] = _new_site_stats(record['call_site'], record['name'])
+            _accumulate(
+                test['call_sites'][record['call_site']],
+                record['duration'],
+                record['probes'],
+                record['outcome'] == 'success',
+                record['exceptions'],
+            )
+        result = []
+        for test in sorted(tests.values(), key=lambda test: test['total_time'], reverse=True):
+            call_sites = sorted(test['call_sites'].values(), key=lambda stats: stats['total_time'], reverse=True)
+            result.append(dict(test, call_sites=call_sites))
+        return result
+
+    def log_summary(self, logger=LOGGER, limit=20):
+        for stats in self.summary()[:limit]:
+            exceptions = ''
+            if stats['exceptions']:
+                exceptions = ', swallowed ' + ', '.join(
+                    f'{count} {exception}' for exception, count in sorted(stats['exceptions'].items())
+                )
+            logger.info(
+                f"{stats['call_site']} {stats['name']}(): "
+                f"{stats['waits']} waits, {stats['failures']} failures, "
+                f"{stats['probes']} probes, {stats['total_time']:.1f}s total, "
+                f"{stats['max_time']:.1f}s max{exceptions}"
+            )
+
+    def clear(self):
+        with self._lock:
+            self._by_call_site.clear()
+            self._records.clear()
+
+
+def _new_site_stats(call_site, name):
+    return {
+        'call_site': call_site,
+        'name': name,
+        'waits': 0,
+        'failures': 0,
+        'probes': 0,
+        'total_time': 0.0,
+        'max_time': 0.0,
+        'exceptions': {},
+    }
+
+
+def _accumulate(stats, duration, probes, success, exceptions):
+    """Adds a wait to the statistics of its call site"""
+    stats['waits'] += 1
+    stats['failures'] += 0 if success else 1
+    stats['probes'] += probes
+    stats['total_time'] += duration
+    stats['max_time'] = max(stats['max_time'], duration)
+    for exception, count in exceptions.items():
+        stats['exceptions'][exception] = stats['exceptions'].get(exception, 0) + count
+
+
+STATS = WaitStats()
+
+
+def caller_location(*ignored_files):
+    """'file:line' of the first frame outside of this module and
+    `ignored_files`"""
+    ignored = {os.path.realpath(path) for path in (__file__,) + ignored_files}
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None and os.path.realpath(frame.f_code.co_filename) in ignored:
+        frame = frame.f_back
+    if frame is None:
+        return '<unknown>'
+    return f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}'
@@ -4,6 +4,8 @@
 #
 #
 import abc
+import contextlib
+import time
 
 import ovirtsdk4
 
@@ -20,15 +22,79 @@ class EntityCreationError(Exception):
     pass
 
 
+class _ReadCache:
+    """
+    The SDK object of an entity, fetched once and served until it is older
+    than ttl (None means no expiry) or invalidated. Links listed in follow
+    are fetched along with it in the same request.
+    """
+
+    def __init__(self, ttl=None, follow=None):
+        self.ttl = ttl
+        self.follow = set(follow.split(',')) if follow else set()
+        self._sdk_type = None
+        self._fetched_at = None
+
+    def get(self, service):
+        if self._sdk_type is None or self._expired():
+            if self.follow:
+                self._sdk_type = service.get(follow=','.join(sorted(self.follow)))
+            else:
+                self._sdk_type = service.get()
+            self._fetched_at = time.monotonic()
+        return self._sdk_type
+
+    def add_follow(self, follow):
+        links = set(follow.split(',')) if follow else set()
+        if not links <= self.follow:
+            self.follow |= links
+            self.invalidate()
+
+    def invalidate(self):
+        self._sdk_type = None
+
+    def _expired(self):
+        return self.ttl is not None and time.monotonic() - self._fetched_at > self.ttl
+
+
+class _InvalidatingService:
+    """
+    Wraps the service of an entity while its reads are cached, so that
+    calling any of its actions (update, remove, activate, setup_networks...)
+    invalidates the cache. Reads and sub-service lookups pass through.
+    """
+
+    READ_METHODS = ('get', 'list')
+
+    def __init__(self, service, cache):
+        self.wrapped = service
+        self._cache = cache
+
+    def __getattr__(self, name):
+        attr = getattr(self.wrapped, name)
+        if not callable(attr) or name in self.READ_METHODS or name == 'service' or name.endswith('_service'):
+            return attr
+
+        def action(*args, **kwargs):
+            self._cache.invalidate()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._cache.invalidate()
+
+        return action
+
+
 class SDKEntity(metaclass=abc.ABCMeta):
     def __init__(self):
         self._service = None
         self._parent_service = None
         self._parent_sdk_system = None
+        self._read_cache = None
 
     @property
     def id(self):
-        return self._service.get().id
+        return self.get_sdk_type().id
 
     @property
     def service(self):
@@ -39,8 +105,57 @@ class SDKEntity(metaclass=abc.ABCMeta):
         return self._parent_sdk_system
 
     def get_sdk_type(self):
+        if self._read_cache is not None:
+            return self._read_cache.get(self._service)
         return self._service.get()
 
+    @contextlib.contextmanager
+    def cached(self, ttl=None, follow=None):
+        """
+        Serves get_sdk_type(), and so every property based on it, from a
+        single fetched SDK object for the duration of the block, instead of
+        issuing a GET per property read. The object is refetched when older
+        than ttl seconds, if given, and after any update, remove or other
+        action of this entity. follow is a comma separated list of links,
+        e.g. 'nics,network_attachments', fetched in the same request.
+        Actions of other entities, sub entities included, don't invalidate
+        the object. Nested blocks share the outermost one's object.
+        """
+        if self._read_cache is not None:
+            self._read_cache.add_follow(follow)
+            yield self
+            return
+        self.enable_cache(ttl, follow)
+        try:
+            yield self
+        finally:
+            self.disable_cache()
+
+    def enable_cache(self, ttl, follow=None):
+        """
+        Like cached(), but until disable_cache() is called. Meant for
+        entities that are polled, with a ttl short enough for the polling
+        to still see changes.
+        """
+        self.disable_cache()
+        self._read_cache = _ReadCache(ttl, follow)
+        if self._service is not None:
+            self._service = _InvalidatingService(self._service, self._read_cache)
+
+    def disable_cache(self):
+        if isinstance(self._service, _InvalidatingService):
+            self._service = self._service.wrapped
+        self._read_cache = None
+
+    def _followed(self, link):
+        """
+        The related objects of link if the cached SDK object was fetched
+        with it followed, otherwise None
+        """
+        if self._read_cache is None or link not in self._read_cache.follow:
+            return None
+        return getattr(self.get_sdk_type(), link)
+
     def create(self, *args, **kwargs):
         """This method is responsible for creating and
         adding the entity to the system
@@ -64,7 +179,13 @@ class SDKEntity(metaclass=abc.ABCMeta):
         self._service.remove()
 
     def update(self, **kwargs):
-        sdk_type = self.get_sdk_type()
+        # through get_sdk_type(), which some entities override, but not from
+        # the cache, followed links don't belong in the request
+        read_cache, self._read_cache = self._read_cache, None
+        try:
+            sdk_type = self.get_sdk_type()
+        finally:
+            self._read_cache = read_cache
         for key, value in kwargs.items():
             setattr(sdk_type, key, value)
         return self._service.update(sdk_type)
@@ -80,11 +201,14 @@ class SDKEntity(metaclass=abc.ABCMeta):
     def _set_service(self, service):
         if self._service is not None:
             raise EntityAlreadyInitialized
+        if self._read_cache is not None:
+            service = _InvalidatingService(service, self._read_cache)
         self._service = service
 
     def _execute_without_raising(self, func):
         try:
-            return func()
+            with self.cached():
+                return func()
         except Exception as e:
             return f'<{self.__class__.__name__}, ' f'{func.__name__} failed with: {str(e)}>'
 
@@ -145,6 +145,7 @@ class StorageDomain(SDKRootEntity):
             exec_func=lambda: self.status,
             exec_func_args=(),
             success_criteria=lambda s: s == status,
+            wakeup=self.system.events_wakeup(),
         )
 
     def create_disk(self, name):
@@ -202,6 +203,7 @@ class Disk(SDKRootEntity):
             exec_func=lambda: self.status,
             exec_func_args=(),
             success_criteria=lambda s: s == types.DiskStatus.OK,
+            wakeup=self.system.events_wakeup(),
         )
 
 
@@ -5,13 +5,13 @@
 #
 import collections
 import logging
-import os
 import time
 
 from . import eventlib
+from . import pollutil
 
 DEFAULT_DELAY_START = 0
-DEFAULT_INTERVAL = 3
+DEFAULT_INTERVAL = None
 DEFAULT_TIMEOUT = 120
 DELIM = '~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~'
 
@@ -34,6 +34,7 @@ def sync(
     retry_interval=DEFAULT_INTERVAL,
     timeout=DEFAULT_TIMEOUT,
     sdk_entity=None,
+    wakeup=None,
 ):
     """Sync an operation until it either:
 
@@ -58,59 +59,57 @@ def sync(
     all results and all errors to return and raise respectively. The default
     timeout is 120 seconds.
 
+    Unless a retry_interval is specified, the retries are spaced by an
+    adaptive backoff (see pollutil.Backoff). A caller may also pass a wakeup
+    object (e.g. pollutil.EngineEventsWakeup) to retry as soon as something
+    relevant happens instead of sleeping for the whole interval.
+
     :param exec_func: callable
     :param exec_func_args: tuple/dict
     :param success_criteria: callable
     :param error_criteria: callable
     :param delay_start: time to wait before first call to exec_func
-    :param retry_interval: time between retries of exec_func
+    :param retry_interval: fixed time between retries of exec_func
     :param timeout: int
     :param sdk_entity: ovirtlib instance for which auditing to engine.log
                        before each retry is desired
+    :param wakeup: object with a wait(timeout) method used between retries
     :return: the result of running the exec_func
     """
-    end_time = _monothonic_time() + timeout
-
+    backoff = pollutil.Backoff.fixed(retry_interval) if retry_interval is not None else None
     args, kwargs = _parse_args(exec_func_args)
     logger = SyncLogger(exec_func, args, kwargs)
     logger.log_start()
-    try:
+    with pollutil.Poller(
+        timeout,
+        getattr(exec_func, '__name__', repr(exec_func)),
+        backoff=backoff,
+        wakeup=wakeup,
+        call_site=pollutil.caller_location(__file__),
+    ) as poller:
         time.sleep(delay_start)
-        _audit(exec_func, sdk_entity, 0)
-        result = exec_func(*args, **kwargs)
-        logger.log_iteration(0, result)
-    except Exception as e:
-        logger.log_iteration(0, e)
-        if error_criteria(e):
-            logger.log_end(e)
-            raise
-        result = e
-    else:
-        if success_criteria(result):
-            logger.log_end(result)
-            return result
-
-    i = 0
-    while _monothonic_time() < end_time:
-        i += 1
-        time.sleep(retry_interval)
-        try:
-            _audit(exec_func, sdk_entity, i)
-            result = exec_func(*args, **kwargs)
-            logger.log_iteration(i, result)
-        except Exception as e:
-            logger.log_iteration(i, e)
-            if success_criteria(e):
-                logger.log_end(e)
-                return e
-            if error_criteria(e):
-                logger.log_end(e)
-                raise
-            result = e
-        else:
-            if success_criteria(result):
-                logger.log_end(result)
-                return result
+        for i in poller:
+            try:
+                _audit(exec_func, sdk_entity, i)
+                result = exec_func(*args, **kwargs)
+                logger.log_iteration(i, result)
+            except Exception as e:
+                logger.log_iteration(i, e)
+                # an exception raised by the first call is never a success
+                if i > 0 and success_criteria(e):
+                    poller.succeeded()
+                    logger.log_end(e)
+                    return e
+                if error_criteria(e):
+                    logger.log_end(e)
+                    raise
+                poller.swallowed(e)
+                result = e
+            else:
+                if success_criteria(result):
+                    poller.succeeded()
+                    logger.log_end(result)
+                    return result
 
     logger.log_end(result)
     raise Timeout(result)
@@ -148,10 +147,6 @@ def _parse_args(exec_func_args):
     return args, kwargs
 
 
-def _monothonic_time():
-    return os.times()[4]
-
-
 class SyncLogger:
     def __init__(self, exec_func, args, kwargs):
         self._func = exec_func
@@ -4,6 +4,8 @@
 #
 from ovirtsdk4 import Connection
 
+from . import pollutil
+
 
 class SDKSystemRoot(object):
     def __init__(self):
@@ -73,6 +75,11 @@ class SDKSystemRoot(object):
     def users_service(self):
         return self._system_service.users_service()
 
+    def events_wakeup(self):
+        """A pollutil wakeup that ends the sleeps of a sync as soon as the
+        engine logs an event, e.g. that an entity changed its status"""
+        return pollutil.EngineEventsWakeup(self._system_service)
+
     def connect(self, url, username, password, ca_file=None, insecure=True):
         conn = Connection(
             url=url,
@@ -209,6 +209,7 @@ class Vm(SDKRootEntity):
             exec_func=lambda: self.status,
             exec_func_args=(),
             success_criteria=lambda s: s in statuses,
+            wakeup=self.system.events_wakeup(),
         )
 
     def _sync_disk_attachment(self, disk_attachment_id):
@@ -216,6 +217,7 @@ class Vm(SDKRootEntity):
             exec_func=self._is_disk_attachment_active,
             exec_func_args=(disk_attachment_id,),
             success_criteria=lambda s: s,
+            wakeup=self.system.events_wakeup(),
         )
 
     def _is_disk_attachment_active(self, disk_attachment_id):
@@ -280,6 +282,7 @@ class VmSnapshot(SDKSubEntity):
             exec_func=lambda: self.get_sdk_type().snapshot_status,
             exec_func_args=(),
             success_criteria=lambda status: status == SnapshotStatus.READY,
+            wakeup=self.system.events_wakeup(),
         )
 
     def wait_for_preview_status(self):
@@ -287,6 +290,7 @@ class VmSnapshot(SDKSubEntity):
             exec_func=lambda: self.get_sdk_type().snapshot_status,
             exec_func_args=(),
             success_criteria=lambda status: status == SnapshotStatus.IN_PREVIEW,
+            wakeup=self.system.events_wakeup(),
         )
 
 
@@ -50,6 +50,7 @@ from ost_utils.pytest.fixtures.ansible import ansible_all
 from ost_utils.pytest.fixtures.ansible import ansible_by_hostname
 from ost_utils.pytest.fixtures.ansible import ansible_engine
 from ost_utils.pytest.fixtures.ansible import ansible_engine_facts
+from ost_utils.pytest.fixtures.ansible import ansible_facts_registry
 from ost_utils.pytest.fixtures.ansible import ansible_host0
 from ost_utils.pytest.fixtures.ansible import ansible_host0_facts
 from ost_utils.pytest.fixtures.ansible import ansible_host1
@@ -77,6 +78,7 @@ from ost_utils.pytest.fixtures.deployment import deploy
 from ost_utils.pytest.fixtures.deployment import run_scripts
 from ost_utils.pytest.fixtures.deployment import set_sar_interval
 from ost_utils.pytest.fixtures.engine import engine_api
+from ost_utils.pytest.fixtures.engine import engine_api_pool
 from ost_utils.pytest.fixtures.engine import engine_api_url
 from ost_utils.pytest.fixtures.engine import engine_admin_service
 from ost_utils.pytest.fixtures.engine import engine_answer_file_contents
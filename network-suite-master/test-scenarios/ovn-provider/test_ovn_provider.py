@@ -12,6 +12,8 @@ from ovirtlib.ansiblelib import Playbook
 from ovirtlib import sshlib
 from testlib import suite
 
+from ost_utils.ansible import EventLog
+
 
 NETWORK10_NAME = 'net10'
 ROUTER0_NAME = 'router0'
@@ -103,7 +105,7 @@ def test_ovn_provider_cleanup_scenario(openstack_client_config, ansible_private_
 
 def _test_ovn_provider(playbook_name, private_dir):
     playbook_path = os.path.join(suite.playbook_dir(), playbook_name)
-    playbook = Playbook(playbook_path, private_dir=private_dir)
+    playbook = Playbook(playbook_path, private_dir=private_dir, event_handler=EventLog.handle_event)
     playbook.run()
 
     assert not playbook.execution_stats['failures']
@@ -20,6 +20,8 @@ from ovirtlib import virtlib
 from ovirtlib.ansiblelib import Playbook
 from testlib import suite
 
+from ost_utils.ansible import EventLog
+
 
 MTU = 1500
 VNIC0_NAME = 'vnic0'
@@ -229,6 +231,7 @@ def _provision_icmp_rule(source_ip, ip_version, action, private_dir):
             'ether_type': f'IPv{ip_version}',
         },
         private_dir=private_dir,
+        event_handler=EventLog.handle_event,
     )
     playbook.run()
 
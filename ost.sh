@@ -8,6 +8,7 @@ run [-4|-6] [--ost-coverage] <suite> <distro> [<pytest args>...]
     initializes the workspace with preinstalled distro ost-images, launches VMs and runs the whole suite
     add extra repos with --custom-repo=url
     skip check that extra repo is actually used with --skip-custom-repos-check
+    snapshot the VMs after a test module passed with --snapshot-after=<module>, e.g. test_002_bootstrap
 status
     show environment status, VM details
 shell <host> [command ...]
@@ -18,6 +19,11 @@ console <host>
     opens virsh console
 fetch-artifacts
     fetches artifacts from all hosts
+snapshot [<name>]
+    snapshots memory and disks of all VMs, named by the current time by default
+restore [<name>]
+    restores all VMs to a snapshot, the latest one by default, e.g. to run the later test modules again with
+    ost_run_tc from lagofy.sh
 destroy
     stop and remove the running environment
 "
@@ -49,6 +55,12 @@ case "$cmd" in
   fetch-artifacts)
     ost_fetch_artifacts
     ;;
+  snapshot)
+    ost_snapshot $1 || exit 1
+    ;;
+  restore)
+    ost_restore $1 || exit 1
+    ;;
   copy)
     ost_copy $@
     ;;
@@ -31,5 +31,6 @@ which will raise 'AnsibleExecutionError' on failure.
 """
 
 # flake8: noqa
+from ost_utils.ansible.event_log import EventLog
 from ost_utils.ansible.logs_collector import LogsCollector
 from ost_utils.ansible.module_mappers import AnsibleExecutionError
@@ -13,6 +13,17 @@ from ost_utils.ansible import private_dir as pd
 
 LOGGER = logging.getLogger(__name__)
 
+# Keep one ssh control master per VM alive for the whole session instead of
+# ansible's default of 60 seconds, so that consecutive module calls only pay
+# for opening a new channel on an already authenticated connection.
+# Pipelining additionally saves the sftp round trips needed to upload
+# the module before executing it.
+SSH_CONTROL_PERSIST = '30m'
+PERSISTENT_CONNECTION_ENVVARS = {
+    'ANSIBLE_SSH_ARGS': f'-C -o ControlMaster=auto -o ControlPersist={SSH_CONTROL_PERSIST}',
+    'ANSIBLE_PIPELINING': 'True',
+}
+
 
 class ConfigBuilder:
     """This class prepares an ansible_runner.RunnerConfig instance.
@@ -27,6 +38,10 @@ class ConfigBuilder:
         self.host_pattern = None
         self.module = None
         self.module_args = None
+        self.playbook = None
+        # ansible's default of 5 parallel processes when None
+        self.forks = None
+        self.envvars = dict(PERSISTENT_CONNECTION_ENVVARS)
 
     def prepare(self):
         config = ansible_runner.RunnerConfig(
@@ -35,6 +50,9 @@ class ConfigBuilder:
             host_pattern=self.host_pattern,
             module=self.module,
             module_args=self.module_args,
+            playbook=self.playbook,
+            forks=self.forks,
+            envvars=self.envvars,
             private_data_dir=pd.PrivateDir.get(),
             quiet=True,
         )
@@ -46,5 +64,6 @@ class ConfigBuilder:
         return (
             f'ConfigBuilder<inventory={self.inventory}, '
             f'host_pattern={self.host_pattern}, module={self.module}, '
-            f'module_args={self.module_args}>'
+            f'module_args={self.module_args}, playbook={self.playbook}, '
+            f'forks={self.forks}>'
         )
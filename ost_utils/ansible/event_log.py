@@ -0,0 +1,229 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Append-only log of the events of all ansible_runner executions.
+
+Events are recorded as ansible_runner produces them, through the runner's
+event handler, into one JSONL file per host:
+
+    <log dir>/<host>.jsonl
+    <log dir>/_runner.jsonl    events not tied to a host (playbook start,
+                               stats etc.)
+
+An in-memory index sorted by the 'created' timestamp of the events is kept
+along, so that the events can be queried by host, module, time range and
+failure without parsing the files again. The same index is rebuilt when
+an existing log directory is opened, e.g. the one saved in the artifacts
+of a run:
+
+    log = EventLog('exported-artifacts/ansible_logs/events')
+    for event in log.query(host='ost-...-host-0', failed=True):
+        print(event['stdout'])
+
+or from the shell:
+
+    common/scripts/ansible_events.py exported-artifacts/ansible_logs/events --failed
+"""
+
+import bisect
+import collections
+import datetime
+import glob
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+FILE_SUFFIX = '.jsonl'
+RUNNER = '_runner'
+FAILED_EVENTS = frozenset(('runner_on_failed', 'runner_item_on_failed', 'runner_on_unreachable'))
+
+_Entry = collections.namedtuple('_Entry', 'created host offset event module failed')
+
+
+def _host_of(event):
+    return event.get('event_data', {}).get('host') or RUNNER
+
+
+def _entry(event, host, offset):
+    event_data = event.get('event_data', {})
+    return _Entry(
+        created=event.get('created', ''),
+        host=host,
+        offset=offset,
+        event=event.get('event'),
+        module=event_data.get('resolved_action') or event_data.get('task_action'),
+        failed=event.get('event') in FAILED_EVENTS,
+    )
+
+
+def _timestamp(value):
+    # 'created' is an ISO 8601 string, which sorts chronologically
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def _remove_event_files(path):
+    for file_path in glob.glob(os.path.join(path, '*' + FILE_SUFFIX)):
+        os.remove(file_path)
+
+
+class EventLog:
+    """Per-host JSONL event files with a 'created' index, see the module
+    docstring. Safe to record into from several threads."""
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    def __init__(self, path, fresh=False):
+        """fresh removes the event files already in path, e.g. of earlier
+        runs, instead of loading them"""
+        self.path = path
+        self._lock = threading.Lock()
+        self._files = {}
+        self._created = {}
+        self._entries = {}
+        os.makedirs(path, exist_ok=True)
+        if fresh:
+            _remove_event_files(path)
+        else:
+            self._load()
+
+    def _file_path(self, host):
+        return os.path.join(self.path, host.replace(os.sep, '_') + FILE_SUFFIX)
+
+    def _load(self):
+        for file_path in glob.glob(os.path.join(self.path, '*' + FILE_SUFFIX)):
+            offset = 0
+            with open(file_path, 'rb') as log_file:
+                for line in log_file:
+                    event = json.loads(line)
+                    self._add(_entry(event, _host_of(event), offset))
+                    offset += len(line)
+
+    def _add(self, entry):
+        created = self._created.setdefault(entry.host, [])
+        position = bisect.bisect_right(created, entry.created)
+        created.insert(position, entry.created)
+        self._entries.setdefault(entry.host, []).insert(position, entry)
+
+    def record(self, event):
+        host = _host_of(event)
+        line = json.dumps(event, separators=(',', ':')).encode('utf-8') + b'\n'
+        with self._lock:
+            log_file = self._files.get(host)
+            if log_file is None:
+                log_file = self._files[host] = open(self._file_path(host), 'ab')
+            offset = log_file.tell()
+            log_file.write(line)
+            log_file.flush()
+            self._add(_entry(event, host, offset))
+
+    def hosts(self):
+        with self._lock:
+            return sorted(host for host in self._entries if host != RUNNER)
+
+    def query(self, host=None, module=None, since=None, until=None, failed=None):
+        """Returns the matching events, oldest first.
+
+        since and until are datetimes or ISO 8601 strings, in the time zone
+        of the 'created' field of the events (UTC), since is inclusive and
+        until exclusive. Without a host the events of all hosts, and the
+        ones not tied to any, are returned.
+        """
+        since = _timestamp(since)
+        until = _timestamp(until)
+        with self._lock:
+            hosts = [host] if host is not None else list(self._entries)
+            selected = []
+            for name in hosts:
+                created = self._created.get(name, [])
+                start = bisect.bisect_left(created, since) if since is not None else 0
+                end = bisect.bisect_left(created, until) if until is not None else len(created)
+                selected.append(
+                    [
+                        entry
+                        for entry in self._entries[name][start:end]
+                        if (module is None or entry.module == module) and (failed is None or entry.failed == failed)
+                    ]
+                )
+        return self._read(heapq.merge(*selected, key=lambda entry: entry.created))
+
+    def _read(self, entries):
+        events = []
+        open_files = {}
+        try:
+            for entry in entries:
+                log_file = open_files.get(entry.host)
+                if log_file is None:
+                    log_file = open_files[entry.host] = open(self._file_path(entry.host), 'rb')
+                log_file.seek(entry.offset)
+                events.append(json.loads(log_file.readline()))
+        finally:
+            for log_file in open_files.values():
+                log_file.close()
+        return events
+
+    def close(self):
+        with self._lock:
+            for log_file in self._files.values():
+                log_file.close()
+            self._files.clear()
+
+    def move(self, path):
+        """Moves the event files of the log into the directory path, in place
+        of the ones already there. Recording can go on afterwards, the files
+        are reopened in the new place."""
+        with self._lock:
+            for log_file in self._files.values():
+                log_file.close()
+            self._files.clear()
+            os.makedirs(path, exist_ok=True)
+            _remove_event_files(path)
+            # the files are copied as they are, so the offsets of the index
+            # stay valid
+            for host in self._entries:
+                file_path = self._file_path(host)
+                shutil.copyfile(file_path, os.path.join(path, os.path.basename(file_path)))
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = path
+
+    @classmethod
+    def session(cls, path=None):
+        """The log all ansible_runner executions of this process record into.
+
+        It's created in a temporary directory when first needed, unless path
+        is given, in which case the log is created there or moved there if it
+        already exists somewhere else. The event files of earlier sessions in
+        path are replaced.
+        """
+        with cls._session_lock:
+            if cls._session is None:
+                cls._session = cls(path or tempfile.mkdtemp(prefix='ost-ansible-events-'), fresh=True)
+            elif path is not None and os.path.abspath(path) != os.path.abspath(cls._session.path):
+                cls._session.move(path)
+            return cls._session
+
+    @classmethod
+    def handle_event(cls, event):
+        """Event handler for ansible_runner, records into the session log.
+
+        Returns True so that ansible_runner still writes its own job_events
+        files, which the results are read from.
+        """
+        cls.session().record(event)
+        return True
+
+    @classmethod
+    def discard_session(cls):
+        with cls._session_lock:
+            if cls._session is not None:
+                cls._session.close()
+                shutil.rmtree(cls._session.path, ignore_errors=True)
+                cls._session = None
@@ -4,21 +4,184 @@
 #
 #
 
+import json
+import logging
+import os
+import threading
+
+from ost_utils.ansible.module_mappers import AnsibleExecutionError
+
+LOGGER = logging.getLogger(__name__)
+
+# facts that don't change during the life of a VM, a saved value is used
+# without checking the fingerprint. Not the default addresses, their
+# interfaces move to bridges when hosts are deployed.
+STABLE_FACTS = (
+    'ansible_hostname',
+    'ansible_fqdn',
+    'ansible_domain',
+)
+
+# gather_subset that has each fact, the 'min' one is always gathered.
+# Facts not listed here are gathered with all the subsets.
+FACT_SUBSETS = {
+    'min': (
+        'ansible_hostname',
+        'ansible_fqdn',
+        'ansible_domain',
+        'ansible_nodename',
+        'ansible_architecture',
+        'ansible_kernel',
+        'ansible_distribution',
+        'ansible_distribution_major_version',
+        'ansible_distribution_version',
+        'ansible_os_family',
+        'ansible_pkg_mgr',
+        'ansible_python_version',
+        'ansible_selinux',
+        'ansible_service_mgr',
+        'ansible_date_time',
+        'ansible_dns',
+        'ansible_env',
+    ),
+    'network': (
+        'ansible_default_ipv4',
+        'ansible_default_ipv6',
+        'ansible_interfaces',
+        'ansible_all_ipv4_addresses',
+        'ansible_all_ipv6_addresses',
+    ),
+    'hardware': (
+        'ansible_memtotal_mb',
+        'ansible_memfree_mb',
+        'ansible_processor',
+        'ansible_processor_count',
+        'ansible_processor_cores',
+        'ansible_processor_vcpus',
+        'ansible_devices',
+        'ansible_mounts',
+    ),
+}
+ALL = 'all'
+
+# identifies the boot of a VM and its network interfaces, saved facts are
+# only used while it stays the same
+FINGERPRINT_COMMAND = 'cat /proc/sys/kernel/random/boot_id && ls /sys/class/net'
+
+CACHE_DIR = 'ansible_facts'
+
+
+def subset_of(key):
+    for subset, keys in FACT_SUBSETS.items():
+        if key in keys:
+            return subset
+    return ALL
+
+
+def _gather_subset(subset):
+    # 'min' is gathered along with any subset, '!all' alone gathers just it.
+    # A comma separated string, the module args are passed as key=value
+    if subset == ALL:
+        return {}
+    return {'gather_subset': '!all' if subset == 'min' else f'!all,{subset}'}
+
+
+def _by_host(results, hostnames):
+    # results of a single host are not keyed by it
+    if len(hostnames) == 1:
+        return {hostnames[0]: results}
+    return results
+
+
+def _fingerprint(stdout):
+    boot_id, *interfaces = stdout.split()
+    return {'boot_id': boot_id, 'interfaces': sorted(interfaces)}
+
+
+class FactsCache:
+    """Facts of a VM saved in the deployment directory along with the
+    fingerprint of the VM they were gathered on and their subsets:
+
+    {
+      "fingerprint": {"boot_id": ..., "interfaces": ["eth0", "lo", ...]},
+      "subsets": ["min", "network"],
+      "facts": {"ansible_hostname": ..., ...}
+    }
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fingerprint = None
+        self.subsets = set()
+        self.facts = {}
+        try:
+            with open(path, encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+            self.fingerprint = data['fingerprint']
+            self.subsets = set(data['subsets'])
+            self.facts = data['facts']
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError):
+            LOGGER.warning(f'Ignoring unreadable facts cache {path}', exc_info=True)
+
+    @classmethod
+    def for_host(cls, deployment_path, hostname):
+        return cls(os.path.join(deployment_path, CACHE_DIR, f'{hostname}.json'))
+
+    def covers(self, subset):
+        return ALL in self.subsets or subset in self.subsets
+
+    def save(self, fingerprint, subsets, facts):
+        self.fingerprint = fingerprint
+        self.subsets = set(subsets)
+        self.facts = facts
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+                json.dump(
+                    {'fingerprint': fingerprint, 'subsets': sorted(subsets), 'facts': facts},
+                    cache_file,
+                )
+            os.replace(tmp_path, self.path)
+        except OSError:
+            LOGGER.warning(f'Failed to write facts cache {self.path}', exc_info=True)
+
 
 class Facts:
     """
     Uses ModuleMapper and gather_facts module to obtain and cache facts
     about a VM.
+
+    Only the subset of facts that has the requested fact is gathered, the
+    facts of the subsets gathered so far are merged. With a FactsCache the
+    gathered facts are saved and later sessions use them as long as the
+    fingerprint of the VM (boot id and network interfaces) stays the same.
+    Facts handed out by a FactsRegistry have their facts gathered along
+    with the ones of the other VMs of the registry.
     """
 
-    def __init__(self, module_mapper):
+    def __init__(self, module_mapper, cache=None, registry=None):
+        """
+        :param FactsCache cache: facts saved by previous sessions, updated
+         every time facts are gathered
+        :param FactsRegistry registry: gathers the facts of this VM, the
+         registry's lock is shared by all of its VMs
+        """
         self._module_mapper = module_mapper
-        self._cache = {}
+        self._cache = cache
+        self._registry = registry
+        self._facts = {}
+        self._subsets = set()
+        self._fingerprint = None
+        self._lock = threading.Lock() if registry is None else registry.lock
 
     def get_all(self):
-        if not self._cache:
-            self.refresh()
-        return self._cache
+        with self._lock:
+            if not self._covers(ALL):
+                self._load(ALL)
+            return self._facts
 
     def get(self, key):
         """
@@ -26,9 +189,148 @@ class Facts:
          to get a leaf value in the facts dict use -
          self.get('ansible_eth0').get('ipv4').get('address')
         """
-        if not self._cache:
-            self.refresh()
-        return self._cache[key]
+        with self._lock:
+            if key in self._facts:
+                return self._facts[key]
+            if key in STABLE_FACTS and self._cache is not None and key in self._cache.facts:
+                return self._cache.facts[key]
+            if not self._covers(subset_of(key)):
+                self._load(subset_of(key))
+            return self._facts[key]
 
     def refresh(self):
-        self._cache = self._module_mapper.gather_facts()['ansible_facts']
+        with self._lock:
+            self._facts = {}
+            self._subsets = set()
+            self._gather(ALL)
+
+    def _covers(self, subset):
+        return ALL in self._subsets or subset in self._subsets
+
+    def _load(self, subset):
+        if self._registry is not None:
+            self._registry.load(subset, self)
+        elif not self._use_cache_for(subset):
+            self._gather(subset)
+
+    def _needs_fingerprint(self, subset):
+        return (
+            self._fingerprint is None
+            and self._cache is not None
+            and self._cache.fingerprint is not None
+            and self._cache.covers(subset)
+        )
+
+    def _use_cache_for(self, subset):
+        """Takes the saved facts if they have the subset and the fingerprint
+        of the VM didn't change, returns whether it did"""
+        if self._cache is None or self._cache.fingerprint is None or not self._cache.covers(subset):
+            return False
+        if self._fingerprint is None:
+            self._fingerprint = _fingerprint(self._module_mapper.shell(FINGERPRINT_COMMAND)['stdout'])
+        if self._fingerprint != self._cache.fingerprint:
+            LOGGER.debug(f'Saved facts of {self._module_mapper.host_pattern} are stale, ignoring them')
+            return False
+        self._merge_saved()
+        return True
+
+    def _gather(self, subset):
+        with self._module_mapper.batch() as batch:
+            batch.gather_facts(**_gather_subset(subset))
+            if self._fingerprint is None:
+                batch.shell(FINGERPRINT_COMMAND)
+        gathered, *fingerprint = batch.results
+        self._gathered(subset, gathered['ansible_facts'], fingerprint[0]['stdout'] if fingerprint else None)
+
+    def _gathered(self, subset, facts, fingerprint_stdout=None):
+        if fingerprint_stdout is not None:
+            self._fingerprint = _fingerprint(fingerprint_stdout)
+        if self._cache is not None and self._cache.fingerprint == self._fingerprint:
+            # the saved facts of the other subsets are still good
+            self._merge_saved()
+        self._merge({subset, 'min'}, facts)
+        if self._cache is not None:
+            self._cache.save(self._fingerprint, self._subsets, self._facts)
+
+    def _merge_saved(self):
+        # the facts gathered by this session are newer
+        self._facts = dict(self._cache.facts, **self._facts)
+        self._subsets |= self._cache.subsets
+
+    def _merge(self, subsets, facts):
+        self._facts = dict(self._facts, **facts)
+        self._subsets |= set(subsets)
+
+
+class FactsRegistry:
+    """Facts of all the VMs of a session gathered together.
+
+    The first time a VM's Facts need a subset the registry gathers it for
+    all of its VMs that don't have it yet in one ansible run, forking a
+    process per VM, instead of a run per VM. Checking the fingerprints of
+    the VMs with saved facts is done in one run as well. If the run fails,
+    e.g. because another VM is unreachable, the VM that needed the facts
+    gathers them on its own.
+    """
+
+    def __init__(self, module_mapper_for, hostnames, cache_for=None):
+        """
+        :param module_mapper_for: returns a ModuleMapper for a hostname or
+         a list of them
+        :param hostnames: the VMs of the registry, as named in the inventory
+        :param cache_for: returns the FactsCache of a hostname
+        """
+        self._module_mapper_for = module_mapper_for
+        self.lock = threading.Lock()
+        self._facts = {
+            hostname: Facts(
+                module_mapper_for(hostname),
+                cache=cache_for(hostname) if cache_for is not None else None,
+                registry=self,
+            )
+            for hostname in sorted(hostnames)
+        }
+
+    def __getitem__(self, hostname):
+        return self._facts[hostname]
+
+    def __contains__(self, hostname):
+        return hostname in self._facts
+
+    def load(self, subset, requester):
+        """Makes all the VMs have the subset, called with the lock held"""
+        missing = {hostname: facts for hostname, facts in self._facts.items() if not facts._covers(subset)}
+        unchecked = {hostname: facts for hostname, facts in missing.items() if facts._needs_fingerprint(subset)}
+        try:
+            if unchecked:
+                self._fetch_fingerprints(unchecked)
+            missing = {hostname: facts for hostname, facts in missing.items() if not facts._use_cache_for(subset)}
+            if missing:
+                self._gather(subset, missing)
+        except AnsibleExecutionError:
+            if requester._covers(subset):
+                return
+            LOGGER.warning(
+                f'Gathering {subset} facts of {", ".join(sorted(missing))} together failed, '
+                f'gathering the ones of {requester._module_mapper.host_pattern} alone',
+                exc_info=True,
+            )
+            if not requester._use_cache_for(subset):
+                requester._gather(subset)
+
+    def _fetch_fingerprints(self, facts_by_host):
+        hostnames = list(facts_by_host)
+        with self._module_mapper_for(hostnames).batch(forks=len(hostnames)) as batch:
+            batch.shell(FINGERPRINT_COMMAND)
+        for hostname, res in _by_host(batch.results[0], hostnames).items():
+            facts_by_host[hostname]._fingerprint = _fingerprint(res['stdout'])
+
+    def _gather(self, subset, facts_by_host):
+        hostnames = list(facts_by_host)
+        with self._module_mapper_for(hostnames).batch(forks=len(hostnames)) as batch:
+            batch.gather_facts(**_gather_subset(subset))
+            batch.shell(FINGERPRINT_COMMAND)
+        LOGGER.debug(f'Gathered {subset} facts of {", ".join(hostnames)}')
+        gathered, fingerprints = (_by_host(results, hostnames) for results in batch.results)
+        for hostname, facts in facts_by_host.items():
+            facts._gathered(subset, gathered[hostname]['ansible_facts'], fingerprints[hostname]['stdout'])
@@ -4,11 +4,14 @@
 #
 #
 
+import contextlib
+import functools
 import logging
 
 import ansible_runner
 
 from ost_utils.ansible import config_builder as cb
+from ost_utils.ansible.event_log import EventLog
 from ost_utils.debuginfo_utils import obj_info
 
 LOGGER = logging.getLogger(__name__)
@@ -23,14 +26,15 @@ class AnsibleExecutionError(Exception):
         return f"Error running ansible: rc={self.rc}, stdout={self.stdout}"
 
 
-def _run_ansible_runner(config_builder):
-    runner = ansible_runner.Runner(config=config_builder.prepare())
+def _run_ansible_runner(config_builder, find_result=None):
+    find_result = find_result or _find_result
+    runner = ansible_runner.Runner(config=config_builder.prepare(), event_handler=EventLog.handle_event)
     LOGGER.debug(f'_run_ansible_runner: before run: {runner}')
     runner.run()
     LOGGER.debug(f'_run_ansible_runner: after run: {obj_info(runner)}')
 
     # Always collect results, so that we log them
-    results = _find_result(runner.events)
+    results = find_result(runner.events)
 
     if runner.status != 'successful':
         raise AnsibleExecutionError(rc=runner.rc, stdout=runner.stdout.read())
@@ -68,6 +72,48 @@ def _find_result(ansible_events):
     return results
 
 
+def _find_task_results(ansible_events, task_names):
+    """Finds the result objects for each of the tasks of a batch playbook"""
+
+    events = sorted(
+        (e for e in ansible_events if 'created' in e),
+        key=lambda e: e['created'],
+    )
+
+    results = {name: {} for name in task_names}
+
+    for event in events:
+        event_data = event.get('event_data', None)
+        if event_data is None or event_data.get('task', None) not in results:
+            continue
+        res = event_data.get('res', None)
+        if res is not None:
+            LOGGER.debug(f'_find_task_results: {obj_info(event)}')
+            results[event_data['task']][event_data['host']] = res
+
+    if not any(results.values()):
+        LOGGER.error('No result from ansible-runner')
+        LOGGER.error('Event UUIDs: %s', [e.get('uuid') for e in events])
+        raise RuntimeError('No result from ansible-runner')
+
+    return [_unwrap_single_host(results[name]) for name in task_names]
+
+
+def _unwrap_single_host(results):
+    if len(results) == 1:
+        return results[next(iter(results))]
+    return results
+
+
+def _module_args(args, kwargs):
+    return " ".join(
+        (
+            " ".join(args),
+            " ".join(f"{k}={v}" for k, v in kwargs.items()),
+        )
+    ).strip()
+
+
 class ModuleArgsMapper:
     """Passes ansible module arguments to ansible_runner's config.
 
@@ -92,12 +138,7 @@ class ModuleArgsMapper:
         self.config_builder.module = module
 
     def __call__(self, *args, **kwargs):
-        self.config_builder.module_args = " ".join(
-            (
-                " ".join(args),
-                " ".join(f"{k}={v}" for k, v in kwargs.items()),
-            )
-        ).strip()
+        self.config_builder.module_args = _module_args(args, kwargs)
         LOGGER.debug('ModuleArgsMapper: __call__: ' f'module_args={self.config_builder.module_args}')
         return _run_ansible_runner(self.config_builder)
 
@@ -105,6 +146,65 @@ class ModuleArgsMapper:
         return f'ModuleArgsMapper<config_builder={self.config_builder}>'
 
 
+class ModuleBatch:
+    """Queues ansible module calls and runs them as tasks of one playbook.
+
+    Instances are created by ModuleMapper.batch() and accept the same
+    module calls as ModuleMapper. The calls are not executed right away,
+    instead they're compiled into a single playbook that is run once by
+    ansible_runner when the batch is executed:
+
+        with mm.batch() as batch:
+            batch.file(path='/some/dir', state='directory')
+            batch.copy(src='some_file', dest='/some/dir')
+
+        batch.results  # [<file result>, <copy result>]
+
+    'results' holds one result per queued call, in the order of the calls,
+    with the same shape as the result of the equivalent ModuleMapper call.
+    Like in a playbook, a failing task stops the execution of the remaining
+    tasks and 'AnsibleExecutionError' is raised.
+
+    """
+
+    def __init__(self, inventory, host_pattern, forks=None):
+        self.config_builder = cb.ConfigBuilder()
+        self.config_builder.inventory = inventory
+        self.config_builder.forks = forks
+        self.host_pattern = host_pattern
+        self.tasks = []
+        self.results = None
+
+    def __getattr__(self, name):
+        return functools.partial(self._queue, name)
+
+    def _queue(self, module, *args, **kwargs):
+        task_name = f'{len(self.tasks)}: {module}'
+        self.tasks.append({'name': task_name, module: _module_args(args, kwargs)})
+        LOGGER.debug(f'ModuleBatch: queued {self.tasks[-1]}')
+
+    def _run(self):
+        if not self.tasks:
+            self.results = []
+            return self.results
+        self.config_builder.playbook = [
+            {
+                'hosts': self.host_pattern,
+                'gather_facts': False,
+                'tasks': self.tasks,
+            }
+        ]
+        task_names = [task['name'] for task in self.tasks]
+        self.results = _run_ansible_runner(
+            self.config_builder,
+            functools.partial(_find_task_results, task_names=task_names),
+        )
+        return self.results
+
+    def __str__(self):
+        return f'ModuleBatch<host_pattern={self.host_pattern}, tasks={self.tasks}>'
+
+
 class ModuleMapper:
     """Passes ansible module name to ansible_runner's config.
 
@@ -129,5 +229,16 @@ class ModuleMapper:
         LOGGER.debug(f'ModuleMapper __getattr__: {res}')
         return res
 
+    @contextlib.contextmanager
+    def batch(self, forks=None):
+        """Runs all module calls made on the yielded batch in one playbook.
+
+        forks is the number of hosts ansible runs the tasks on in parallel.
+        See ModuleBatch for details.
+        """
+        batch = ModuleBatch(self.inventory, self.host_pattern, forks=forks)
+        yield batch
+        batch._run()  # pylint: disable=protected-access
+
     def __str__(self):
         return 'ModuleMapper<' f'inventory={self.inventory} ' f'host_pattern={self.host_pattern}' '>'
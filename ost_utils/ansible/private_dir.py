@@ -4,9 +4,6 @@
 #
 #
 
-import glob
-import itertools
-import os
 import shutil
 import tempfile
 import threading
@@ -40,12 +37,6 @@ class PrivateDir:
             cls.all_dirs.add(path)
         return cls.thread_local.__dict__['dir']
 
-    @classmethod
-    def event_data_files(cls):
-        return itertools.chain.from_iterable(
-            glob.iglob(os.path.join(dir, "artifacts/*/job_events/*.json")) for dir in cls.all_dirs
-        )
-
     @classmethod
     def cleanup(cls):
         for dir in cls.all_dirs:
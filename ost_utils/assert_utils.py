@@ -5,9 +5,8 @@
 #
 
 import logging
-import time
 
-from ost_utils import utils
+from ost_utils.ovirtlib import pollutil
 
 LOGGER = logging.getLogger(__name__)
 
@@ -15,45 +14,56 @@ SHORT_TIMEOUT = 3 * 60
 LONG_TIMEOUT = 10 * 60
 
 
-def true_within_short(func, allowed_exceptions=None, error_message=None):
-    return equals_within_short(func, True, allowed_exceptions, error_message)
+def true_within_short(func, allowed_exceptions=None, error_message=None, wakeup=None):
+    return equals_within_short(func, True, allowed_exceptions, error_message, wakeup)
 
 
-def equals_within_short(func, expected_value, allowed_exceptions=None, error_message=None):
+def equals_within_short(func, expected_value, allowed_exceptions=None, error_message=None, wakeup=None):
     return EqualsWithin(
         func,
         expected_value,
         SHORT_TIMEOUT,
         allowed_exceptions,
         error_message,
+        wakeup=wakeup,
     )
 
 
-def true_within_long(func, allowed_exceptions=None, error_message=None):
-    return equals_within_long(func, True, allowed_exceptions, error_message)
+def true_within_long(func, allowed_exceptions=None, error_message=None, wakeup=None):
+    return equals_within_long(func, True, allowed_exceptions, error_message, wakeup)
 
 
-def equals_within_long(func, expected_value, allowed_exceptions=None, error_message=None):
+def equals_within_long(func, expected_value, allowed_exceptions=None, error_message=None, wakeup=None):
     return EqualsWithin(
         func,
         expected_value,
         LONG_TIMEOUT,
         allowed_exceptions,
         error_message,
+        wakeup=wakeup,
     )
 
 
-def true_within(func, timeout, allowed_exceptions=None, error_message=None):
+def true_within(func, timeout, allowed_exceptions=None, error_message=None, wakeup=None):
     return EqualsWithin(
         func,
         True,
         timeout,
         allowed_exceptions,
         error_message,
+        wakeup=wakeup,
     )
 
 
 class EqualsWithin:
+    """Probes `func` until it returns `expected_value` or `timeout` expires.
+
+    By default the probes are spaced by an adaptive backoff. Pass
+    `sleep_interval` to probe at a fixed interval instead, or `wakeup`
+    (e.g. pollutil.EngineEventsWakeup) to probe again as soon as something
+    relevant happens.
+    """
+
     def __init__(
         self,
         func,
@@ -61,7 +71,8 @@ class EqualsWithin:
         timeout,
         allowed_exceptions=None,
         error_message=None,
-        sleep_interval=3,
+        sleep_interval=None,
+        wakeup=None,
     ):
         self.expected_value = expected_value
         self.error_message = error_message
@@ -69,22 +80,28 @@ class EqualsWithin:
 
         self.returned_value = '<no-result-obtained>'
         allowed_exceptions = allowed_exceptions or []
-        with utils.EggTimer(timeout) as timer:
-            while not timer.elapsed():
+        backoff = pollutil.Backoff.fixed(sleep_interval) if sleep_interval is not None else None
+        with pollutil.Poller(
+            timeout,
+            func.__name__,
+            backoff=backoff,
+            wakeup=wakeup,
+            call_site=pollutil.caller_location(__file__),
+        ) as poller:
+            for _ in poller:
                 try:
                     self.returned_value = func()
                     if self.returned_value == self.expected_value:
+                        poller.succeeded()
                         break
                 except Exception as exc:
                     if any(isinstance(exc, cls) for cls in allowed_exceptions):
-                        time.sleep(sleep_interval)
+                        poller.swallowed(exc)
                         continue
 
                     LOGGER.exception('Unexpected exception in %s', func.__name__)
                     raise
 
-                time.sleep(sleep_interval)
-
         if self.error_message is None:
             self.error_message = (
                 f'{func.__name__}() -> {self.returned_value} != ' f'{self.expected_value} after {timeout} seconds'
@@ -100,6 +100,29 @@ class BaseBackend(abc.ABC):
 
         """
 
+    @abc.abstractmethod
+    def deploy_script_dependencies(self):
+        """Function returning a mapping of hostname --> deploy script -->
+        list of the deploy scripts of the host it has to run after.
+
+        Only the scripts that declare their dependencies in ost.json are
+        included, the others have to run after all the scripts listed
+        before them.
+
+        Returns:
+            dict: Hostname --> deploy script --> list of deploy scripts.
+
+            Example value:
+
+            {
+                'ost-basic-suite-master-engine': {
+                    'common/deploy-scripts/setup_sar_stat.sh': [],
+                },
+                'ost-basic-suite-master-host-0': {},
+            }
+
+        """
+
     @abc.abstractmethod
     def libvirt_net_name(self, network_role):
         """Function that finds the libvirt network name corresponding to the
@@ -4,16 +4,34 @@
 #
 #
 
-import xml.etree.ElementTree as ET
+import ipaddress
 from collections import namedtuple
 
 from ost_utils.backend import base
 from ost_utils.shell import shell
 
+from ost_utils.backend.virsh.discovery import LibvirtDiscovery
 from ost_utils.backend.virsh.networking import VirshNetworks
 from ost_utils.backend.virsh.networking import VMNics
+from ost_utils.backend.virsh.topology import Topology
 
-VMInfo = namedtuple("VMInfo", "name libvirt_name nics deploy_scripts")
+VMInfo = namedtuple("VMInfo", "name libvirt_name uuid nics deploy_scripts deploy_script_dependencies")
+
+
+def load_backend(deployment_path):
+    """Returns a backend restored from the topology snapshot of the
+    deployment if it still matches the running domains, or a VirshBackend
+    built from libvirt, whose topology is saved for the next time"""
+    topology = Topology.load(deployment_path)
+    if topology is not None and topology.is_current():
+        return SnapshotBackend(topology)
+    backend = VirshBackend(deployment_path)
+    backend.topology.save()
+    return backend
+
+
+def _read_ansible_inventory(deployment_path):
+    return shell(["cat", "hosts"], bytes_output=True, cwd=deployment_path)
 
 
 class VirshBackend(base.BaseBackend):
@@ -21,8 +39,11 @@ class VirshBackend(base.BaseBackend):
         self._deployment_path = deployment_path
         self._ansible_inventory_str = None
 
-        self._networks = VirshNetworks(self._deployment_path)
-        self._vms = self._get_vms(self._deployment_path)
+        with LibvirtDiscovery(self._deployment_path) as discovery:
+            self._networks = VirshNetworks(self._deployment_path, discovery)
+            self._vms = self._get_vms(discovery)
+        self.topology = Topology(deployment_path)
+        self.topology.update(self._deployment_id(), self._vms_snapshot(), self._networks_snapshot())
 
     def ip_mapping(self):
         return {vm_info.name: vm_info.nics.ips_by_network_role() for vm_info in self._vms.values()}
@@ -32,13 +53,15 @@ class VirshBackend(base.BaseBackend):
 
     def ansible_inventory_str(self):
         if self._ansible_inventory_str is None:
-            contents = shell(["cat", "hosts"], bytes_output=True, cwd=self._deployment_path)
-            self._ansible_inventory_str = contents
+            self._ansible_inventory_str = _read_ansible_inventory(self._deployment_path)
         return self._ansible_inventory_str
 
     def deploy_scripts(self):
         return {vm.name: vm.deploy_scripts for vm in self._vms.values()}
 
+    def deploy_script_dependencies(self):
+        return {vm.name: vm.deploy_script_dependencies for vm in self._vms.values()}
+
     def libvirt_net_name(self, network_role):
         return self._networks.get_network_for_network_role(network_role).libvirt_name
 
@@ -48,32 +71,51 @@ class VirshBackend(base.BaseBackend):
     def storage_subnet(self, ip_version):
         return self._networks.get_subnet_for_network_role(self.storage_network_name(), ip_version)
 
-    def _get_vms(self, deployment_path):
-        vm_names = [name for name in shell("virsh list --name".split()).splitlines() if name[8:13] == "-ost-"]
-
+    def _get_vms(self, discovery):
         vms = {}
 
-        for libvirt_name in vm_names:
-            xml_str = shell(f"virsh dumpxml {libvirt_name}".split()).strip()
-            xml = ET.fromstring(xml_str)
-
-            try:
-                vm_working_dir = xml.find("./metadata/{OST:metadata}ost/ost-working-dir[@comment]").get("comment")
-            except AttributeError:
-                continue
-            if vm_working_dir != deployment_path:
-                continue
-
+        for libvirt_name, xml in discovery.domains().items():
             name = libvirt_name[9:]
-            deploy_scripts = [
-                node.get("name")
-                for node in xml.findall("./metadata/{OST:metadata}ost/ost-deploy-scripts/script[@name]")
-            ]
+            script_nodes = xml.findall("./metadata/{OST:metadata}ost/ost-deploy-scripts/script[@name]")
+            deploy_scripts = [node.get("name") for node in script_nodes]
+            dependencies = {
+                node.get("name"): node.get("after").split() for node in script_nodes if node.get("after") is not None
+            }
             nics = VMNics(xml, self._networks)
-            vms[name] = VMInfo(name, libvirt_name, nics, deploy_scripts)
+            vms[name] = VMInfo(name, libvirt_name, xml.findtext("./uuid"), nics, deploy_scripts, dependencies)
 
         return vms
 
+    def _deployment_id(self):
+        return next((vm.libvirt_name[:8] for vm in self._vms.values()), None)
+
+    def _vms_snapshot(self):
+        ip_mapping = self.ip_mapping()
+        mac_mapping = self.mac_mapping()
+        return {
+            vm.name: {
+                "libvirt_name": vm.libvirt_name,
+                "uuid": vm.uuid,
+                "ips": {role: [str(ip) for ip in ips] for role, ips in ip_mapping[vm.name].items()},
+                "macs": mac_mapping[vm.name],
+                "deploy_scripts": vm.deploy_scripts,
+                "deploy_script_dependencies": vm.deploy_script_dependencies,
+            }
+            for vm in self._vms.values()
+        }
+
+    def _networks_snapshot(self):
+        return {
+            net.network_role: {
+                "libvirt_name": net.libvirt_name,
+                "ip4_gw": None if net.ip4_gw is None else str(net.ip4_gw),
+                "ip4_prefix": net.ip4_prefix,
+                "ip6_gw": None if net.ip6_gw is None else str(net.ip6_gw),
+                "ip6_prefix": net.ip6_prefix,
+            }
+            for net in self._networks.get_networks()
+        }
+
     def get_ip_prefix_for_management_network(self, ip_version):
         management_role = self.management_network_name()
         mgmt_network = self._networks.get_network_for_network_role(management_role)
@@ -85,3 +127,55 @@ class VirshBackend(base.BaseBackend):
         management_role = self.management_network_name()
         mgmt_network = self._networks.get_network_for_network_role(management_role)
         return mgmt_network.ip6_gw if ip_version == 6 else mgmt_network.ip4_gw
+
+
+class SnapshotBackend(base.BaseBackend):
+    """Backend answering from a Topology snapshot without querying libvirt"""
+
+    def __init__(self, topology):
+        self.topology = topology
+        self._deployment_path = topology.deployment_path
+        self._ansible_inventory_str = None
+
+    def ip_mapping(self):
+        return {
+            name: {role: [ipaddress.ip_address(ip) for ip in ips] for role, ips in vm["ips"].items()}
+            for name, vm in self.topology.vms.items()
+        }
+
+    def mac_mapping(self):
+        return {name: vm["macs"] for name, vm in self.topology.vms.items()}
+
+    def ansible_inventory_str(self):
+        if self._ansible_inventory_str is None:
+            self._ansible_inventory_str = _read_ansible_inventory(self._deployment_path)
+        return self._ansible_inventory_str
+
+    def deploy_scripts(self):
+        return {name: vm["deploy_scripts"] for name, vm in self.topology.vms.items()}
+
+    def deploy_script_dependencies(self):
+        return {name: vm.get("deploy_script_dependencies", {}) for name, vm in self.topology.vms.items()}
+
+    def libvirt_net_name(self, network_role):
+        return self.topology.networks[network_role]["libvirt_name"]
+
+    def management_subnet(self, ip_version):
+        return self._subnet(self.management_network_name(), ip_version)
+
+    def storage_subnet(self, ip_version):
+        return self._subnet(self.storage_network_name(), ip_version)
+
+    def get_ip_prefix_for_management_network(self, ip_version):
+        network = self.topology.networks[self.management_network_name()]
+        return network[f"ip{ip_version}_prefix"]
+
+    def get_gw_ip_for_management_network(self, ip_version):
+        gw = self.topology.networks[self.management_network_name()][f"ip{ip_version}_gw"]
+        return None if gw is None else ipaddress.ip_address(gw)
+
+    def _subnet(self, network_role, ip_version):
+        network = self.topology.networks[network_role]
+        gw = network[f"ip{ip_version}_gw"]
+        prefix = network[f"ip{ip_version}_prefix"]
+        return ipaddress.ip_network(f"{gw}/{prefix}", False)
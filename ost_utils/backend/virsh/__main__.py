@@ -0,0 +1,49 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Manages the topology snapshot of a deployment.
+
+usage: python3 -m ost_utils.backend.virsh snapshot|deployment-id deployment_dir
+
+snapshot       queries libvirt and saves the topology of the deployment
+deployment-id  prints the 8 character id of the deployment's libvirt
+               objects if the saved topology is still current, fails
+               otherwise
+"""
+
+import os
+import sys
+
+from ost_utils.backend.virsh import VirshBackend
+from ost_utils.backend.virsh.topology import Topology
+
+
+def snapshot(deployment_path):
+    VirshBackend(deployment_path).topology.save()
+    return 0
+
+
+def deployment_id(deployment_path):
+    topology = Topology.load(deployment_path)
+    if topology is None or not topology.is_current():
+        return 1
+    print(topology.deployment_id)
+    return 0
+
+
+COMMANDS = {
+    'snapshot': snapshot,
+    'deployment-id': deployment_id,
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] not in COMMANDS:
+        print(
+            f'usage: {os.path.basename(sys.executable)} -m ost_utils.backend.virsh {"|".join(COMMANDS)} deployment_dir'
+        )
+        sys.exit(2)
+    sys.exit(COMMANDS[sys.argv[1]](sys.argv[2]))
@@ -0,0 +1,246 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import xml.etree.ElementTree as ET
+
+from ost_utils.shell import ShellError
+from ost_utils.shell import shell
+
+try:
+    import libvirt
+except ImportError:
+    libvirt = None
+
+
+CACHE_FILE = "libvirt_topology.json"
+MAX_WORKERS = 8
+
+LOGGER = logging.getLogger(__name__)
+
+
+def working_dir(xml):
+    node = xml.find("./metadata/{OST:metadata}ost/ost-working-dir[@comment]")
+    return None if node is None else node.get("comment")
+
+
+class LibvirtSource:
+    """Reads libvirt objects through a single libvirt-python connection"""
+
+    fetch_errors = (libvirt.libvirtError,) if libvirt is not None else ()
+
+    def __init__(self):
+        # lookups of objects that vanished in the meantime are expected,
+        # don't let libvirt print them to stderr
+        libvirt.registerErrorHandler(lambda *_: None, None)
+        self._conn = libvirt.openReadOnly(None)
+
+    def list_domains(self):
+        domains = self._conn.listAllDomains(libvirt.VIR_CONNECT_LIST_DOMAINS_ACTIVE)
+        return [(dom.name(), dom.UUIDString()) for dom in domains]
+
+    def list_domain_uuids(self):
+        return [dom.UUIDString() for dom in self._conn.listAllDomains(libvirt.VIR_CONNECT_LIST_DOMAINS_ACTIVE)]
+
+    def domain_xml(self, name):
+        return self._conn.lookupByName(name).XMLDesc()
+
+    def list_networks(self):
+        networks = self._conn.listAllNetworks(libvirt.VIR_CONNECT_LIST_NETWORKS_ACTIVE)
+        return [(net.name(), net.UUIDString()) for net in networks]
+
+    def network_xml(self, name):
+        return self._conn.networkLookupByName(name).XMLDesc()
+
+    def close(self):
+        self._conn.close()
+
+
+class VirshSource:
+    """Reads libvirt objects by running virsh, used when libvirt-python
+    is not available. Listing doesn't report UUIDs."""
+
+    fetch_errors = (ShellError,)
+
+    def list_domains(self):
+        return [(name, None) for name in shell("virsh list --name".split()).splitlines() if name]
+
+    def list_domain_uuids(self):
+        return [uuid for uuid in shell("virsh list --uuid".split()).splitlines() if uuid]
+
+    def domain_xml(self, name):
+        return shell(f"virsh dumpxml {name}".split()).strip()
+
+    def list_networks(self):
+        return [(name, None) for name in shell("virsh net-list --name".split()).splitlines() if name]
+
+    def network_xml(self, name):
+        return shell(f"virsh net-dumpxml {name}".split()).strip()
+
+    def close(self):
+        pass
+
+
+def default_source():
+    if libvirt is not None:
+        try:
+            return LibvirtSource()
+        except libvirt.libvirtError:
+            LOGGER.debug("Failed to connect to libvirt, falling back to virsh", exc_info=True)
+    return VirshSource()
+
+
+class LibvirtDiscovery:
+    """Finds the libvirt domains and networks that belong to a deployment.
+
+    All the OST deployments on a machine share the same libvirt, so most
+    of the objects listed belong to other deployments. Every object whose
+    XML has been read once is remembered in a cache file in the deployment
+    dir, keyed by its UUID, together with the hash of its XML and, for the
+    objects of this deployment, the XML itself. The 8 character id that
+    prefixes the names of all the objects of a deployment is remembered
+    as well, so that later runs only read the XML of the objects with that
+    id, in parallel. Objects of other deployments known by UUID are never
+    read again, neither are the domains of this deployment, whose relevant
+    parts (metadata, nics) don't change while they're running. Networks
+    are always read since their dhcp entries are updated live.
+    """
+
+    def __init__(self, deployment_path, source=None):
+        self._deployment_path = deployment_path
+        self._source = source or default_source()
+        self._cache_path = os.path.join(deployment_path, CACHE_FILE)
+        self._cache = self._load_cache()
+        self._dirty = False
+
+    def domains(self):
+        """Dict of libvirt name -> parsed XML of the deployment's domains"""
+        return self._discover(
+            "domains",
+            self._source.list_domains(),
+            self._source.domain_xml,
+            is_ost=lambda name: name[8:13] == "-ost-",
+            deployment_id=lambda name: name[:8],
+            trust_cache=True,
+        )
+
+    def networks(self):
+        """Dict of libvirt name -> parsed XML of the deployment's networks"""
+        return self._discover(
+            "networks",
+            self._source.list_networks(),
+            self._source.network_xml,
+            is_ost=lambda name: name.startswith("ost"),
+            deployment_id=lambda name: name[3:11],
+            trust_cache=False,
+        )
+
+    def close(self):
+        self._save_cache()
+        self._source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _discover(self, kind, listed, fetch, is_ost, deployment_id, trust_cache):
+        # pylint: disable=too-many-arguments,too-many-locals
+        known = self._cache.setdefault(kind, {})
+        candidates = [(name, uuid) for name, uuid in listed if is_ost(name)]
+        own_id = self._cache.get("deployment_id")
+        if own_id is not None:
+            own = [(name, uuid) for name, uuid in candidates if deployment_id(name) == own_id]
+            # an empty result means the cached id is stale, look at everything
+            candidates = own or candidates
+
+        xmls = {}
+        to_fetch = []
+        for name, uuid in candidates:
+            entry = known.get(uuid) if uuid is not None else None
+            if entry is None or entry["name"] != name:
+                to_fetch.append(name)
+            elif entry["xml"] is None:
+                continue
+            elif trust_cache:
+                xmls[name] = ET.fromstring(entry["xml"])
+            else:
+                to_fetch.append(name)
+
+        for name, xml_str in self._fetch_all(fetch, to_fetch).items():
+            xml = ET.fromstring(xml_str)
+            ours = working_dir(xml) == self._deployment_path
+            self._remember(known, name, xml, xml_str, ours)
+            if ours:
+                xmls[name] = xml
+                if own_id != deployment_id(name):
+                    own_id = self._cache["deployment_id"] = deployment_id(name)
+                    self._dirty = True
+
+        if listed and all(uuid is not None for _, uuid in listed):
+            # forget the objects that don't exist anymore
+            listed_uuids = {uuid for _, uuid in listed}
+            for uuid in set(known) - listed_uuids:
+                del known[uuid]
+                self._dirty = True
+
+        self._save_cache()
+        return xmls
+
+    def _fetch_all(self, fetch, names):
+        if not names:
+            return {}
+
+        def fetch_one(name):
+            try:
+                return fetch(name)
+            except self._source.fetch_errors:
+                # destroyed after being listed, most probably by another run
+                LOGGER.debug(f"Failed to read the XML of {name}, skipping", exc_info=True)
+                return None
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(names))) as executor:
+            xml_strs = executor.map(fetch_one, names)
+            return {name: xml_str for name, xml_str in zip(names, xml_strs) if xml_str is not None}
+
+    def _remember(self, known, name, xml, xml_str, ours):
+        # pylint: disable=too-many-arguments
+        uuid = xml.findtext("./uuid")
+        if uuid is None:
+            return
+        xml_hash = hashlib.sha256(xml_str.encode("utf-8")).hexdigest()
+        entry = known.get(uuid)
+        if entry is not None and entry["name"] == name and entry["xml_hash"] == xml_hash:
+            return
+        known[uuid] = {"name": name, "xml_hash": xml_hash, "xml": xml_str if ours else None}
+        self._dirty = True
+
+    def _load_cache(self):
+        try:
+            with open(self._cache_path, encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            LOGGER.warning(f"Ignoring unreadable libvirt topology cache {self._cache_path}", exc_info=True)
+            return {}
+
+    def _save_cache(self):
+        if not self._dirty:
+            return
+        tmp_path = f"{self._cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(self._cache, cache_file)
+            os.replace(tmp_path, self._cache_path)
+            self._dirty = False
+        except OSError:
+            LOGGER.warning(f"Failed to write libvirt topology cache {self._cache_path}", exc_info=True)
@@ -6,6 +6,7 @@
 import ipaddress
 import xml.etree.ElementTree as ET
 
+from ost_utils.backend.virsh.discovery import LibvirtDiscovery
 from ost_utils.shell import shell
 
 
@@ -60,10 +61,14 @@ class HostDhcp:
 
 
 class VirshNetworks:
-    def __init__(self, deployment_path):
+    def __init__(self, deployment_path, discovery=None):
         self._networks_by_role = {}
         self._networks_by_libvirt_name = {}
-        self._load(deployment_path)
+        if discovery is None:
+            with LibvirtDiscovery(deployment_path) as discovery:
+                self._load(discovery)
+        else:
+            self._load(discovery)
 
     def __repr__(self):
         return (
@@ -72,24 +77,18 @@ class VirshNetworks:
             f"networks_by_libvirt_name: {self._networks_by_libvirt_name} >"
         )
 
-    def _load(self, deployment_path):
-        libvirt_net_names = self._get_libvirt_names_for_ost_nets_on_machine()
-        for name in libvirt_net_names:
-            net = VirshNetwork(name)
-            net.load_xml()
-            if net.is_network_from_current_run(deployment_path):
-                net.parse()
-                self._push_item(net)
+    def _load(self, discovery):
+        for name, xml in discovery.networks().items():
+            net = VirshNetwork(name, xml)
+            net.parse()
+            self._push_item(net)
 
     def _push_item(self, net):
         self._networks_by_role[net.network_role] = net
         self._networks_by_libvirt_name[net.libvirt_name] = net
 
-    def _get_libvirt_names_for_ost_nets_on_machine(self):
-        libvirt_net_names = [
-            name for name in shell("virsh net-list --name".split()).splitlines() if name.startswith("ost")
-        ]
-        return libvirt_net_names
+    def get_networks(self):
+        return list(self._networks_by_role.values())
 
     def get_network_for_network_role(self, network_role):
         return self._networks_by_role[network_role]
@@ -176,7 +175,7 @@ class VirshNetwork:
     </network>
     """
 
-    def __init__(self, name):
+    def __init__(self, name, xml=None):
         self._ip4_gw = None
         self._ip4_prefix = None
         self._host_dhcps4 = HostDhcps()
@@ -185,7 +184,7 @@ class VirshNetwork:
         self._host_dhcps6 = HostDhcps()
         self._network_role = None
         self._libvirt_name = name
-        self._xml = None
+        self._xml = xml
 
     def __repr__(self):
         return (
@@ -0,0 +1,117 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+import json
+import logging
+import os
+import threading
+
+from ost_utils.backend.virsh import discovery
+
+TOPOLOGY_FILE = "topology.json"
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Topology:
+    """
+    Snapshot of a deployment kept in its directory, so that later sessions
+    don't have to query libvirt to find out what they are working with. It
+    holds the VMs with their UUIDs, IPs, MACs and deploy scripts and the
+    networks with their subnets:
+
+    {
+      "deployment_id": "15d9c3a0",
+      "vms": {
+        "ost-basic-suite-master-engine": {
+          "libvirt_name": "15d9c3a0-ost-basic-suite-master-engine",
+          "uuid": "b8b8fa84-0f6a-4f7c-8c7e-5a8d6f0b2e4c",
+          "ips": {"management": ["192.168.200.2"], ...},
+          "macs": {"management": ["54:52:c0:a8:c8:02"], ...},
+          "deploy_scripts": ["common/deploy-scripts/setup_engine.sh", ...],
+          "deploy_script_dependencies": {"common/deploy-scripts/...": [...]}
+        },
+        ...
+      },
+      "networks": {
+        "management": {
+          "libvirt_name": "ost15d9c3a0-200",
+          "ip4_gw": "192.168.200.1",
+          "ip4_prefix": 24,
+          "ip6_gw": "fd8f:1391:3a82:200::1",
+          "ip6_prefix": 64
+        },
+        ...
+      }
+    }
+
+    The snapshot is only valid as long as all of its domains are running,
+    which is checked by UUID, so a recreated VM invalidates it.
+    """
+
+    def __init__(self, deployment_path, data=None):
+        self.deployment_path = deployment_path
+        self._data = data or {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"< {self.__class__.__name__} | deployment_path: {self.deployment_path}, data: {self._data} >"
+
+    @classmethod
+    def load(cls, deployment_path):
+        """Returns the saved topology of the deployment, or None"""
+        path = os.path.join(deployment_path, TOPOLOGY_FILE)
+        try:
+            with open(path, encoding="utf-8") as topology_file:
+                return cls(deployment_path, json.load(topology_file))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            LOGGER.warning(f"Ignoring unreadable topology {path}", exc_info=True)
+            return None
+
+    @property
+    def deployment_id(self):
+        return self._data.get("deployment_id")
+
+    @property
+    def vms(self):
+        return self._data.get("vms", {})
+
+    @property
+    def networks(self):
+        return self._data.get("networks", {})
+
+    def is_current(self, source=None):
+        """Checks that all the domains of the snapshot are still running"""
+        uuids = {vm["uuid"] for vm in self.vms.values()}
+        if not uuids:
+            return False
+        source = source or discovery.default_source()
+        try:
+            return uuids <= set(source.list_domain_uuids())
+        finally:
+            source.close()
+
+    def update(self, deployment_id, vms, networks):
+        """Replaces the VMs and networks of the snapshot"""
+        with self._lock:
+            self._data = {
+                "deployment_id": deployment_id,
+                "vms": vms,
+                "networks": networks,
+            }
+
+    def save(self):
+        path = os.path.join(self.deployment_path, TOPOLOGY_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with self._lock:
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as topology_file:
+                    json.dump(self._data, topology_file, indent=2)
+                os.replace(tmp_path, path)
+            except OSError:
+                LOGGER.warning(f"Failed to write topology {path}", exc_info=True)
@@ -0,0 +1,383 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Collects the logs and configuration of the VMs of a deployment.
+
+Every VM of the ansible inventory streams a compressed tar of its artifacts
+over ssh straight into exported-artifacts/test_logs/<host>, where it is
+extracted on the fly, all VMs at the same time. Nothing is archived on the
+VMs and no archive is kept on the controller.
+
+Files that didn't change since the last collection into the same directory
+(same size and mtime) are not transferred again. Which files are collected
+can be adjusted in the suite's ost.json:
+
+  "artifacts": {
+    "include": ["/var/lib/foo"],
+    "exclude": ["/var/log/foo/*.bin"],
+    "max_file_size": {"/var/log": "256M", "/root": "10M"}
+  }
+
+include paths are added to DEFAULT_INCLUDE, exclude patterns to
+DEFAULT_EXCLUDE. A pattern excludes the paths it matches (fnmatch) and
+everything below them. Files bigger than the limit of the longest path
+they're under are skipped. The skipped files and the counters and timings
+of every host are written to test_logs/artifacts.json.
+
+Needs OST_REPO_ROOT and OST_DEPLOYMENT in the environment, SUITE for the
+suite's configuration:
+
+usage: python3 -m ost_utils.deployment_utils.artifacts
+"""
+
+import concurrent.futures
+import contextlib
+import fnmatch
+import glob
+import json
+import logging
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+from ost_utils import ssh
+from ost_utils.deployment_utils.provisioning import load_config
+
+DEFAULT_INCLUDE = (
+    "/etc/dnf",
+    "/etc/firewalld",
+    "/etc/grafana",
+    "/etc/httpd/conf",
+    "/etc/httpd/conf.d",
+    "/etc/httpd/conf.modules.d",
+    "/etc/ovirt-engine",
+    "/etc/ovirt-engine-dwh",
+    "/etc/ovirt-engine-metrics",
+    "/etc/ovirt-engine-setup.conf.d",
+    "/etc/ovirt-engine-setup.env.d",
+    "/etc/ovirt-host-deploy.conf.d",
+    "/etc/ovirt-imageio-proxy",
+    "/etc/ovirt-provider-ovn",
+    "/etc/ovirt-vmconsole",
+    "/etc/ovirt-web-ui",
+    "/etc/resolv.conf",
+    "/etc/sysconfig",
+    "/etc/yum",
+    "/etc/yum.repos.d",
+    "/root",
+    "/tmp/dnf_yum.conf",
+    "/var/cache/ovirt-engine",
+    "/var/lib/ovirt-engine/setup/answers",
+    "/var/lib/ovirt-engine/ansible-runner",
+    "/var/lib/pgsql/initdb_postgresql.log",
+    "/var/lib/pgsql/data/log",
+    "/var/log",
+)
+# the binary journal is exported as text to /var/log/journalctl.log
+DEFAULT_EXCLUDE = ("/var/log/journal",)
+
+MANIFEST_FILE = ".artifacts-manifest.json"
+REMOTE_FILE_LIST = "/var/tmp/ost-artifacts.list"
+STATS_FILE = "artifacts.json"
+MAX_WORKERS = 8
+SIZE_UNITS = {"": 1, "K": 2**10, "M": 2**20, "G": 2**30}
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CollectionError(Exception):
+    pass
+
+
+def parse_size(size):
+    if isinstance(size, int):
+        return size
+    match = re.fullmatch(r"(\d+)([KMG]?)", str(size).strip().upper())
+    if match is None:
+        raise ValueError(f"Invalid size {size}, expected a number of bytes with an optional K, M or G suffix")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2)]
+
+
+def read_inventory(deployment_path):
+    """Dict of inventory hostname -> (address, ssh key) of the hosts of the
+    deployment's ansible inventory"""
+    paths = sorted(glob.glob(os.path.join(deployment_path, "ansible_inventory", "*")))
+    if not paths:
+        paths = [os.path.join(deployment_path, "hosts")]
+    hosts = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as inventory_file:
+            for line in inventory_file:
+                fields = line.split()
+                if not fields or fields[0].startswith(("#", "[")):
+                    continue
+                variables = dict(field.split("=", 1) for field in fields[1:] if "=" in field)
+                if "ansible_host" in variables:
+                    hosts[fields[0]] = (variables["ansible_host"], variables.get("ansible_ssh_private_key_file"))
+    return hosts
+
+
+class Selection:
+    """Which files of a host are collected"""
+
+    def __init__(self, include=(), exclude=(), max_file_size=None):
+        self.include = tuple(DEFAULT_INCLUDE) + tuple(include)
+        self.exclude = tuple(DEFAULT_EXCLUDE) + tuple(exclude)
+        self.max_file_size = {
+            path.rstrip("/") or "/": parse_size(size) for path, size in (max_file_size or {}).items()
+        }
+
+    @classmethod
+    def from_suite(cls, suite_dir):
+        config_path = os.path.join(suite_dir, "ost.json") if suite_dir else None
+        if config_path is None or not os.path.exists(config_path):
+            return cls()
+        conf = load_config(config_path).get("artifacts", {})
+        return cls(conf.get("include", ()), conf.get("exclude", ()), conf.get("max_file_size"))
+
+    def is_excluded(self, path):
+        for pattern in self.exclude:
+            pattern = pattern.rstrip("/")
+            if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(path, f"{pattern}/*"):
+                return True
+        return False
+
+    def size_limit(self, path):
+        limits = [
+            (len(prefix), limit)
+            for prefix, limit in self.max_file_size.items()
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/")
+        ]
+        return max(limits)[1] if limits else None
+
+
+class HostCollector:
+    """Collects the artifacts of a single host into dest_dir"""
+
+    def __init__(self, name, address, ssh_key, dest_dir, selection):
+        # pylint: disable=too-many-arguments
+        self.name = name
+        self._address = address
+        self._ssh_key = ssh_key
+        self._dest_dir = dest_dir
+        self._selection = selection
+        self.stats = {
+            "files": 0,
+            "transferred": 0,
+            "unchanged": 0,
+            "excluded": 0,
+            "too_big": [],
+            "bytes": 0,
+            "compressed_bytes": 0,
+            "list_time": 0.0,
+            "transfer_time": 0.0,
+        }
+
+    def collect(self):
+        os.makedirs(self._dest_dir, exist_ok=True)
+        start = time.monotonic()
+        compressor, listing = self._list()
+        self.stats["list_time"] = round(time.monotonic() - start, 3)
+
+        manifest = self._load_manifest()
+        to_send = []
+        for path, (size, mtime) in listing.items():
+            if self._selection.is_excluded(path):
+                self.stats["excluded"] += 1
+                continue
+            limit = self._selection.size_limit(path)
+            if limit is not None and size > limit:
+                self.stats["too_big"].append({"path": path, "size": size})
+                continue
+            self.stats["files"] += 1
+            local_path = os.path.join(self._dest_dir, path.lstrip("/"))
+            if manifest.get(path) == [size, mtime] and os.path.lexists(local_path):
+                self.stats["unchanged"] += 1
+                continue
+            to_send.append(path)
+            self.stats["bytes"] += size
+
+        start = time.monotonic()
+        if to_send:
+            self._transfer(compressor, to_send)
+        self.stats["transferred"] = len(to_send)
+        self.stats["transfer_time"] = round(time.monotonic() - start, 3)
+        self._save_manifest({path: list(entry) for path, entry in listing.items()})
+        return self.stats
+
+    def _list(self):
+        """Dumps the journal, then returns the compressor available on the
+        host and a dict of path -> (size, mtime) of all the candidate files"""
+        paths = " ".join(shlex.quote(path) for path in self._selection.include)
+        command = (
+            "command -v zstd >/dev/null && echo zstd || echo gzip; "
+            "journalctl -a --no-pager -o short-iso-precise > /var/log/journalctl.log; "
+            f"find {paths} \\( -type f -o -type l \\) -printf '%s %T@ %p\\0' 2>/dev/null; true"
+        )
+        status, out, err = self._run(command)
+        if status != 0:
+            raise CollectionError(f"Listing the artifacts of {self.name} failed: {err.decode(errors='replace')}")
+        compressor, _, records = out.partition(b"\n")
+        listing = {}
+        for record in records.split(b"\0"):
+            if not record:
+                continue
+            size, mtime, path = record.decode("utf-8", errors="surrogateescape").split(" ", 2)
+            listing[path] = (int(size), mtime)
+        return compressor.decode().strip(), listing
+
+    def _transfer(self, compressor, paths):
+        # the list is uploaded first, sending it to tar while its output
+        # isn't read yet could fill both ssh windows
+        file_list = b"\0".join(path.encode("utf-8", errors="surrogateescape") for path in paths) + b"\0"
+        status, _, err = self._run(f"cat > {REMOTE_FILE_LIST}", data=file_list)
+        if status != 0:
+            raise CollectionError(f"Uploading the file list to {self.name} failed: {err.decode(errors='replace')}")
+
+        compress = "zstd -q -1 -T0 -c" if compressor == "zstd" else "gzip -1 -c"
+        # tar exits with 1 when files changed while being read, which is
+        # expected of logs, anything worse fails the pipeline
+        command = (
+            "set -o pipefail; "
+            f"{{ tar -cf - --null --no-recursion --ignore-failed-read --warning=no-file-changed "
+            f"-T {REMOTE_FILE_LIST} 2>/dev/null; [ $? -le 1 ]; }} | {compress}; "
+            f"status=$?; rm -f {REMOTE_FILE_LIST}; exit $status"
+        )
+        remote_err = bytearray()
+        # the errors of tar go to a file, a pipe nobody reads before the
+        # stream ends could fill up and block the extraction
+        with tempfile.TemporaryFile() as extract_err:
+            extract = subprocess.Popen(
+                ["tar", "-x", "--zstd" if compressor == "zstd" else "-z", "-f", "-", "-C", self._dest_dir],
+                stdin=subprocess.PIPE,
+                stderr=extract_err,
+            )
+
+            def write(chunk):
+                self.stats["compressed_bytes"] += len(chunk)
+                extract.stdin.write(chunk)
+
+            try:
+                status, _, _ = self._run(command, on_stdout=write, on_stderr=remote_err.extend)
+            except BrokenPipeError:
+                # tar stopped reading, its errors tell why
+                status = None
+            finally:
+                with contextlib.suppress(BrokenPipeError):
+                    extract.stdin.close()
+                extract.wait()
+            if extract.returncode != 0:
+                extract_err.seek(0)
+                raise CollectionError(
+                    f"Extracting the artifacts of {self.name} failed: {extract_err.read().decode(errors='replace')}"
+                )
+        if status != 0:
+            raise CollectionError(
+                f"Archiving the artifacts of {self.name} failed with {status}: {remote_err.decode(errors='replace')}"
+            )
+
+    def _run(self, command, data=None, on_stdout=None, on_stderr=None):
+        channel = ssh.CONNECTION_POOL.open_session(ip_addr=self._address, ssh_key=self._ssh_key, host_name=self.name)
+        try:
+            channel.exec_command(command)
+            if data is not None:
+                channel.sendall(data)
+            channel.shutdown_write()
+            return ssh.drain_ssh_channel(
+                channel,
+                stdout=None,
+                stderr=None,
+                on_stdout=on_stdout,
+                on_stderr=on_stderr,
+                collect_output=on_stdout is None,
+            )
+        finally:
+            channel.close()
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self._dest_dir, MANIFEST_FILE), encoding="utf-8") as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        with open(os.path.join(self._dest_dir, MANIFEST_FILE), "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file)
+
+
+def collect(deployment_path, artifacts_dir, selection=None, max_workers=MAX_WORKERS):
+    """Collects the artifacts of all the hosts of the deployment in parallel
+    and returns the stats of every host, failures don't stop the others"""
+    selection = selection or Selection()
+    test_logs = os.path.join(artifacts_dir, "test_logs")
+    collectors = [
+        HostCollector(name, address, ssh_key, os.path.join(test_logs, name), selection)
+        for name, (address, ssh_key) in read_inventory(deployment_path).items()
+    ]
+    if not collectors:
+        raise CollectionError(f"No hosts found in the inventory of {deployment_path}")
+
+    results = {}
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(collectors))) as executor:
+        futures = {executor.submit(collector.collect): collector for collector in collectors}
+        for future in concurrent.futures.as_completed(futures):
+            collector = futures[future]
+            try:
+                results[collector.name] = future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                LOGGER.error(f"Collecting the artifacts of {collector.name} failed: {e}")
+                results[collector.name] = dict(collector.stats, error=str(e))
+
+    summary = {"wall_time": round(time.monotonic() - start, 3), "hosts": results}
+    os.makedirs(test_logs, exist_ok=True)
+    with open(os.path.join(test_logs, STATS_FILE), "w", encoding="utf-8") as stats_file:
+        json.dump(summary, stats_file, indent=2)
+    _log_summary(summary)
+    return summary
+
+
+def _log_summary(summary):
+    LOGGER.info(f"Collected artifacts in {summary['wall_time']:.1f}s:")
+    for name, stats in sorted(summary["hosts"].items()):
+        if "error" in stats:
+            LOGGER.info(f"  {name}: failed, {stats['error']}")
+            continue
+        LOGGER.info(
+            f"  {name}: {stats['transferred']}/{stats['files']} files, {stats['unchanged']} unchanged, "
+            f"{len(stats['too_big'])} too big, {stats['bytes'] / 2**20:.1f}MiB "
+            f"({stats['compressed_bytes'] / 2**20:.1f}MiB compressed) in "
+            f"{stats['list_time'] + stats['transfer_time']:.1f}s"
+        )
+
+
+def main(argv):
+    if argv:
+        print(f"usage: {os.path.basename(sys.executable)} -m ost_utils.deployment_utils.artifacts")
+        return 2
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    repo_root = os.environ["OST_REPO_ROOT"]
+    suite = os.environ.get("SUITE")
+    try:
+        summary = collect(
+            os.environ["OST_DEPLOYMENT"],
+            os.path.join(repo_root, "exported-artifacts"),
+            Selection.from_suite(os.path.join(repo_root, suite) if suite else None),
+        )
+    except (CollectionError, OSError, ValueError) as e:
+        LOGGER.error(f"Collecting artifacts failed: {e}")
+        return 1
+    return 1 if any("error" in stats for stats in summary["hosts"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
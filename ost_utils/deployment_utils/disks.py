@@ -0,0 +1,142 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Creation of the disk images of the suite VMs.
+
+Every VM has a root disk made from the image its root_disk_var points to,
+and any number of additional empty disks. How each of them is created can
+be chosen in the suite's ost.json:
+
+  "storage": {
+    "root_disk_var": "OST_IMAGES_STORAGE_BASE",
+    "root_disk": { "mode": "reflink" },
+    "disks": {
+      "sda": {
+        "template": "common/libvirt-templates/disk_template",
+        "size": "101G",
+        "format": "qcow2",
+        "cluster_size": "1M",
+        "lazy_refcounts": true,
+        "preallocation": "metadata"
+      }
+    }
+  }
+
+Root disk modes:
+  overlay  qcow2 overlay backed by the image (default), accepts
+           cluster_size and lazy_refcounts
+  reflink  qcow2 copy of the image sharing its extents, so that the guest
+           doesn't pay for the backing chain. Needs a filesystem that can
+           reflink (XFS, btrfs), an overlay is created elsewhere.
+
+Additional disk formats:
+  raw      sparse raw file (default), accepts preallocation off|falloc|full
+  qcow2    accepts cluster_size, lazy_refcounts and preallocation
+           off|metadata|falloc|full
+"""
+
+import json
+import logging
+import os
+
+from ost_utils.shell import ShellError
+from ost_utils.shell import shell
+
+ROOT_DISK_MODES = ("overlay", "reflink")
+PREALLOCATION_MODES = {
+    "raw": ("off", "falloc", "full"),
+    "qcow2": ("off", "metadata", "falloc", "full"),
+}
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _qcow2_options(conf):
+    options = []
+    if "cluster_size" in conf:
+        options.append(f"cluster_size={conf['cluster_size']}")
+    if conf.get("lazy_refcounts"):
+        options.append("lazy_refcounts=on")
+    return options
+
+
+def _check_keys(conf, allowed, what):
+    unknown = set(conf) - set(allowed)
+    if unknown:
+        raise ValueError(f"{what}: unsupported options {sorted(unknown)}")
+
+
+class RootDisk:
+    """The qcow2 root disk of a VM, made from a pre-built image"""
+
+    def __init__(self, images_dir, vm_name, image, conf=None):
+        conf = conf or {}
+        _check_keys(conf, ("mode", "cluster_size", "lazy_refcounts", "comment"), f"root disk of {vm_name}")
+        self.mode = conf.get("mode", "overlay")
+        if self.mode not in ROOT_DISK_MODES:
+            raise ValueError(f"root disk of {vm_name}: unknown mode {self.mode}, expected one of {ROOT_DISK_MODES}")
+        self.path = os.path.join(images_dir, f"{vm_name}-root.qcow2")
+        self.format = "qcow2"
+        self.image = image
+        self._options = _qcow2_options(conf)
+
+    def create(self):
+        if self.mode == "reflink" and self._reflink():
+            LOGGER.info(f"Created {os.path.basename(self.path)} as a reflink of {os.path.basename(self.image)}")
+            return
+        args = ["qemu-img", "create", "-q", "-f", "qcow2", "-b", self.image, "-F", "qcow2"]
+        if self._options:
+            args += ["-o", ",".join(self._options)]
+        shell(args + [self.path])
+        LOGGER.info(f"Created {os.path.basename(self.path)} over {os.path.basename(self.image)}")
+
+    def _reflink(self):
+        try:
+            shell(["cp", "--reflink=always", self.image, self.path])
+        except ShellError as e:
+            LOGGER.info(f"Can't reflink {self.image}, creating an overlay instead: {e.err.strip()}")
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            return False
+        # the copy lives in another directory, relative backing file
+        # references of the image wouldn't resolve from there
+        info = json.loads(shell(["qemu-img", "info", "--output=json", self.image]))
+        if "full-backing-filename" in info:
+            backing_format = info.get("backing-filename-format", "qcow2")
+            shell(["qemu-img", "rebase", "-u", "-b", info["full-backing-filename"], "-F", backing_format, self.path])
+        return True
+
+
+class EmptyDisk:
+    """An additional empty disk of a VM"""
+
+    def __init__(self, images_dir, vm_name, dev, conf):
+        what = f"disk {dev} of {vm_name}"
+        self.format = conf.get("format", "raw")
+        if self.format not in PREALLOCATION_MODES:
+            raise ValueError(f"{what}: unknown format {self.format}, expected one of {tuple(PREALLOCATION_MODES)}")
+        allowed = ["template", "size", "format", "preallocation", "comment"]
+        if self.format == "qcow2":
+            allowed += ["cluster_size", "lazy_refcounts"]
+        _check_keys(conf, allowed, what)
+        self.size = conf["size"]
+        self.path = os.path.join(images_dir, f"{vm_name}-{dev}.{self.format}")
+        self._options = _qcow2_options(conf) if self.format == "qcow2" else []
+        preallocation = conf.get("preallocation")
+        if preallocation is not None:
+            if preallocation not in PREALLOCATION_MODES[self.format]:
+                raise ValueError(
+                    f"{what}: unknown preallocation {preallocation}, "
+                    f"expected one of {PREALLOCATION_MODES[self.format]}"
+                )
+            self._options.append(f"preallocation={preallocation}")
+
+    def create(self):
+        args = ["qemu-img", "create", "-q", "-f", self.format]
+        if self._options:
+            args += ["-o", ",".join(self._options)]
+        shell(args + [self.path, self.size])
+        LOGGER.info(f"Created {os.path.basename(self.path)} ({self.size})")
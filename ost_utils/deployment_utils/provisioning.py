@@ -0,0 +1,462 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Creates the libvirt networks, disks and VMs of a suite.
+
+The suite's ost.json is parsed once and turned into a graph of steps:
+networks and disks don't depend on anything, each VM depends on the
+networks its NICs are attached to and on its own disks. Steps whose
+dependencies are done run concurrently. The ansible inventory is written
+to the deployment dir, and a summary with the allocated subnets and the
+timings of all the steps to provisioning.json next to it.
+
+Needs OST_REPO_ROOT, OST_DEPLOYMENT, OST_IMAGES_SSH_KEY and the
+OST_IMAGES_* variables the VMs' root_disk_var refer to in the environment,
+and is meant to run from lagofy.sh's ost_init under the ost lock:
+
+usage: python3 -m ost_utils.deployment_utils.provisioning [-4|-6] suite uuid
+"""
+
+import concurrent.futures
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+from ost_utils.deployment_utils import disks
+from ost_utils.shell import ShellError
+from ost_utils.shell import shell
+
+MIN_SUBNET = 200
+MAX_SUBNET = 254
+MAX_WORKERS = 8
+RESULT_FILE = "provisioning.json"
+DEFAULT_VCPU_NUM = 4
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ProvisioningError(Exception):
+    pass
+
+
+class Step:
+    """A unit of provisioning work, run once all of its dependencies are"""
+
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = set(depends_on)
+        self.start = None
+        self.duration = None
+
+    def __repr__(self):
+        return f"< {self.__class__.__name__} | name: {self.name}, depends_on: {sorted(self.depends_on)} >"
+
+    def run(self):
+        self.start = time.monotonic()
+        try:
+            self.func()
+        finally:
+            self.duration = time.monotonic() - self.start
+
+
+def run_steps(steps, max_workers=MAX_WORKERS):
+    """Runs the steps in dependency order, independent ones concurrently.
+    Once a step fails, no new steps are started and ProvisioningError is
+    raised when the running ones are done."""
+    steps_by_name = {step.name: step for step in steps}
+    for step in steps:
+        unknown = step.depends_on - steps_by_name.keys()
+        if unknown:
+            raise ProvisioningError(f"{step.name} depends on unknown steps {sorted(unknown)}")
+
+    pending = dict(steps_by_name)
+    done = set()
+    failures = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while pending or running:
+            if not failures:
+                for name in [name for name, step in pending.items() if step.depends_on <= done]:
+                    running[executor.submit(pending.pop(name).run)] = name
+            if not running:
+                if failures:
+                    break
+                raise ProvisioningError(f"Dependency cycle between {sorted(pending)}")
+            finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    future.result()
+                    done.add(name)
+                except Exception as e:  # pylint: disable=broad-except
+                    failures.append((name, e))
+    if failures:
+        raise ProvisioningError("\n".join(f"{name} failed: {e}" for name, e in failures))
+
+
+def load_config(path):
+    """Parses ost.json, which may contain comment lines starting with #"""
+    with open(path, encoding="utf-8") as config_file:
+        return json.loads("".join(line for line in config_file if not line.startswith("#")))
+
+
+def deploy_script_entries(vm_name, entries):
+    """(script, after) of the deploy-scripts of a VM.
+
+    An entry is either the path of a script, which runs after all the
+    scripts listed before it, or {"script": path, "after": [paths]} for
+    a script that only has to run after the listed ones, which have to
+    be listed before it. after is None for the former.
+    """
+    result = []
+    seen = set()
+    for entry in entries:
+        if isinstance(entry, str):
+            script, after = entry, None
+        else:
+            script, after = entry["script"], entry.get("after")
+            for dependency in after or ():
+                if dependency not in seen:
+                    raise ProvisioningError(
+                        f"VM {vm_name}: deploy script {script} runs after {dependency}, "
+                        "which is not listed before it"
+                    )
+        seen.add(script)
+        result.append((script, after))
+    return result
+
+
+def render(template, **values):
+    """Replaces the @NAME@ placeholders of a template file, the ones
+    without a value are removed"""
+    with open(template, encoding="utf-8") as template_file:
+        contents = template_file.read()
+    return re.sub(r"@([A-Z0-9_]+)@", lambda match: str(values.get(match.group(1), "")), contents)
+
+
+def render_inline(template, **values):
+    # NICs and disks are embedded in the VM XML
+    return render(template, **values).replace("\t", "").replace("\n", "")
+
+
+def virsh_create(command, xml):
+    process = subprocess.run(
+        ["virsh", command, "/dev/stdin"],
+        input=xml.encode("utf-8"),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=False,
+    )
+    if process.returncode:
+        out = process.stdout.decode("utf-8")
+        err = process.stderr.decode("utf-8")
+        raise ShellError(process.returncode, out, f"{err}\nXML:\n{xml}")
+
+
+def _check_readable(path, what):
+    if not os.access(path, os.R_OK):
+        raise ProvisioningError(f"{what}: {path} does not exist")
+
+
+class Network:
+    def __init__(self, role, conf):
+        self.role = role
+        self.template = conf["template"]
+        self.nics = conf.get("nics", [])
+        self.is_management = bool(conf.get("is_management"))
+        self.subnet = None
+        self.libvirt_name = None
+
+
+class Provisioner:
+    """Turns the ost.json of a suite into provisioning steps and runs them"""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, repo_root, deployment_path, suite, uuid, ip_version=None, max_workers=MAX_WORKERS):
+        # pylint: disable=too-many-arguments
+        self._repo_root = repo_root
+        self._deployment_path = deployment_path
+        self._suite = suite
+        self._uuid = uuid
+        self._ipv4_only = ip_version == 4
+        self._ipv6_only = ip_version == 6
+        self._max_workers = max_workers
+        self._config = load_config(os.path.join(repo_root, suite, "ost.json"))
+        self._networks = []
+        self._nics = {}
+        self._ansible_hosts = {}
+        self._steps = []
+
+    @property
+    def management_network(self):
+        return next(network for network in self._networks if network.is_management)
+
+    def plan(self):
+        """Validates the configuration and renders all the XMLs"""
+        self._plan_networks()
+        for vm_name in sorted(self._config["vms"]):
+            self._plan_vm(vm_name, self._config["vms"][vm_name])
+        return self._steps
+
+    def run(self):
+        start = time.monotonic()
+        steps = self.plan()
+        try:
+            run_steps(steps, self._max_workers)
+        finally:
+            self._save_result(steps, time.monotonic() - start)
+        self._write_ansible_hosts()
+        self._report(steps, time.monotonic() - start)
+
+    def _plan_networks(self):
+        # management goes last so that its DNS gets the entries of all NICs
+        for role, conf in sorted(
+            self._config["networks"].items(), key=lambda item: bool(item[1].get("is_management"))
+        ):
+            self._networks.append(Network(role, conf))
+        if not any(network.is_management for network in self._networks):
+            raise ProvisioningError("no management network defined")
+
+        for network, subnet in zip(self._networks, self._free_subnets(len(self._networks))):
+            network.subnet = subnet
+            network.libvirt_name = f"ost{self._uuid}-{subnet}"
+
+        dns_entries = ""
+        for network in self._networks:
+            template = os.path.join(self._repo_root, network.template)
+            if self._ipv4_only:
+                template += ".ipv4"
+            if self._ipv6_only:
+                template += ".ipv6"
+            _check_readable(template, f"net {network.role}: template")
+
+            ipv4_hosts = ""
+            ipv6_hosts = ""
+            subnet_hex = f"{network.subnet:x}"
+            for host_idx, nic_name in enumerate(network.nics, start=2):
+                idx = f"{host_idx:02d}"
+                hostname = f"ost-{self._suite}-{nic_name}"
+                ipv4_ip = f"192.168.{network.subnet}.{host_idx}"
+                ipv6_ip = f"fd8f:1391:3a82:{network.subnet}::c0a8:{subnet_hex}{idx}"
+                if not self._ipv6_only:
+                    dns_entries += f"<host ip='{ipv4_ip}'><hostname>{hostname}</hostname></host>"
+                if not self._ipv4_only:
+                    dns_entries += f"<host ip='{ipv6_ip}'><hostname>{hostname}</hostname></host>"
+                ipv4_hosts += f"<host mac='54:52:c0:a8:{subnet_hex}:{idx}' name='{hostname}' ip='{ipv4_ip}'/>"
+                ipv6_hosts += f"<host id='0:3:0:1:54:52:c0:a8:{subnet_hex}:{idx}' name='{hostname}' ip='{ipv6_ip}'/>"
+                self._nics[nic_name] = {
+                    "network": network,
+                    "idx": idx,
+                    "ip": ipv4_ip if self._ipv4_only else ipv6_ip,
+                }
+
+            if network.is_management:
+                dns = f"<dns forwardPlainNames='no'>{dns_entries}</dns>"
+            else:
+                dns = "<dns enable='no'/>"
+            xml = render(
+                template,
+                OST_DEPLOYMENT=self._deployment_path,
+                NET_NAME=network.libvirt_name,
+                NET_ROLE=network.role,
+                SUBNET=network.subnet,
+                SUBNETHEX=subnet_hex,
+                DNS=dns,
+                IPV4=ipv4_hosts,
+                IPV6=ipv6_hosts,
+            )
+            self._steps.append(Step(f"network {network.role}", self._create_network(network, xml)))
+
+    def _free_subnets(self, count):
+        used = {
+            name.split("-")[1]
+            for name in shell("virsh net-list --name".split()).splitlines()
+            if name.startswith("ost")
+        }
+        free = [subnet for subnet in range(MIN_SUBNET, MAX_SUBNET + 1) if str(subnet) not in used]
+        if len(free) < count:
+            raise ProvisioningError("no available subnet")
+        return free[:count]
+
+    def _create_network(self, network, xml):
+        def create():
+            virsh_create("net-create", xml)
+            LOGGER.info(f"Created network {network.role}, subnet {network.subnet}")
+
+        return create
+
+    def _plan_vm(self, vm_name, conf):
+        vm_template = os.path.join(self._repo_root, conf["template"])
+        _check_readable(vm_template, f"VM {vm_name}: template")
+
+        nics = ""
+        networks = set()
+        ansible_ip = None
+        for nic_name in sorted(conf["nics"]):
+            nic_template = os.path.join(self._repo_root, conf["nics"][nic_name]["template"])
+            _check_readable(nic_template, f"NIC {nic_name}: template")
+            if nic_name not in self._nics:
+                raise ProvisioningError(f"NIC {nic_name} not found in the NICs of the networks")
+            nic = self._nics[nic_name]
+            network = nic["network"]
+            networks.add(f"network {network.role}")
+            if network.is_management:
+                ansible_ip = nic["ip"]
+            nics += render_inline(
+                nic_template,
+                NET_NAME=network.libvirt_name,
+                SUBNET=network.subnet,
+                SUBNETHEX=f"{network.subnet:x}",
+                IDXHEX=nic["idx"],
+            )
+
+        deploy_scripts = "".join(
+            f'<script name="{script}"/>' if after is None else f'<script name="{script}" after="{" ".join(after)}"/>'
+            for script, after in deploy_script_entries(vm_name, conf.get("deploy-scripts", []))
+        )
+
+        images_dir = os.path.join(self._deployment_path, "images")
+        root_disk_var = conf["root_disk_var"]
+        image = os.environ.get(root_disk_var, "")
+        _check_readable(image, f"VM {vm_name}: root disk {root_disk_var}")
+        try:
+            root_disk = disks.RootDisk(images_dir, vm_name, image, conf.get("root_disk"))
+        except ValueError as e:
+            raise ProvisioningError(e) from e
+        disk_steps = [Step(f"disk {vm_name} root", self._create_root_disk(root_disk))]
+
+        disks_xml = ""
+        for disk_serial, disk_dev in enumerate(sorted(conf.get("disks", {})), start=2):
+            disk_conf = conf["disks"][disk_dev]
+            disk_template = os.path.join(self._repo_root, disk_conf["template"])
+            _check_readable(disk_template, f"VM {vm_name} disk {disk_dev}: template")
+            try:
+                disk = disks.EmptyDisk(images_dir, vm_name, disk_dev, disk_conf)
+            except ValueError as e:
+                raise ProvisioningError(e) from e
+            disk_steps.append(Step(f"disk {vm_name} {disk_dev}", disk.create))
+            disks_xml += render_inline(
+                disk_template,
+                DISK_FILE=disk.path,
+                DISK_FORMAT=disk.format,
+                DISK_DEV=disk_dev,
+                DISK_SERIAL=disk_serial,
+            )
+
+        memsize = int(conf["memory"])
+        vcpu_num = int(conf.get("vcpu_num", DEFAULT_VCPU_NUM))
+        vm_xml = render(
+            vm_template,
+            OST_DEPLOYMENT=self._deployment_path,
+            VM_FULLNAME=f"{self._uuid}-ost-{self._suite}-{vm_name}",
+            DEPLOY_SCRIPTS=deploy_scripts,
+            MEMSIZE=memsize,
+            MEMSIZE_NUMA=memsize // 2,
+            VCPU_NUM=vcpu_num,
+            # distribute the vCPUs between the two NUMA cells
+            CELL_0_VCPUS=f"0-{vcpu_num // 2 - 1}",
+            CELL_1_VCPUS=f"{vcpu_num // 2}-{vcpu_num - 1}",
+            SERIALLOG=os.path.join(self._deployment_path, "logs", vm_name),
+            OST_ROOTDISK=root_disk.path,
+            DISKS=disks_xml,
+            NICS=nics,
+        )
+        self._steps.extend(disk_steps)
+        self._steps.append(
+            Step(
+                f"vm {vm_name}",
+                self._create_vm(vm_name, vm_xml),
+                depends_on=networks | {step.name for step in disk_steps},
+            )
+        )
+
+        ssh_key = os.environ.get("OST_IMAGES_SSH_KEY")
+        self._ansible_hosts[vm_name] = (
+            f"ost-{self._suite}-{vm_name} ansible_host={ansible_ip} ansible_ssh_private_key_file={ssh_key} "
+            "ansible_ssh_extra_args='-o UserKnownHostsFile=/dev/null'"
+        )
+
+    def _create_root_disk(self, root_disk):
+        def create():
+            root_disk.create()
+            # export package list
+            pkglist = re.sub(r"(\.qcow2)?$", "-pkglist.txt", root_disk.image, count=1)
+            if os.access(pkglist, os.R_OK):
+                shutil.copy(pkglist, os.path.join(self._repo_root, "exported-artifacts", "package_lists"))
+
+        return create
+
+    def _create_vm(self, vm_name, xml):
+        def create():
+            virsh_create("create", xml)
+            LOGGER.info(f"Created VM {vm_name}")
+
+        return create
+
+    def _write_ansible_hosts(self):
+        with open(os.path.join(self._deployment_path, "hosts"), "w", encoding="utf-8") as hosts_file:
+            hosts_file.write("".join(f"{line}\n" for _, line in sorted(self._ansible_hosts.items())) + "\n")
+
+    def _save_result(self, steps, wall_time):
+        starts = [step.start for step in steps if step.start is not None]
+        origin = min(starts) if starts else 0
+        result = {
+            "uuid": self._uuid,
+            "subnets": {network.role: network.subnet for network in self._networks},
+            "management_subnet": self.management_network.subnet,
+            "wall_time": wall_time,
+            "steps": [
+                {
+                    "name": step.name,
+                    "depends_on": sorted(step.depends_on),
+                    "start": None if step.start is None else step.start - origin,
+                    "duration": step.duration,
+                }
+                for step in steps
+            ],
+        }
+        with open(os.path.join(self._deployment_path, RESULT_FILE), "w", encoding="utf-8") as result_file:
+            json.dump(result, result_file, indent=2)
+
+    def _report(self, steps, wall_time):
+        origin = min(step.start for step in steps)
+        LOGGER.info("Provisioning steps:")
+        for step in sorted(steps, key=lambda step: step.start):
+            LOGGER.info(f"  {step.name:<40} start {step.start - origin:6.2f}s  took {step.duration:6.2f}s")
+        total = sum(step.duration for step in steps)
+        LOGGER.info(f"Provisioned in {wall_time:.2f}s, {total:.2f}s of steps")
+
+
+def main(argv):
+    ip_version = None
+    if argv and argv[0] in ("-4", "-6"):
+        ip_version = int(argv.pop(0)[1])
+    if len(argv) != 2:
+        print(
+            f"usage: {os.path.basename(sys.executable)} -m ost_utils.deployment_utils.provisioning [-4|-6] suite uuid"
+        )
+        return 2
+    suite, uuid = argv
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    provisioner = Provisioner(os.environ["OST_REPO_ROOT"], os.environ["OST_DEPLOYMENT"], suite, uuid, ip_version)
+    try:
+        provisioner.run()
+    except (ProvisioningError, ShellError) as e:
+        LOGGER.error(f"Provisioning failed:\n{e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
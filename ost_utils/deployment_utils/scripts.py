@@ -0,0 +1,264 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Runs the deploy scripts of the VMs of a deployment.
+
+All the scripts of all the VMs are uploaded over ssh right away, so that
+the upload of a script overlaps with the execution of the ones before it.
+A script runs as soon as it's uploaded and the scripts it depends on have
+finished: by default all the scripts listed before it on its VM, or only
+the ones in its "after" list in ost.json (see
+provisioning.deploy_script_entries). Scripts of different VMs are
+independent.
+
+The output of the scripts is logged line by line as it comes and saved to
+<artifacts>/deploy_scripts/<host>/<script>.log. When they're done a
+Gantt-style chart of the uploads and runs of every VM is logged and the
+timings are written to <artifacts>/deploy_scripts/timing.json.
+"""
+
+import collections
+import concurrent.futures
+import json
+import logging
+import os
+import posixpath
+import shlex
+import threading
+import time
+
+from ost_utils import ssh
+from ost_utils.utils import TaskSpan
+
+REMOTE_DIR = "/var/tmp/ost-deploy-scripts"
+LOGS_DIR = "deploy_scripts"
+TIMING_FILE = "timing.json"
+OUTPUT_TAIL_LINES = 50
+CHART_WIDTH = 60
+
+LOGGER = logging.getLogger(__name__)
+
+
+class DeployScriptError(Exception):
+    pass
+
+
+class _Job:
+    """One deploy script of a host"""
+
+    def __init__(self, host, script, after):
+        self.host = host
+        self.script = script
+        self.after = after
+        self.remote_path = posixpath.join(REMOTE_DIR, script)
+        self.upload = TaskSpan(f"{host} upload {script}")
+        self.run = TaskSpan(f"{host} {script}")
+        self.rc = None
+        self.tail = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+
+    @property
+    def name(self):
+        return f"[{self.host}] {os.path.basename(self.script)}"
+
+
+def _dependencies(scripts, declared):
+    """Script -> set of the scripts it runs after"""
+    dependencies = {}
+    for i, script in enumerate(scripts):
+        if script in declared:
+            dependencies[script] = set(declared[script])
+        else:
+            dependencies[script] = set(scripts[:i])
+    return dependencies
+
+
+class DeployRunner:
+    """Runs the deploy scripts of a set of hosts, see the module docstring.
+
+    hosts maps the hostnames to their (address, ssh key), scripts and
+    dependencies are the deploy_scripts() and deploy_script_dependencies()
+    of the backend.
+    """
+
+    def __init__(self, root_dir, hosts, scripts, dependencies=None, logs_dir=None):
+        self._root_dir = root_dir
+        self._hosts = hosts
+        self._logs_dir = logs_dir
+        self.jobs = []
+        dependencies = dependencies or {}
+        for host, host_scripts in scripts.items():
+            for script, after in _dependencies(host_scripts, dependencies.get(host, {})).items():
+                self.jobs.append(_Job(host, script, after))
+
+    def run(self):
+        """Runs all the scripts, raises DeployScriptError if any failed.
+
+        After a failure no more scripts are started, the running ones are
+        waited for.
+        """
+        if not self.jobs:
+            return
+        start = time.monotonic()
+        failures = []
+        finished = collections.defaultdict(set)
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=2 * len(self.jobs), thread_name_prefix="deploy"
+        ) as executor:
+            uploads = {executor.submit(self._upload, job): job for job in self.jobs}
+            pending = list(self.jobs)
+            uploaded = set()
+            running = {}
+            while uploads or running:
+                done, _ = concurrent.futures.wait(
+                    list(uploads) + list(running), return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    if future in uploads:
+                        job = uploads.pop(future)
+                        if future.exception() is None:
+                            uploaded.add(job)
+                        else:
+                            failures.append((job, future.exception()))
+                    else:
+                        job = running.pop(future)
+                        if future.exception() is None:
+                            finished[job.host].add(job.script)
+                        else:
+                            failures.append((job, future.exception()))
+                if failures:
+                    continue
+                for job in [job for job in pending if job in uploaded and job.after <= finished[job.host]]:
+                    pending.remove(job)
+                    running[executor.submit(self._run, job)] = job
+        LOGGER.info(f"Deploy scripts took {time.monotonic() - start:.0f}s")
+        LOGGER.info("Deploy scripts timing:\n" + self.chart())
+        if self._logs_dir is not None:
+            self.save_timing(os.path.join(self._logs_dir, TIMING_FILE))
+        if failures:
+            raise DeployScriptError("\n".join(f"{job.name} failed: {error}" for job, error in failures))
+
+    def _upload(self, job):
+        job.upload.start = time.time()
+        try:
+            with open(os.path.join(self._root_dir, job.script), "rb") as script_file:
+                contents = script_file.read()
+            path = shlex.quote(job.remote_path)
+            command = (
+                f"mkdir -p {shlex.quote(posixpath.dirname(job.remote_path))} && cat > {path} && chmod 0755 {path}"
+            )
+            rc, _, err = self._exec(job.host, command, data=contents)
+            if rc != 0:
+                raise DeployScriptError(f"uploading {job.script} failed: {err.decode(errors='replace').strip()}")
+        except Exception as e:
+            job.upload.error = repr(e)
+            raise
+        finally:
+            job.upload.end = time.time()
+
+    def _run(self, job):
+        threading.current_thread().name = job.name
+        job.run.start = time.time()
+        LOGGER.info(f"{job.name} Starting {job.script}")
+        log_file = None
+        if self._logs_dir is not None:
+            log_path = os.path.join(self._logs_dir, job.host, os.path.basename(job.script) + ".log")
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            log_file = open(log_path, "wb")
+        buffer = bytearray()
+
+        def on_output(chunk):
+            if log_file is not None:
+                log_file.write(chunk)
+            buffer.extend(chunk)
+            *lines, rest = buffer.split(b"\n")
+            buffer[:] = rest
+            for line in lines:
+                self._log_line(job, line)
+
+        try:
+            job.rc, _, _ = self._exec(job.host, f"{shlex.quote(job.remote_path)} 2>&1", on_stdout=on_output)
+            if buffer:
+                self._log_line(job, bytes(buffer))
+            if job.rc != 0:
+                tail = "\n".join(job.tail)
+                raise DeployScriptError(f"{job.script} exited with {job.rc}, last lines of its output:\n{tail}")
+        except Exception as e:
+            job.run.error = repr(e)
+            raise
+        finally:
+            job.run.end = time.time()
+            if log_file is not None:
+                log_file.close()
+        LOGGER.info(f"{job.name} Finished {job.script} ({job.run.duration:.0f}s)")
+
+    @staticmethod
+    def _log_line(job, line):
+        text = line.decode("utf-8", errors="replace").rstrip()
+        job.tail.append(text)
+        LOGGER.info(f"{job.name} {text}")
+
+    def _exec(self, host, command, data=None, on_stdout=None):
+        address, ssh_key = self._hosts[host]
+        channel = ssh.CONNECTION_POOL.open_session(ip_addr=address, ssh_key=ssh_key, host_name=host)
+        try:
+            channel.exec_command(command)
+            if data is not None:
+                channel.sendall(data)
+            channel.shutdown_write()
+            return ssh.drain_ssh_channel(
+                channel,
+                stdout=None,
+                stderr=None,
+                on_stdout=on_stdout,
+                collect_output=on_stdout is None,
+            )
+        finally:
+            channel.close()
+
+    def timing(self):
+        """The upload and run spans of the scripts of every host"""
+        result = collections.defaultdict(list)
+        for job in self.jobs:
+            result[job.host].append(
+                {
+                    "script": job.script,
+                    "after": sorted(job.after),
+                    "rc": job.rc,
+                    "upload": job.upload.as_dict(),
+                    "run": job.run.as_dict(),
+                }
+            )
+        return dict(result)
+
+    def save_timing(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as timing_file:
+            json.dump(self.timing(), timing_file, indent=2)
+
+    def chart(self, width=CHART_WIDTH):
+        """Gantt-style chart, one line per upload (-) and run (#) of every
+        host on a common time axis"""
+        spans = [span for job in self.jobs for span in (job.upload, job.run) if span.start is not None]
+        if not spans:
+            return ""
+        origin = min(span.start for span in spans)
+        total = max((span.end or span.start) - origin for span in spans) or 1
+        label_width = max(len(f"{job.host} {os.path.basename(job.script)}") for job in self.jobs)
+        lines = [f"{'':<{label_width}}  {'0s':<{width // 2}}{f'{total:.0f}s':>{width - width // 2}}"]
+        for host in sorted({job.host for job in self.jobs}):
+            for job in [job for job in self.jobs if job.host == host]:
+                bar = [" "] * width
+                for span, mark in ((job.upload, "-"), (job.run, "#")):
+                    if span.start is None:
+                        continue
+                    first = int((span.start - origin) / total * (width - 1))
+                    last = int(((span.end or span.start) - origin) / total * (width - 1))
+                    for i in range(first, last + 1):
+                        bar[i] = mark
+                duration = f"{job.run.duration:.0f}s" if job.run.duration is not None else job.run.status
+                label = f"{job.host} {os.path.basename(job.script)}"
+                lines.append(f"{label:<{label_width}} |{''.join(bar)}| {duration}")
+        return "\n".join(lines)
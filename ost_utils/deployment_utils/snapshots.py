@@ -0,0 +1,336 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Snapshots of a running deployment that it can be restored to.
+
+A snapshot is a libvirt external snapshot of all the VMs of the deployment,
+the memory of each of them and all their disks, the storage VM's ones
+included. The VMs are paused together for it, so that they're captured in
+a consistent state, and resumed afterwards. The disk files in use until
+then become read-only and the VMs go on writing into new qcow2 overlays;
+restoring recreates those overlays empty and loads the saved memory, which
+takes seconds instead of the half an hour of provisioning, deploy scripts
+and engine-setup.
+
+Snapshots are kept in the deployment directory and removed with it:
+
+    <deployment>/snapshots/<name>/snapshot.json    the VMs and their disks
+    <deployment>/snapshots/<name>/<vm>.mem         the memory of a VM
+    <deployment>/images/<vm>-<dev>.<name>.qcow2    the overlay of a disk
+
+The disks of a snapshot are the base of the ones of all the snapshots taken
+after it, which restoring it invalidates, so they're removed. The memory
+files are about as big as the memory the guests use.
+
+Needs OST_DEPLOYMENT in the environment:
+
+usage: python3 -m ost_utils.deployment_utils.snapshots take [name]
+       python3 -m ost_utils.deployment_utils.snapshots restore [name]
+       python3 -m ost_utils.deployment_utils.snapshots list
+
+take names the snapshot by the current time by default, restore restores
+the latest one by default. Running pytest with --snapshot-after MODULE
+takes a snapshot named after the test module when all of its tests passed.
+"""
+
+import datetime
+import functools
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+
+from ost_utils import utils
+from ost_utils.backend.virsh import VirshBackend
+from ost_utils.backend.virsh.topology import Topology
+from ost_utils.deployment_utils import is_deployed
+from ost_utils.deployment_utils import mark_as_deployed
+from ost_utils.shell import ShellError
+from ost_utils.shell import shell
+
+SNAPSHOTS_DIR = "snapshots"
+SNAPSHOT_FILE = "snapshot.json"
+NAME_PATTERN = re.compile(r"[\w.-]+")
+# saving or loading the memory of a big VM can take a while
+TIMEOUT = 900
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _snapshots_dir(deployment_path):
+    return os.path.join(deployment_path, SNAPSHOTS_DIR)
+
+
+def _virsh(*args):
+    return shell(["virsh", *args])
+
+
+def _disks(domain_xml):
+    """dev -> (file, format) of the disks of a domain that can be snapshotted,
+    and the devs of the ones that can't"""
+    disks = {}
+    skipped = []
+    for disk in domain_xml.findall("./devices/disk[@device='disk']"):
+        dev = disk.find("./target").get("dev")
+        source = disk.find("./source")
+        if (
+            disk.get("type") != "file"
+            or source is None
+            or disk.find("./readonly") is not None
+            or disk.find("./shareable") is not None
+        ):
+            skipped.append(dev)
+            continue
+        driver = disk.find("./driver")
+        disks[dev] = (source.get("file"), driver.get("type", "raw") if driver is not None else "raw")
+    return disks, skipped
+
+
+def _overlay_path(disk_path, vm_name, dev, name):
+    return os.path.join(os.path.dirname(disk_path), f"{vm_name}-{dev}.{name}.qcow2")
+
+
+def load(deployment_path):
+    """The snapshots of a deployment, oldest first"""
+    snapshots = []
+    root = _snapshots_dir(deployment_path)
+    for name in os.listdir(root) if os.path.isdir(root) else []:
+        try:
+            with open(os.path.join(root, name, SNAPSHOT_FILE), encoding="utf-8") as snapshot_file:
+                snapshots.append(json.load(snapshot_file))
+        except FileNotFoundError:
+            # a snapshot that failed or is being taken
+            continue
+    return sorted(snapshots, key=lambda snapshot: snapshot["created"])
+
+
+def _topology(deployment_path):
+    topology = Topology.load(deployment_path)
+    if topology is None or not topology.is_current():
+        topology = VirshBackend(deployment_path).topology
+    if not topology.vms:
+        raise SnapshotError(f"No running VMs of {deployment_path}")
+    return topology
+
+
+def _suspend_all(domains):
+    suspended = []
+    try:
+        for domain in domains:
+            _virsh("suspend", domain)
+            suspended.append(domain)
+    except ShellError:
+        _resume_all(suspended)
+        raise
+    return suspended
+
+
+def _resume_all(domains):
+    for domain in domains:
+        try:
+            _virsh("resume", domain)
+        except ShellError as e:
+            LOGGER.error(f"Failed to resume {domain}: {e.err.strip()}")
+
+
+def _sync_time(domain):
+    # the guests' clocks stopped when the snapshot was taken, needs the
+    # guest agent
+    try:
+        _virsh("domtime", domain, "--sync")
+    except ShellError as e:
+        LOGGER.warning(f"Could not sync the clock of {domain}, it may be behind: {e.err.strip()}")
+
+
+def _take_vm(name, vm):
+    args = [
+        "snapshot-create-as",
+        vm["domain"],
+        name,
+        "--no-metadata",
+        "--memspec",
+        f"file={vm['memory']},snapshot=external",
+    ]
+    for dev, disk in vm["disks"].items():
+        args += ["--diskspec", f"{dev},snapshot=external,driver=qcow2,file={disk['overlay']}"]
+    for dev in vm["skipped"]:
+        args += ["--diskspec", f"{dev},snapshot=no"]
+    _virsh(*args)
+    LOGGER.info(f"Snapshot {name} of {vm['domain']} taken")
+
+
+def take(deployment_path, name=None):
+    """Takes a snapshot of all the VMs of the deployment, returns its
+    description"""
+    name = name or datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    if not NAME_PATTERN.fullmatch(name):
+        raise SnapshotError(f"Invalid snapshot name {name!r}, only letters, digits, '.', '_' and '-' are allowed")
+    snapshot_dir = os.path.join(_snapshots_dir(deployment_path), name)
+    if os.path.exists(snapshot_dir):
+        raise SnapshotError(f"Snapshot {name} already exists")
+
+    topology = _topology(deployment_path)
+    vms = {}
+    for vm_name, vm_info in sorted(topology.vms.items()):
+        domain = vm_info["libvirt_name"]
+        disks, skipped = _disks(ET.fromstring(_virsh("dumpxml", domain)))
+        if skipped:
+            LOGGER.warning(f"Disks {', '.join(skipped)} of {domain} can't be snapshotted, leaving them out")
+        vms[vm_name] = {
+            "domain": domain,
+            "memory": os.path.join(snapshot_dir, f"{vm_name}.mem"),
+            "disks": {
+                dev: {"base": path, "format": disk_format, "overlay": _overlay_path(path, vm_name, dev, name)}
+                for dev, (path, disk_format) in disks.items()
+            },
+            "skipped": skipped,
+        }
+
+    os.makedirs(snapshot_dir)
+    start = datetime.datetime.now()
+    suspended = _suspend_all([vm["domain"] for vm in vms.values()])
+    try:
+        utils.TaskGroup(
+            [functools.partial(_take_vm, name, vm) for vm in vms.values()],
+            timeout=TIMEOUT,
+            names=[vm["domain"] for vm in vms.values()],
+        ).start().join()
+    except Exception as e:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        raise SnapshotError(f"Taking snapshot {name} failed: {e}") from e
+    finally:
+        _resume_all(suspended)
+
+    snapshot = {
+        "name": name,
+        "created": start.isoformat(),
+        "deployment_id": topology.deployment_id,
+        "deployed": is_deployed(deployment_path),
+        "vms": vms,
+    }
+    with open(os.path.join(snapshot_dir, SNAPSHOT_FILE), "w", encoding="utf-8") as snapshot_file:
+        json.dump(snapshot, snapshot_file, indent=2)
+    LOGGER.info(f"Snapshot {name} taken in {(datetime.datetime.now() - start).total_seconds():.0f}s")
+    return snapshot
+
+
+def _restore_xml(vm):
+    """The domain XML of the saved memory, with the disks pointing to the
+    overlays"""
+    domain_xml = ET.fromstring(_virsh("save-image-dumpxml", "--security-info", vm["memory"]))
+    for disk in domain_xml.findall("./devices/disk[@device='disk']"):
+        snapshotted = vm["disks"].get(disk.find("./target").get("dev"))
+        if snapshotted is None:
+            continue
+        disk.find("./source").set("file", snapshotted["overlay"])
+        driver = disk.find("./driver")
+        if driver is not None:
+            driver.set("type", "qcow2")
+        backing_store = disk.find("./backingStore")
+        if backing_store is not None:
+            disk.remove(backing_store)
+    return ET.tostring(domain_xml, encoding="unicode")
+
+
+def _restore_vm(vm):
+    for disk in vm["disks"].values():
+        if os.path.exists(disk["overlay"]):
+            os.unlink(disk["overlay"])
+        shell(["qemu-img", "create", "-q", "-f", "qcow2", "-b", disk["base"], "-F", disk["format"], disk["overlay"]])
+    with tempfile.NamedTemporaryFile("w", suffix=".xml", encoding="utf-8") as xml_file:
+        xml_file.write(_restore_xml(vm))
+        xml_file.flush()
+        _virsh("restore", vm["memory"], "--xml", xml_file.name, "--paused")
+    LOGGER.info(f"{vm['domain']} restored")
+
+
+def _remove(snapshot, deployment_path):
+    for vm in snapshot["vms"].values():
+        for disk in vm["disks"].values():
+            if os.path.exists(disk["overlay"]):
+                os.unlink(disk["overlay"])
+    shutil.rmtree(os.path.join(_snapshots_dir(deployment_path), snapshot["name"]), ignore_errors=True)
+    LOGGER.info(f"Removed snapshot {snapshot['name']}")
+
+
+def restore(deployment_path, name=None):
+    """Restores the VMs of the deployment to a snapshot, the latest one by
+    default, and removes the snapshots taken after it"""
+    snapshots = load(deployment_path)
+    if not snapshots:
+        raise SnapshotError(f"No snapshots of {deployment_path}")
+    names = [snapshot["name"] for snapshot in snapshots]
+    name = name or names[-1]
+    if name not in names:
+        raise SnapshotError(f"No snapshot {name}, there are: {', '.join(names)}")
+    snapshot = snapshots[names.index(name)]
+
+    start = datetime.datetime.now()
+    domains = [vm["domain"] for vm in snapshot["vms"].values()]
+    running = set(_virsh("list", "--name").split())
+    for domain in domains:
+        if domain in running:
+            _virsh("destroy", domain)
+    for later in snapshots[names.index(name) + 1 :]:
+        _remove(later, deployment_path)
+
+    try:
+        utils.TaskGroup(
+            [functools.partial(_restore_vm, vm) for vm in snapshot["vms"].values()],
+            timeout=TIMEOUT,
+            fail_fast=False,
+            names=domains,
+        ).start().join()
+    except Exception as e:
+        raise SnapshotError(f"Restoring snapshot {name} failed: {e}") from e
+    finally:
+        restored = set(_virsh("list", "--name").split())
+        _resume_all([domain for domain in domains if domain in restored])
+    for domain in domains:
+        _sync_time(domain)
+
+    if snapshot["deployed"] and not is_deployed(deployment_path):
+        mark_as_deployed(deployment_path)
+    LOGGER.info(f"Restored snapshot {name} in {(datetime.datetime.now() - start).total_seconds():.0f}s")
+    return snapshot
+
+
+def main(argv):
+    commands = ("take", "restore", "list")
+    if not argv or argv[0] not in commands or len(argv) > (1 if argv[0] == "list" else 2):
+        print(
+            f"usage: {os.path.basename(sys.executable)} -m ost_utils.deployment_utils.snapshots "
+            f"take [name] | restore [name] | list"
+        )
+        return 2
+    command, name = argv[0], argv[1] if len(argv) > 1 else None
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    deployment_path = os.environ["OST_DEPLOYMENT"]
+    try:
+        if command == "take":
+            take(deployment_path, name)
+        elif command == "restore":
+            restore(deployment_path, name)
+        else:
+            for snapshot in load(deployment_path):
+                print(f"{snapshot['name']}  {snapshot['created']}  {', '.join(sorted(snapshot['vms']))}")
+    except (SnapshotError, ShellError, OSError) as e:
+        LOGGER.error(f"Snapshot {command} failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
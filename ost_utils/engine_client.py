@@ -0,0 +1,173 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Connections to the engine API for SDK calls made from several threads.
+
+ovirtsdk4.Connection holds a lock while it sends a request and waits for
+its response, so threads sharing one connection wait for each other. An
+EngineConnectionPool logs in once and lends connections that share the SSO
+token of the first one, each used by one thread at a time. 'gather' and
+'map' make independent SDK calls concurrently, each call getting its own
+connection as the first argument:
+
+    pool.gather(cold_storage_migration, snapshot_cold_merge)
+    pool.map(lambda api, name: test_utils.get_vm_service(api.system_service(), name).start(), vm_names)
+
+The requests and responses, bodies included, can be logged: every one of
+them with LOG_FULL, one in SAMPLE_INTERVAL with LOG_SAMPLED, each line cut
+to MAX_LINE_LENGTH characters. The SDK's debug mode disables compression
+of the responses, so nothing is logged by default.
+"""
+
+import contextlib
+import functools
+import itertools
+import logging
+import queue
+import re
+import threading
+
+import ovirtsdk4 as sdk4
+
+from ost_utils import utils
+from ost_utils.ovirtlib import eventtail
+
+LOGGER = logging.getLogger(__name__)
+HTTP_LOGGER = LOGGER.getChild('http')
+
+LOG_OFF = 'off'
+LOG_SAMPLED = 'sampled'
+LOG_FULL = 'full'
+LOG_MODES = (LOG_OFF, LOG_SAMPLED, LOG_FULL)
+
+POOL_SIZE = utils.PARALLEL_WORKERS
+SAMPLE_INTERVAL = 10
+MAX_LINE_LENGTH = 1024
+
+# the first line the SDK logs for a request
+_REQUEST_LINE = re.compile(r'> (GET|POST|PUT|DELETE|HEAD) (\S+)')
+
+
+class BodyLog:
+    """Logger for the debug mode of one connection. Logs the lines of every
+    sample_interval-th request and of its response, counted by the counter
+    shared by the connections of a pool, each cut to max_line_length"""
+
+    def __init__(self, logger, counter, sample_interval=1, max_line_length=MAX_LINE_LENGTH):
+        self._logger = logger
+        self._counter = counter
+        self._sample_interval = sample_interval
+        self._max_line_length = max_line_length
+        self._logging = False
+
+    def debug(self, line):
+        request = _REQUEST_LINE.match(line)
+        if request is not None:
+            # SSO requests have the password in their body
+            self._logging = '/sso/' not in request.group(2) and next(self._counter) % self._sample_interval == 0
+        if not self._logging:
+            return
+        if len(line) > self._max_line_length:
+            line = f'{line[:self._max_line_length]}... ({len(line) - self._max_line_length} more characters)'
+        self._logger.debug(line)
+
+
+class EngineConnectionPool:
+    """Up to 'size' connections to the engine API besides 'primary', the
+    connection shared by the tests, see the module docstring"""
+
+    def __init__(self, url, username, password, size=POOL_SIZE, log_mode=LOG_OFF, **connection_args):
+        if log_mode not in LOG_MODES:
+            raise ValueError(f'Unknown log mode {log_mode}, use one of: {", ".join(LOG_MODES)}')
+        self._connection_args = dict(url=url, username=username, password=password, insecure=True, **connection_args)
+        self._size = size
+        self._log_mode = log_mode
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        self._pooled = []
+        self.primary = self._connect()
+
+    def _connect(self, token=None):
+        # with the credentials too, the connection gets a new token by
+        # itself when the shared one expires
+        log = None
+        if self._log_mode != LOG_OFF:
+            sample_interval = SAMPLE_INTERVAL if self._log_mode == LOG_SAMPLED else 1
+            log = BodyLog(HTTP_LOGGER, self._counter, sample_interval)
+        return sdk4.Connection(token=token, debug=log is not None, log=log, **self._connection_args)
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Lends a connection that no other thread uses meanwhile, waits for
+        one to be returned when all 'size' of them are lent"""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = None
+            with self._lock:
+                if len(self._pooled) < self._size:
+                    connection = self._connect(self.primary.authenticate())
+                    self._pooled.append(connection)
+                    LOGGER.debug(f'Opened engine connection {len(self._pooled)} of {self._size}')
+            if connection is None:
+                connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def _call(self, func, *args):
+        with self.connection() as connection:
+            return func(connection, *args)
+
+    def _run(self, targets, names, timeout):
+        # like VectorThread, all the calls run to the end before the first
+        # exception is raised
+        group = utils.TaskGroup(targets, timeout=timeout, fail_fast=False, names=names).start()
+        results = group.join(raise_exceptions=False)
+        errors = [result for result, span in zip(results, group.spans) if span.error is not None]
+        if errors:
+            raise errors[0]
+        return results
+
+    def gather(self, *funcs, timeout=None):
+        """Calls the funcs concurrently, each with a connection, returns
+        their results in order"""
+        return self._run(
+            [functools.partial(self._call, func) for func in funcs],
+            [_name(func) for func in funcs],
+            timeout,
+        )
+
+    def map(self, func, items, timeout=None):
+        """Calls func(connection, item) for all the items concurrently,
+        returns the results in the order of the items"""
+        items = list(items)
+        return self._run(
+            [functools.partial(self._call, func, item) for item in items],
+            [f'{_name(func)}({item!r})' for item in items],
+            timeout,
+        )
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        with self._lock:
+            pooled, self._pooled = self._pooled, []
+        for connection in pooled:
+            eventtail.stop(connection)
+            # the token is the primary's, revoked when it's closed
+            connection.close(logout=False)
+        eventtail.stop(self.primary)
+        self.primary.close()
+
+
+def _name(func):
+    return getattr(func, '__qualname__', None) or repr(func)
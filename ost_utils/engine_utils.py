@@ -7,6 +7,7 @@
 import contextlib
 
 from ost_utils import assert_utils
+from ost_utils.ovirtlib import eventtail
 
 
 @contextlib.contextmanager
@@ -16,18 +17,16 @@ def wait_for_event(engine, event_id, timeout=assert_utils.LONG_TIMEOUT):
     event ID or a list - multiple event IDs
     that all will be checked
     '''
-    events = engine.events_service()
-    last_event = int(events.list(max=2)[0].id)
-    try:
-        yield
-    finally:
-        if isinstance(event_id, int):
-            event_id = [event_id]
-        for e_id in event_id:
-            assert assert_utils.true_within(
-                lambda: any(e.code == e_id for e in events.list(from_=last_event)),
-                timeout,
-            )
+    with eventtail.tailer(engine).subscribe() as subscription:
+        try:
+            yield
+        finally:
+            if isinstance(event_id, int):
+                event_id = [event_id]
+            for e_id in event_id:
+                assert subscription.wait_for(
+                    timeout, codes=[e_id]
+                ), f'Event {e_id} did not arrive within {timeout} seconds'
 
 
 def wait_for_event_or_expire(engine, event_id, timeout=assert_utils.LONG_TIMEOUT):
@@ -0,0 +1,126 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Name to id maps of the entities of the engine, used by the name lookups
+of test_utils.
+
+A collection is listed once, with one call, the first time a name in it is
+looked up by itself. A name mapped to a single id is then resolved by
+getting the entity by that id, which costs the engine much less than a
+search, and the id is only used when the entity still exists and still has
+the name. Names that were removed, renamed or re-created meanwhile, names
+not in the map, e.g. of VMs created after the listing, and names of more
+than one entity, like the versions of a template, are searched for like
+before, and the map is updated with what the search finds. Lookups of
+several names are one search for all of them.
+"""
+
+import logging
+import threading
+import weakref
+
+import ovirtsdk4
+
+LOGGER = logging.getLogger(__name__)
+
+# kind -> (collection service, entity service)
+COLLECTIONS = {
+    'vms': ('vms_service', 'vm_service'),
+    'templates': ('templates_service', 'template_service'),
+    'storage_domains': ('storage_domains_service', 'storage_domain_service'),
+    'clusters': ('clusters_service', 'cluster_service'),
+    'data_centers': ('data_centers_service', 'data_center_service'),
+    'disks': ('disks_service', 'disk_service'),
+    'networks': ('networks_service', 'network_service'),
+    'vm_pools': ('vm_pools_service', 'pool_service'),
+}
+
+# connection -> EntityIndex, the indexes only refer to their connection
+# weakly so that the entry goes away with the connection
+_INDEXES = weakref.WeakKeyDictionary()
+_INDEXES_LOCK = threading.Lock()
+
+
+def index(service):
+    """Returns the EntityIndex shared by all users of the engine connection
+    `service` belongs to, the ids are the ones the connection's user sees.
+
+    :param service: any ovirtsdk4 service, e.g. the system service
+    """
+    connection = service._connection  # pylint: disable=protected-access
+    with _INDEXES_LOCK:
+        if connection not in _INDEXES:
+            _INDEXES[connection] = EntityIndex(connection)
+        return _INDEXES[connection]
+
+
+class EntityIndex:
+    def __init__(self, connection):
+        self._connection = weakref.ref(connection)
+        # guards the maps only, the engine is called without holding it
+        self._lock = threading.Lock()
+        # kind -> name -> ids
+        self._ids = {}
+
+    def service(self, kind, name):
+        """The service of the entity of the kind named name, None if there's
+        none"""
+        return self.services(kind, [name])[0]
+
+    def services(self, kind, names):
+        """The services of the entities of the kind with the names, None for
+        the names there's no entity with"""
+        entity_service = getattr(self._collection(kind), COLLECTIONS[kind][1])
+        return [None if entity_id is None else entity_service(entity_id) for entity_id in self.ids(kind, names)]
+
+    def ids(self, kind, names):
+        if len(names) == 1:
+            known = self._known(kind).get(names[0], ())
+            if len(known) == 1 and self._is_named(kind, known[0], names[0]):
+                return [known[0]]
+        found = self._search(kind, sorted(set(names)))
+        return [found.get(name) for name in names]
+
+    def _collection(self, kind):
+        return getattr(self._connection().system_service(), COLLECTIONS[kind][0])()
+
+    def _known(self, kind):
+        """The name -> ids map of the kind, the collection is listed the
+        first time"""
+        with self._lock:
+            ids = self._ids.get(kind)
+        if ids is not None:
+            return ids
+        ids = {}
+        for entity in self._collection(kind).list():
+            ids.setdefault(entity.name, []).append(entity.id)
+        LOGGER.debug(f'Indexed {sum(len(e) for e in ids.values())} {kind}')
+        with self._lock:
+            # another thread may have listed it meanwhile
+            return self._ids.setdefault(kind, ids)
+
+    def _is_named(self, kind, entity_id, name):
+        try:
+            entity = getattr(self._collection(kind), COLLECTIONS[kind][1])(entity_id).get()
+        except ovirtsdk4.NotFoundError:
+            return False
+        return entity.name == name
+
+    def _search(self, kind, names):
+        """The id of the first entity the search finds for each name, the map
+        of the kind, if it's listed already, is updated with all of them"""
+        query = ' or '.join(f'name={name}' for name in names)
+        found = {}
+        for entity in self._collection(kind).list(search=query):
+            found.setdefault(entity.name, []).append(entity.id)
+        with self._lock:
+            ids = self._ids.get(kind, {})
+            for name in names:
+                if name in found:
+                    ids[name] = found[name]
+                else:
+                    ids.pop(name, None)
+        return {name: entity_ids[0] for name, entity_ids in found.items()}
@@ -10,11 +10,23 @@ import random
 import ovirtsdk4 as sdk
 from ovirtsdk4 import types
 
-from ost_utils import general_utils
+from ost_utils.ovirtlib import pollutil
 
 
 LOGGER = logging.getLogger(__name__)
 
+FLAPPING_INTERVAL = 10
+FLAPPING_TIMEOUT = 11 * FLAPPING_INTERVAL
+
+
+def events_wakeup(hosts_service):
+    """
+    Returns a wakeup for the waits for hosts to go up, that probes again as
+    soon as the engine logs an event, e.g. that a host changed its status.
+    """
+
+    return pollutil.EngineEventsWakeup(hosts_service)
+
 
 def random_up_host(hosts_service, dc_name):
     """
@@ -88,18 +100,27 @@ def wait_for_flapping_host(hosts_service, dc_name, host_id=None):
 
     hosts_up_seen = 0
 
-    for _ in general_utils.linear_retrier(attempts=12, iteration_sleeptime=10):
-        up_host_count = len(hosts_service.list(search=query))
-        LOGGER.debug(f'Query: "{query}" found {up_host_count} hosts up')
-
-        if up_host_count >= hosts_up_seen:
-            if hosts_up_seen:
-                return
-            hosts_up_seen = up_host_count
-        else:
-            if hosts_up_seen > 0:
-                LOGGER.warning('Host flapping detected!')
-            hosts_up_seen = 0
+    # 12 probes 10 seconds apart, not woken up by events since the spacing
+    # is what tells a settled host from a flapping one
+    with pollutil.Poller(
+        FLAPPING_TIMEOUT,
+        'wait_for_flapping_host',
+        backoff=pollutil.Backoff.fixed(FLAPPING_INTERVAL),
+        call_site=pollutil.caller_location(__file__),
+    ) as poller:
+        for _ in poller:
+            up_host_count = len(hosts_service.list(search=query))
+            LOGGER.debug(f'Query: "{query}" found {up_host_count} hosts up')
+
+            if up_host_count >= hosts_up_seen:
+                if hosts_up_seen:
+                    poller.succeeded()
+                    return
+                hosts_up_seen = up_host_count
+            else:
+                if hosts_up_seen > 0:
+                    LOGGER.warning('Host flapping detected!')
+                hosts_up_seen = 0
 
     raise RuntimeError('Host flapping detection failed!')
 
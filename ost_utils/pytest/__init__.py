@@ -5,9 +5,15 @@
 #
 
 import logging
+import os
+import time
 
 import pytest
 
+from ost_utils import engine_client
+from ost_utils.deployment_utils import snapshots
+from ost_utils.pytest import scheduler
+from ost_utils.pytest import timings
 
 LOGGER = logging.getLogger(__name__)
 
@@ -16,6 +22,26 @@ def pytest_addoption(parser):
     parser.addoption('--custom-repo', action='append')
     parser.addoption('--skip-custom-repos-check', action='store_true')
     parser.addoption('--vdsm-coverage', action='store_true')
+    parser.addoption(
+        '--parallel-tests',
+        type=int,
+        default=1,
+        metavar='N',
+        help='run up to N tests of a module at the same time, following their depends_on markers',
+    )
+    parser.addoption(
+        '--snapshot-after',
+        metavar='MODULE',
+        help='snapshot the VMs once all the tests of MODULE, e.g. test_002_bootstrap, passed, see '
+        'ost_utils.deployment_utils.snapshots',
+    )
+    parser.addoption(
+        '--engine-api-log',
+        choices=engine_client.LOG_MODES,
+        default=engine_client.LOG_OFF,
+        help='log the requests and responses of the engine API: all of them, a sample of them or none, see '
+        'ost_utils.engine_client',
+    )
 
 
 def pytest_collection_modifyitems(session, config, items):
@@ -42,13 +68,41 @@ def pytest_collection_modifyitems(session, config, items):
         module_items = items_by_module[module]
         if module_uses_item_ordering(module_items):
             module_items = sorted(module_items, key=get_item_ordering)
+        scheduler.check_dependencies(module_items)
         items.extend(module_items)
 
 
+def pytest_runtestloop(session):
+    workers = session.config.getoption('parallel_tests')
+    if workers <= 1 or session.testsfailed or session.config.option.collectonly:
+        return None
+    return scheduler.run(session, workers)
+
+
 @pytest.hookimpl(hookwrapper=True)
 def pytest_fixture_setup(fixturedef, request):
     LOGGER.debug(f'Creating fixture: {fixturedef}')
+    start = time.time()
+    started = time.monotonic()
+    yield
+    timings.RECORDER.fixture_set_up(fixturedef.argname, fixturedef.scope, start, time.monotonic() - started)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item, nextitem):
     yield
+    module = item.config.getoption('snapshot_after')
+    if module is None or item.module.__name__.rpartition('.')[2] != module:
+        return
+    if nextitem is not None and nextitem.module is item.module:
+        return
+    if item.session.testsfailed:
+        LOGGER.warning(f'Not taking snapshot {module}, there were failures')
+        return
+    try:
+        snapshots.take(os.environ['OST_DEPLOYMENT'], module)
+    except Exception:
+        LOGGER.exception(f'Taking snapshot {module} failed')
 
 
 def order_by(test_list):
@@ -60,3 +114,13 @@ def order_by(test_list):
             return pytest.mark.skip(reason="Not found in test list")(test_fn)
 
     return wrapper
+
+
+def depends_on(*test_names, resources=()):
+    """
+    Declares the earlier tests of the module the test needs to run after
+    and the resources, free-form tags, it can't share with a test running
+    at the same time. Only tests that declare them, even if there are none,
+    run concurrently with --parallel-tests, see ost_utils.pytest.scheduler.
+    """
+    return pytest.mark.depends_on(*test_names, resources=tuple(resources))
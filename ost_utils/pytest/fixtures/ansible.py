@@ -5,6 +5,8 @@
 # -*- coding: utf-8 -*-
 #
 
+import functools
+
 import pytest
 
 from ost_utils import ansible
@@ -12,6 +14,8 @@ from ost_utils.ansible import inventory
 from ost_utils.ansible import module_mappers
 from ost_utils.ansible import private_dir
 from ost_utils.ansible.facts import Facts
+from ost_utils.ansible.facts import FactsCache
+from ost_utils.ansible.facts import FactsRegistry
 
 from ost_utils.pytest.fixtures.artifacts import artifacts_dir
 
@@ -79,23 +83,41 @@ def ansible_by_hostname(ansible_inventory):
 
 
 @pytest.fixture(scope="session")
-def ansible_engine_facts(ansible_engine):
-    return Facts(ansible_engine)
+def ansible_facts_registry(ansible_by_hostname, working_dir, all_hostnames):
+    # facts of all the VMs are gathered in one ansible run the first time
+    # any of them is needed. Facts saved by a previous session answer the
+    # usual questions (hostname, fqdn, default addresses) without gathering
+    return FactsRegistry(
+        ansible_by_hostname,
+        all_hostnames,
+        cache_for=functools.partial(FactsCache.for_host, working_dir),
+    )
+
+
+def _facts(registry, module_mapper, working_dir, hostname):
+    if hostname in registry:
+        return registry[hostname]
+    return Facts(module_mapper, cache=FactsCache.for_host(working_dir, hostname))
+
+
+@pytest.fixture(scope="session")
+def ansible_engine_facts(ansible_facts_registry, ansible_engine, working_dir, backend_engine_hostname):
+    return _facts(ansible_facts_registry, ansible_engine, working_dir, backend_engine_hostname)
 
 
 @pytest.fixture(scope="session")
-def ansible_storage_facts(ansible_storage):
-    return Facts(ansible_storage)
+def ansible_storage_facts(ansible_facts_registry, ansible_storage, working_dir, storage_hostname):
+    return _facts(ansible_facts_registry, ansible_storage, working_dir, storage_hostname)
 
 
 @pytest.fixture(scope="session")
-def ansible_host0_facts(ansible_host0):
-    return Facts(ansible_host0)
+def ansible_host0_facts(ansible_facts_registry, ansible_host0, working_dir, host0_hostname):
+    return _facts(ansible_facts_registry, ansible_host0, working_dir, host0_hostname)
 
 
 @pytest.fixture(scope="session")
-def ansible_host1_facts(ansible_host1):
-    return Facts(ansible_host1)
+def ansible_host1_facts(ansible_facts_registry, ansible_host1, working_dir, host1_hostname):
+    return _facts(ansible_facts_registry, ansible_host1, working_dir, host1_hostname)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -106,6 +128,7 @@ def ansible_clean_private_dirs():
 
 @pytest.fixture(scope="session", autouse=True)
 def ansible_collect_logs(artifacts_dir, ansible_clean_private_dirs):
+    ansible.LogsCollector.start(artifacts_dir)
     yield
     ansible.LogsCollector.save(artifacts_dir)
 
@@ -17,6 +17,8 @@ from ost_utils.ansible import AnsibleExecutionError
 
 LOGGER = logging.getLogger(__name__)
 
+SAR_PLOT_TIMEOUT = 10 * 60
+
 
 @pytest.fixture(scope="session")
 def artifacts_dir():
@@ -56,7 +58,8 @@ def generate_sar_stat_plots(collect_artifacts, ansible_all, ansible_by_hostname,
 
     yield
     calls = [functools.partial(generate, res['stdout']) for res in ansible_all.shell("hostname").values()]
-    utils.invoke_different_funcs_in_parallel(*calls)
+    # a host that doesn't respond mustn't hold up the plots of the others
+    utils.invoke_different_funcs_in_parallel(*calls, timeout=SAR_PLOT_TIMEOUT, fail_fast=False)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -14,7 +14,7 @@ from ost_utils.backend import virsh
 
 @pytest.fixture(scope="session")
 def backend():
-    return virsh.VirshBackend(os.environ["OST_DEPLOYMENT"])
+    return virsh.load_backend(os.environ["OST_DEPLOYMENT"])
 
 
 @pytest.fixture(scope="session")
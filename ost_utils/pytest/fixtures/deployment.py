@@ -4,41 +4,35 @@
 #
 #
 
-import datetime
-import functools
 import getpass
 import ipaddress
 import logging
 import os
-import pprint
 
 import pytest
 
 from ost_utils import assert_utils
 from ost_utils import coverage
 from ost_utils import deployment_utils
-from ost_utils import utils
 from ost_utils.ansible import AnsibleExecutionError
 from ost_utils.deployment_utils import package_mgmt
+from ost_utils.deployment_utils import scripts as deploy_scripts_utils
 
 
 LOGGER = logging.getLogger(__name__)
 
 
+def _deploy_runner(root_dir, backend, management_network_name, ssh_key_file, scripts, dependencies=None):
+    ip_mapping = backend.ip_mapping()
+    hosts = {hostname: (str(ip_mapping[hostname][management_network_name][0]), ssh_key_file) for hostname in scripts}
+    logs_dir = os.path.join(root_dir, "exported-artifacts", deploy_scripts_utils.LOGS_DIR)
+    return deploy_scripts_utils.DeployRunner(root_dir, hosts, scripts, dependencies, logs_dir=logs_dir)
+
+
 @pytest.fixture(scope="session")
-def run_scripts(ansible_by_hostname, root_dir):
+def run_scripts(root_dir, backend, management_network_name, ssh_key_file):
     def do_run_scripts(hostname, scripts):
-        ansible_handle = ansible_by_hostname(hostname)
-        for script in scripts:
-            start = datetime.datetime.now()
-            LOGGER.info(f"[{hostname}] Starting {script}")
-            res = ansible_handle.script(os.path.join(root_dir, script))
-            duration = int((datetime.datetime.now() - start).total_seconds())
-            LOGGER.info(f"[{hostname}] Finished {script} ({duration}s)")
-            LOGGER.debug(
-                f"[{hostname}] Finished {script}, result:\n%s",
-                pprint.pformat(res),
-            )
+        _deploy_runner(root_dir, backend, management_network_name, ssh_key_file, {hostname: scripts}).run()
 
     return do_run_scripts
 
@@ -46,51 +40,53 @@ def run_scripts(ansible_by_hostname, root_dir):
 @pytest.fixture(scope="session")
 def set_sar_interval(ansible_all, root_dir):
     def do_set_sar_interval():
-        ansible_all.file(
-            path='/etc/systemd/system/sysstat-collect.timer.d',
-            state='directory',
-        )
         sar_stat_src_dir = os.path.join(root_dir, 'common/sar_stat')
-        ansible_all.copy(
-            src=os.path.join(sar_stat_src_dir, 'override.conf'),
-            dest='/etc/systemd/system/sysstat-collect.timer.d',
-        )
-        ansible_all.systemd(
-            daemon_reload='yes',
-            name='sysstat-collect.timer',
-            state='started',
-            enabled='yes',
-        )
+        with ansible_all.batch() as batch:
+            batch.file(
+                path='/etc/systemd/system/sysstat-collect.timer.d',
+                state='directory',
+            )
+            batch.copy(
+                src=os.path.join(sar_stat_src_dir, 'override.conf'),
+                dest='/etc/systemd/system/sysstat-collect.timer.d',
+            )
+            batch.systemd(
+                daemon_reload='yes',
+                name='sysstat-collect.timer',
+                state='started',
+                enabled='yes',
+            )
 
     return do_set_sar_interval
 
 
 def start_sshd_proxy(vms, host, root_dir, ssh_key_file):
-    vms.copy(
-        src=ssh_key_file,
-        dest='/root/.ssh/id_rsa',
-        mode='0600',
-    )
-    vms.copy(
-        src=os.path.join(root_dir, 'common/helpers/sshd_proxy.service'),
-        dest='/etc/systemd/system/sshd_proxy.service',
-    )
     user = getpass.getuser()
-    vms.copy(
-        dest='/usr/local/sbin/sshd_proxy.sh',
-        content=f'"#!/bin/bash\\nssh -D 1234 -p2222 -N -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null -i /root/.ssh/id_rsa {user}@{host}"',
-        mode='0655',
-    )
-    vms.systemd(
-        daemon_reload='yes',
-        name='sshd_proxy.service',
-        state='started',
-        enabled='yes',
-    )
-    vms.lineinfile(
-        path='/etc/dnf/dnf.conf',
-        line='"proxy=socks5://localhost:1234\\nip_resolve=4"',
-    )
+    with vms.batch() as batch:
+        batch.copy(
+            src=ssh_key_file,
+            dest='/root/.ssh/id_rsa',
+            mode='0600',
+        )
+        batch.copy(
+            src=os.path.join(root_dir, 'common/helpers/sshd_proxy.service'),
+            dest='/etc/systemd/system/sshd_proxy.service',
+        )
+        batch.copy(
+            dest='/usr/local/sbin/sshd_proxy.sh',
+            content=f'"#!/bin/bash\\nssh -D 1234 -p2222 -N -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null -i /root/.ssh/id_rsa {user}@{host}"',
+            mode='0655',
+        )
+        batch.systemd(
+            daemon_reload='yes',
+            name='sshd_proxy.service',
+            state='started',
+            enabled='yes',
+        )
+        batch.lineinfile(
+            path='/etc/dnf/dnf.conf',
+            line='"proxy=socks5://localhost:1234\\nip_resolve=4"',
+        )
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -102,7 +98,6 @@ def deploy(
     root_dir,
     working_dir,
     request,
-    run_scripts,
     set_sar_interval,
     ost_images_distro,
     ssh_key_file,
@@ -112,6 +107,10 @@ def deploy(
 ):
     if deployment_utils.is_deployed(working_dir):
         LOGGER.info("Environment already deployed")
+        # open the persistent ssh connections to all VMs in one go, so that
+        # the first module calls issued by tests don't have to
+        LOGGER.info("Warming up ansible connections")
+        ansible_all.ping()
         return
 
     def all_vms_up():
@@ -161,8 +160,14 @@ def deploy(
     package_mgmt.report_ovirt_packages_versions(ansible_all)
 
     # run deployment scripts
-    runs = [functools.partial(run_scripts, hostname, scripts) for hostname, scripts in deploy_scripts.items()]
-    utils.invoke_different_funcs_in_parallel(*runs)
+    _deploy_runner(
+        root_dir,
+        backend,
+        management_network_name,
+        ssh_key_file,
+        deploy_scripts,
+        backend.deploy_script_dependencies(),
+    ).run()
 
     # setup vdsm coverage on hosts if desired
     if request.config.getoption('--vdsm-coverage'):
@@ -9,11 +9,11 @@ import os
 import tempfile
 import time
 
-import ovirtsdk4 as sdk4
 from ovirtsdk4 import types
 import pytest
 
 from ost_utils import assert_utils
+from ost_utils import engine_client
 from ost_utils import network_utils
 from ost_utils.ansible import AnsibleExecutionError
 from ost_utils.shell import shell
@@ -119,20 +119,27 @@ def nonadmin_password():
 
 
 @pytest.fixture(scope="session")
-def engine_api(engine_full_username, engine_password, engine_api_url):
-    api = sdk4.Connection(
-        url=engine_api_url,
-        username=engine_full_username,
-        password=engine_password,
-        insecure=True,
-        debug=True,
+def engine_api_pool(request, engine_full_username, engine_password, engine_api_url):
+    pool = engine_client.EngineConnectionPool(
+        engine_api_url,
+        engine_full_username,
+        engine_password,
+        log_mode=request.config.getoption('--engine-api-log', default=engine_client.LOG_OFF),
     )
     for _ in range(20):
-        if not api.test():
+        if not pool.primary.test():
             time.sleep(1)
         else:
-            return api
-    raise RuntimeError("Test API call failed")
+            break
+    else:
+        raise RuntimeError("Test API call failed")
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="session")
+def engine_api(engine_api_pool):
+    return engine_api_pool.primary
 
 
 @pytest.fixture(scope="session")
@@ -4,23 +4,54 @@
 #
 #
 
-import json
-import time
+"""Selenium grid on the storage VM, one standalone node per browser.
+
+The nodes of all the browsers are started at once, each in its own
+container with its own port, VNC port and directory for downloads and
+videos, and waited for concurrently. selenium_grid maps the browser names
+to their nodes, the tests drive the browsers from their own threads. A node
+that doesn't come up keeps the error in its error attribute, only the tests
+of its browser fail because of it.
+"""
+
+import functools
 
 import pytest
+import requests
 
 from ost_utils import network_utils
+from ost_utils.ovirtlib import pollutil
 from ost_utils.selenium.grid import browser
-from ost_utils.shell import ShellError
-from ost_utils.shell import shell
+from ost_utils.utils import TaskGroup
 
-GRID_STARTUP_WAIT_RETRIES = 300
+BROWSERS = {
+    "chrome": browser.chrome_options,
+    "firefox": browser.firefox_options,
+}
+GRID_STARTUP_TIMEOUT = 60
+STATUS_REQUEST_TIMEOUT = 5
+VNC_PORT = 7900
 
 
 class SeleniumGridError(Exception):
     pass
 
 
+class BrowserNode:
+    """A standalone selenium node of one browser"""
+
+    def __init__(self, name, host_ip, port, vnc_port, remote_dir):
+        self.name = name
+        self.port = port
+        self.vnc_port = vnc_port
+        self.url = f"http://{network_utils.ip_to_url(host_ip)}:{port}"
+        self.remote_dir = remote_dir
+        self.image = f"quay.io/ovirt/selenium-standalone-{name}:latest"
+        self.container_id = None
+        self.video_container_id = None
+        self.error = None
+
+
 def _node_ready(status_dict, browser_name):
     nodes = status_dict["value"]["nodes"]
     for node in nodes:
@@ -30,41 +61,21 @@ def _node_ready(status_dict, browser_name):
     return False
 
 
-def _grid_health_check(hub_url, browser_name):
+def _grid_health_check(hub_url, browser_name, timeout=GRID_STARTUP_TIMEOUT):
     status_url = hub_url + "/status"
+    backoff = pollutil.Backoff(initial=0.1, max_interval=1)
+    with requests.Session() as session:
+        with pollutil.Poller(timeout, name=f"selenium_{browser_name}_ready", backoff=backoff) as poller:
+            for _ in poller:
+                try:
+                    status_dict = session.get(status_url, timeout=STATUS_REQUEST_TIMEOUT).json()
+                    if status_dict["value"]["ready"] and _node_ready(status_dict, browser_name):
+                        poller.succeeded()
+                        return True
+                except (requests.RequestException, ValueError, KeyError) as e:
+                    poller.swallowed(e)
 
-    for i in range(GRID_STARTUP_WAIT_RETRIES):
-        try:
-            status_json = shell(["curl", "-sSL", status_url])
-            status_dict = json.loads(status_json)
-            if status_dict["value"]["ready"] and _node_ready(status_dict, browser_name):
-                return True
-        except ShellError:
-            pass
-        time.sleep(0.1)
-
-    raise SeleniumGridError("Selenium grid didn't start up properly")
-
-
-@pytest.fixture(
-    scope="session",
-    params=[
-        pytest.param(browser.chrome_options(), id="chrome"),
-        pytest.param(browser.firefox_options(), id="firefox"),
-    ],
-)
-def selenium_browser_options(request):
-    return request.param
-
-
-@pytest.fixture(scope="session")
-def selenium_browser_name(selenium_browser_options):
-    return selenium_browser_options.to_capabilities()['browserName']
-
-
-@pytest.fixture(scope="session")
-def selenium_browser_image(selenium_browser_name):
-    return f"quay.io/ovirt/selenium-standalone-{selenium_browser_name}:latest"
+    raise SeleniumGridError(f"Selenium grid of {browser_name} didn't start up properly")
 
 
 @pytest.fixture(scope="session")
@@ -88,80 +99,107 @@ def selenium_remote_artifacts_dir():
 
 
 @pytest.fixture(scope="session")
-def selenium_url(storage_management_ips, selenium_port):
-    ip = network_utils.ip_to_url(storage_management_ips[0])
-    url = f"http://{ip}:{selenium_port}"
-    yield url
-
-
-@pytest.fixture(scope="session")
-def selenium_browser(
+def selenium_grid(
     ansible_storage,
     selenium_artifacts_dir,
-    selenium_browser_image,
-    selenium_browser_name,
     selenium_port,
     selenium_remote_artifacts_dir,
-    selenium_url,
     selenium_screen_height,
     selenium_screen_width,
+    storage_management_ips,
 ):
-    ansible_storage.shell(f"mkdir -m 777 -p {selenium_remote_artifacts_dir}")
-    container_id = ansible_storage.shell(
-        "podman run -d"
-        f" -p {selenium_port}:{selenium_port}"
-        "  -p 7900:7900"
-        "  --network=slirp4netns:enable_ipv6=true"
-        "  --shm-size=1500m"
-        f" -v {selenium_remote_artifacts_dir}/:/export:z"
-        f" -e SCREEN_WIDTH={selenium_screen_width}"
-        f" -e SCREEN_HEIGHT={selenium_screen_height}"
-        "  -e SE_OPTS='--log-level FINE'"
-        "  -e SE_VNC_NO_PASSWORD=1"
-        f" {selenium_browser_image}"
-    )["stdout"].strip()
-    _grid_health_check(selenium_url, selenium_browser_name)
-    yield container_id
-    ansible_storage.shell(f"podman stop {container_id}")
-    log_name = f"podman-{selenium_browser_name}.log"
-    remote_log_path = f"{selenium_remote_artifacts_dir}/{log_name}"
-    ansible_storage.shell(f"podman logs {container_id} > {remote_log_path}")
-    ansible_storage.fetch(src=remote_log_path, dest=f"{selenium_artifacts_dir}/{log_name}", flat=True)
+    """Browser name -> BrowserNode of all browsers, a node that didn't come
+    up has its error set"""
+    nodes = {
+        name: BrowserNode(
+            name,
+            storage_management_ips[0],
+            selenium_port + i,
+            VNC_PORT + i,
+            f"{selenium_remote_artifacts_dir}/{name}",
+        )
+        for i, name in enumerate(BROWSERS)
+    }
+    commands = []
+    for node in nodes.values():
+        commands.append(
+            "podman run -d"
+            f" -p {node.port}:4444"
+            f" -p {node.vnc_port}:{VNC_PORT}"
+            "  --network=slirp4netns:enable_ipv6=true"
+            "  --shm-size=1500m"
+            f" -v {node.remote_dir}/:/export:z"
+            f" -e SCREEN_WIDTH={selenium_screen_width}"
+            f" -e SCREEN_HEIGHT={selenium_screen_height}"
+            "  -e SE_OPTS='--log-level FINE'"
+            "  -e SE_VNC_NO_PASSWORD=1"
+            f" {node.image}"
+            " || echo -"
+        )
+    # a single ansible call starts all the containers, a '-' stands for the
+    # id of a container that didn't start
+    container_ids = ansible_storage.shell(
+        f"mkdir -m 777 -p {' '.join(node.remote_dir for node in nodes.values())}; " + "; ".join(commands)
+    )["stdout"].split()
+    for node, container_id in zip(nodes.values(), container_ids):
+        if container_id == "-":
+            node.error = SeleniumGridError(f"Selenium node of {node.name} didn't start")
+        else:
+            node.container_id = container_id
+    try:
+        started = [node for node in nodes.values() if node.error is None]
+        group = TaskGroup(
+            [functools.partial(_grid_health_check, node.url, node.name) for node in started],
+            fail_fast=False,
+            names=[f"selenium {node.name}" for node in started],
+        )
+        for node, result, span in zip(started, group.start().join(raise_exceptions=False), group.spans):
+            if span.error is not None:
+                node.error = result
+        yield nodes
+    finally:
+        started = [node for node in nodes.values() if node.container_id]
+        if started:
+            ansible_storage.shell(f"podman stop {' '.join(node.container_id for node in started)}")
+        for node in started:
+            log_name = f"podman-{node.name}.log"
+            remote_log_path = f"{node.remote_dir}/{log_name}"
+            ansible_storage.shell(f"podman logs {node.container_id} > {remote_log_path}")
+            ansible_storage.fetch(src=remote_log_path, dest=f"{selenium_artifacts_dir}/{log_name}", flat=True)
 
 
 @pytest.fixture(scope="session")
 def selenium_video_recorder(
     ansible_storage,
-    selenium_browser_name,
-    selenium_browser,
+    selenium_grid,
     selenium_artifacts_dir,
-    selenium_remote_artifacts_dir,
     selenium_screen_width,
     selenium_screen_height,
 ):
-    container_id = ansible_storage.shell(
+    recorded = [node for node in selenium_grid.values() if node.error is None]
+    commands = [
         "podman run -d"
-        f" -v {selenium_remote_artifacts_dir}/:/videos:z"
-        f" -e DISPLAY_CONTAINER_NAME={selenium_browser[:12]}"
-        f" -e FILE_NAME=video-{selenium_browser_name}.mp4"
+        f" -v {node.remote_dir}/:/videos:z"
+        f" -e DISPLAY_CONTAINER_NAME={node.container_id[:12]}"
+        f" -e FILE_NAME=video-{node.name}.mp4"
         f" -e SE_SCREEN_WIDTH={selenium_screen_width}"
         f" -e SE_SCREEN_HEIGHT={selenium_screen_height}"
-        f" --network=container:{selenium_browser}"
+        f" --network=container:{node.container_id}"
         "  quay.io/ovirt/selenium-video:latest"
-    )["stdout"].strip()
+        for node in recorded
+    ]
+    container_ids = ansible_storage.shell(" && ".join(commands))["stdout"].split() if recorded else []
+    for node, container_id in zip(recorded, container_ids):
+        node.video_container_id = container_id
     yield
-    ansible_storage.shell(f"podman stop {container_id}")
-    ansible_storage.fetch(
-        src=f"{selenium_remote_artifacts_dir}/video-{selenium_browser_name}.mp4",
-        dest=selenium_artifacts_dir,
-        flat=True,
-    )
-    res = ansible_storage.shell(f"podman logs {container_id}")
-
-    with open(f"{selenium_artifacts_dir}/podman-video-{selenium_browser}.log", "w", encoding="utf-8") as log_file:
-        log_file.write(res["stdout"])
-
-
-@pytest.fixture(scope="session")
-def selenium_grid_url(selenium_url, selenium_browser, selenium_video_recorder):
-    yield selenium_url
+    if container_ids:
+        ansible_storage.shell(f"podman stop {' '.join(container_ids)}")
+    for node in recorded:
+        ansible_storage.fetch(
+            src=f"{node.remote_dir}/video-{node.name}.mp4",
+            dest=selenium_artifacts_dir,
+            flat=True,
+        )
+        res = ansible_storage.shell(f"podman logs {node.video_container_id}")
+        with open(f"{selenium_artifacts_dir}/podman-video-{node.name}.log", "w", encoding="utf-8") as log_file:
+            log_file.write(res["stdout"])
@@ -5,9 +5,14 @@
 #
 
 import datetime
+import os
 
 import logging
 
+from ost_utils.ovirtlib import pollutil
+from ost_utils.pytest import timings
+from ost_utils.pytest import wait_report
+
 LOGGER = logging.getLogger('')
 
 
@@ -17,6 +22,8 @@ RUNNING_TIMES = {}
 def pytest_runtest_logstart(nodeid, location):
     now = datetime.datetime.now()
     RUNNING_TIMES[location] = now
+    pollutil.STATS.set_test(nodeid)
+    timings.RECORDER.test_started(nodeid)
     print(now.strftime('started at %Y-%m-%d %H:%M:%S'), end=' ')
     LOGGER.debug(f'Running test: {nodeid}')
 
@@ -27,3 +34,18 @@ def pytest_runtest_logfinish(nodeid, location):
     delta = int((now - then).total_seconds())
     print(f" ({delta}s)", end='')
     LOGGER.debug(f'Finished test: {nodeid} ({delta}s)')
+    timings.RECORDER.test_finished(nodeid)
+
+
+def pytest_runtest_logreport(report):
+    timings.RECORDER.phase_finished(report.nodeid, report.when, report.duration, report.outcome)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    LOGGER.info('Waits that took the longest:')
+    pollutil.STATS.log_summary(LOGGER)
+    artifacts_dir = os.path.join(os.environ.get('OST_REPO_ROOT', str(session.config.rootdir)), 'exported-artifacts')
+    json_path, html_path = wait_report.write(artifacts_dir)
+    LOGGER.info(f'Wait report written to {json_path} and {html_path}')
+    timings_path = timings.RECORDER.write(artifacts_dir, suite=os.environ.get('SUITE'), exitstatus=int(exitstatus))
+    LOGGER.info(f'Test timings written to {timings_path}')
@@ -0,0 +1,241 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Runs the tests of a module concurrently, following their dependencies.
+
+Tests declare what they need with the depends_on marker (see
+ost_utils.pytest.depends_on): the earlier tests of their module they have to
+run after and the resources, free-form tags, they can't share with a test
+running at the same time. Tests that don't declare anything are barriers,
+they run alone at their place in the ordering, after everything before them
+and before everything after them, so a module without declarations runs
+exactly as it does serially.
+
+Modules run one after another. Within a module, whenever a test finishes the
+tests whose dependencies are all done and whose resources are free are
+started, in the order of the module, on up to --parallel-tests threads.
+
+pytest keeps a single instance of each function-scoped fixture, so tests
+only overlap when the function-scoped fixtures they use are different ones:
+a function-scoped fixture is a resource of each test using it, and a test
+using a parametrized one, whose instance for the next parameter would
+replace the one of the running test, runs alone.
+
+Setups and teardowns are serialized, only the test calls overlap. Captured
+log sections of the reports may mix the records of tests running at the same
+time, the log file has all of them with the name of the test in the thread
+name.
+"""
+
+import collections
+import concurrent.futures
+import logging
+import threading
+import time
+
+import pytest
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class DependencyError(Exception):
+    pass
+
+
+class TestGraph:
+    """Dependencies and resources of the tests of a module, in order"""
+
+    def __init__(self, items):
+        self.items = items
+        self.dependencies = {}
+        self.resources = {}
+        self.exclusive = set()
+        by_name = collections.defaultdict(list)
+        barrier = None
+        since_barrier = []
+        for item in items:
+            mark = item.get_closest_marker('depends_on')
+            if mark is None:
+                self.dependencies[item] = set(since_barrier) | ({barrier} if barrier else set())
+                self.resources[item] = frozenset()
+                barrier = item
+                since_barrier = []
+            else:
+                dependencies = {barrier} if barrier else set()
+                for name in mark.args:
+                    if name not in by_name:
+                        raise DependencyError(
+                            f'{item.nodeid} depends on {name}, which is not an earlier test of its module'
+                        )
+                    dependencies.update(by_name[name])
+                self.dependencies[item] = dependencies
+                fixtures, parametrized = _function_fixtures(item)
+                self.resources[item] = frozenset(mark.kwargs.get('resources', ())) | fixtures
+                if parametrized:
+                    self.exclusive.add(item)
+                since_barrier.append(item)
+            by_name[_test_name(item)].append(item)
+
+
+def _function_fixtures(item):
+    """The function-scoped fixtures of the item, as resources, and whether
+    any of them is parametrized"""
+    fixtures = set()
+    parametrized = False
+    fixtureinfo = getattr(item, '_fixtureinfo', None)
+    if fixtureinfo is None:
+        return frozenset(), False
+    params = getattr(getattr(item, 'callspec', None), 'params', {})
+    for name, fixturedefs in fixtureinfo.name2fixturedefs.items():
+        if not fixturedefs or fixturedefs[-1].scope != 'function':
+            continue
+        fixtures.add(f'fixture:{name}')
+        if fixturedefs[-1].params is not None or name in params:
+            parametrized = True
+    return frozenset(fixtures), parametrized
+
+
+def _test_name(item):
+    return getattr(item, 'originalname', item.name)
+
+
+def check_dependencies(items):
+    """Fails the collection if the dependencies don't fit the ordering of the
+    module, which has to stay a valid serial schedule"""
+    try:
+        TestGraph(items)
+    except DependencyError as e:
+        raise RuntimeError(str(e))
+
+
+class ParallelRunner:
+    def __init__(self, session, workers):
+        self._session = session
+        self._workers = workers
+        self._setupstate = session._setupstate
+        self._lock = threading.Lock()
+        self._module_items = []
+        self._running = set()
+        self._finished = set()
+        self._after = None
+
+    def run(self, items):
+        modules = collections.OrderedDict()
+        for item in items:
+            modules.setdefault(item.location[0], []).append(item)
+        module_items = list(modules.values())
+        for i, items_of_module in enumerate(module_items):
+            if self._should_stop():
+                break
+            after = module_items[i + 1][0] if i + 1 < len(module_items) else None
+            self._run_module(TestGraph(items_of_module), after)
+
+    def _run_module(self, graph, after):
+        self._module_items = graph.items
+        self._finished = set()
+        self._after = after
+        pending = list(graph.items)
+        running = {}
+        held = set()
+        start = time.monotonic()
+        durations = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._workers) as executor:
+            while pending or running:
+                if not self._should_stop():
+                    with self._lock:
+                        ready = [item for item in pending if graph.dependencies[item] <= self._finished]
+                    for item in ready:
+                        if graph.resources[item] & held:
+                            continue
+                        if running and (item in graph.exclusive or set(running.values()) & graph.exclusive):
+                            continue
+                        pending.remove(item)
+                        held |= graph.resources[item]
+                        with self._lock:
+                            self._running.add(item)
+                        running[executor.submit(self._run_item, item)] = item
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    item = running.pop(future)
+                    held -= graph.resources[item]
+                    durations.append(future.result())
+        if durations:
+            LOGGER.info(
+                f'{graph.items[0].location[0]}: ran {len(durations)} tests taking {int(sum(durations))}s '
+                f'in {int(time.monotonic() - start)}s'
+            )
+
+    def _run_item(self, item):
+        thread = threading.current_thread()
+        thread_name = thread.name
+        thread.name = item.name
+        start = time.monotonic()
+        try:
+            with self._lock:
+                item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+                setup = self._call_and_report(item, 'setup')
+                # let the next tests be set up while this one runs, it's put
+                # back on top of the stack to be torn down
+                entry = self._setupstate.stack.pop(item, None)
+            if setup.passed:
+                call = self._call_and_report(item, 'call', log=False)
+                with self._lock:
+                    item.ihook.pytest_runtest_logreport(report=call)
+            with self._lock:
+                if entry is not None:
+                    self._setupstate.stack[item] = entry
+                self._running.discard(item)
+                self._finished.add(item)
+                try:
+                    self._call_and_report(item, 'teardown', nextitem=self._teardown_target(item))
+                finally:
+                    item._request = False
+                    item.funcargs = None
+                item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        finally:
+            thread.name = thread_name
+        return time.monotonic() - start
+
+    def _teardown_target(self, item):
+        """The item passed as nextitem to the teardown of item, which decides
+        how much of the setup stack is torn down. Another item of the module
+        while any is left, so that the module stays set up."""
+        if self._should_stop():
+            others = self._running
+        else:
+            others = [other for other in self._module_items if other not in self._finished]
+        others = [other for other in others if other is not item]
+        if others:
+            return others[0]
+        return None if self._should_stop() else self._after
+
+    def _should_stop(self):
+        return bool(self._session.shouldfail or self._session.shouldstop)
+
+    @staticmethod
+    def _call_and_report(item, when, log=True, **kwargs):
+        hook = getattr(item.ihook, f'pytest_runtest_{when}')
+        call = pytest.CallInfo.from_call(
+            lambda: hook(item=item, **kwargs),
+            when=when,
+            reraise=(pytest.exit.Exception, KeyboardInterrupt),
+        )
+        report = item.ihook.pytest_runtest_makereport(item=item, call=call)
+        if log:
+            item.ihook.pytest_runtest_logreport(report=report)
+        return report
+
+
+def run(session, workers):
+    ParallelRunner(session, workers).run(session.items)
+    if session.shouldfail:
+        raise session.Failed(session.shouldfail)
+    if session.shouldstop:
+        raise session.Interrupted(session.shouldstop)
+    return True
@@ -0,0 +1,183 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Runs small test modules with the scheduler and checks from the log of
+their setups, calls and teardowns which of them overlapped."""
+
+import os
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+CONFTEST = '''
+import threading
+
+import pytest
+
+from ost_utils.pytest import scheduler
+
+_lock = threading.Lock()
+
+
+def pytest_addoption(parser):
+    parser.addoption('--parallel-tests', type=int, default=1)
+
+
+def pytest_runtestloop(session):
+    return scheduler.run(session, session.config.getoption('parallel_tests'))
+
+
+@pytest.fixture(scope='session')
+def log():
+    def write(line):
+        with _lock, open('events.log', 'a') as events:
+            events.write(line + '\\n')
+
+    return write
+'''
+
+
+@pytest.fixture
+def run_module(pytester, monkeypatch):
+    monkeypatch.syspath_prepend(REPO_ROOT)
+    pytester.makeconftest(CONFTEST)
+    pytester.makeini('[pytest]\nmarkers =\n    depends_on: dependencies')
+
+    def run(source, workers=2):
+        pytester.makepyfile(test_module=source)
+        result = pytester.runpytest_inprocess(f'--parallel-tests={workers}', '-p', 'no:cacheprovider')
+        with open(pytester.path / 'events.log') as events:
+            return result, events.read().split()
+
+    return run
+
+
+def _overlapped(events, first, second):
+    return events.index(f'start-{second}') < events.index(f'end-{first}') and events.index(
+        f'start-{first}'
+    ) < events.index(f'end-{second}')
+
+
+def test_parametrized_function_fixture_is_not_shared(run_module):
+    result, events = run_module(
+        '''
+import time
+
+import pytest
+
+
+@pytest.fixture(params=['chrome', 'firefox'])
+def browser(request, log):
+    log(f'setup-{request.param}')
+    yield request.param
+    log(f'teardown-{request.param}')
+
+
+@pytest.mark.depends_on()
+def test_browser(browser, log):
+    log(f'start-{browser}')
+    time.sleep(0.5)
+    log(f'end-{browser}')
+'''
+    )
+    result.assert_outcomes(passed=2)
+    assert events == [
+        'setup-chrome',
+        'start-chrome',
+        'end-chrome',
+        'teardown-chrome',
+        'setup-firefox',
+        'start-firefox',
+        'end-firefox',
+        'teardown-firefox',
+    ]
+
+
+def test_shared_function_fixture_serializes_its_tests(run_module):
+    result, events = run_module(
+        '''
+import itertools
+import time
+
+import pytest
+
+_instances = itertools.count()
+
+
+@pytest.fixture
+def driver(log):
+    instance = next(_instances)
+    log(f'setup-{instance}')
+    yield instance
+    log(f'teardown-{instance}')
+
+
+@pytest.mark.depends_on()
+def test_first(driver, log):
+    log(f'start-first:{driver}')
+    time.sleep(0.5)
+    log(f'end-first:{driver}')
+
+
+@pytest.mark.depends_on()
+def test_second(driver, log):
+    log(f'start-second:{driver}')
+    time.sleep(0.5)
+    log(f'end-second:{driver}')
+'''
+    )
+    result.assert_outcomes(passed=2)
+    assert events == [
+        'setup-0',
+        'start-first:0',
+        'end-first:0',
+        'teardown-0',
+        'setup-1',
+        'start-second:1',
+        'end-second:1',
+        'teardown-1',
+    ]
+
+
+def test_disjoint_function_fixtures_overlap(run_module):
+    result, events = run_module(
+        '''
+import time
+
+import pytest
+
+
+@pytest.fixture
+def first_vm(log):
+    yield 'vm0'
+    log('teardown-vm0')
+
+
+@pytest.fixture
+def second_vm(log):
+    yield 'vm1'
+    log('teardown-vm1')
+
+
+@pytest.mark.depends_on()
+def test_first(first_vm, log):
+    log('start-first')
+    time.sleep(0.5)
+    log('end-first')
+
+
+@pytest.mark.depends_on()
+def test_second(second_vm, log):
+    log('start-second')
+    time.sleep(0.5)
+    log('end-second')
+'''
+    )
+    result.assert_outcomes(passed=2)
+    assert _overlapped(events, 'first', 'second')
+    assert events.index('teardown-vm0') > events.index('end-first')
+    assert events.index('teardown-vm1') > events.index('end-second')
@@ -0,0 +1,153 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Per-test timing database of a run and comparison of two runs.
+
+The hooks in ost_utils.pytest.running_time and ost_utils.pytest record, for
+every test, its start and end time, the duration and outcome of its setup,
+call and teardown, and how long the fixtures set up for it took. They're
+written at the end of the session to exported-artifacts/test_timings.jsonl,
+one JSON object per line:
+
+  {"type": "run", "suite": ..., "start": ..., "end": ..., "exitstatus": ...}
+  {"type": "test", "nodeid": ..., "start": ..., "end": ..., "duration": ...,
+   "setup": ..., "call": ..., "teardown": ..., "outcome": ...}
+  {"type": "fixture", "name": ..., "scope": ..., "test": ..., "start": ...,
+   "duration": ...}
+
+Times are seconds, start and end are UNIX timestamps. compare() finds the
+tests and fixtures of a run that got slower than in a reference run, see
+common/scripts/compare_test_timings.py.
+"""
+
+import json
+import os
+import threading
+import time
+
+TIMINGS_FILE = 'test_timings.jsonl'
+PHASES = ('setup', 'call', 'teardown')
+
+# a test regressed if it got slower by more than both of these
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_MIN_SECONDS = 10
+
+
+class TimingRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread_test = threading.local()
+        self._tests = {}
+        self._fixtures = []
+        self.start = time.time()
+
+    def test_started(self, nodeid):
+        self._thread_test.nodeid = nodeid
+        with self._lock:
+            self._tests[nodeid] = {'type': 'test', 'nodeid': nodeid, 'start': time.time()}
+
+    def test_finished(self, nodeid):
+        with self._lock:
+            test = self._tests.setdefault(nodeid, {'type': 'test', 'nodeid': nodeid})
+            test['end'] = time.time()
+            if 'start' in test:
+                test['duration'] = test['end'] - test['start']
+
+    def phase_finished(self, nodeid, when, duration, outcome):
+        with self._lock:
+            test = self._tests.setdefault(nodeid, {'type': 'test', 'nodeid': nodeid})
+            test[when] = duration
+            if outcome != 'passed' or 'outcome' not in test:
+                test['outcome'] = outcome
+
+    def fixture_set_up(self, name, scope, start, duration):
+        with self._lock:
+            self._fixtures.append(
+                {
+                    'type': 'fixture',
+                    'name': name,
+                    'scope': scope,
+                    'test': getattr(self._thread_test, 'nodeid', None),
+                    'start': start,
+                    'duration': duration,
+                }
+            )
+
+    def records(self, **run):
+        with self._lock:
+            header = dict({'type': 'run', 'start': self.start, 'end': time.time()}, **run)
+            return [header] + [dict(test) for test in self._tests.values()] + [dict(f) for f in self._fixtures]
+
+    def write(self, target_dir, **run):
+        os.makedirs(target_dir, exist_ok=True)
+        path = os.path.join(target_dir, TIMINGS_FILE)
+        with open(path, 'w', encoding='utf-8') as timings_file:
+            for record in self.records(**run):
+                timings_file.write(json.dumps(record) + '\n')
+        return path
+
+
+RECORDER = TimingRecorder()
+
+
+def load(path):
+    """(run, tests by nodeid, total setup time by fixture name) of a
+    timings file, or of the timings file in a directory"""
+    if os.path.isdir(path):
+        path = os.path.join(path, TIMINGS_FILE)
+    run = {}
+    tests = {}
+    fixtures = {}
+    with open(path, encoding='utf-8') as timings_file:
+        for line in timings_file:
+            record = json.loads(line)
+            if record['type'] == 'run':
+                run = record
+            elif record['type'] == 'test':
+                tests[record['nodeid']] = record
+            elif record['type'] == 'fixture':
+                fixtures[record['name']] = fixtures.get(record['name'], 0.0) + record['duration']
+    return run, tests, fixtures
+
+
+def _regressed(old, new, threshold, min_seconds):
+    return new - old > min_seconds and new > old * (1 + threshold)
+
+
+def compare(reference, current, threshold=DEFAULT_THRESHOLD, min_seconds=DEFAULT_MIN_SECONDS):
+    """Compares two timings files, returns a dict with the 'regressions'
+    (tests and fixtures slower by more than threshold, a fraction, and
+    min_seconds), the 'improvements' (faster by as much) and the tests
+    only in one of them"""
+    _, old_tests, old_fixtures = load(reference)
+    _, new_tests, new_fixtures = load(current)
+    result = {
+        'regressions': [],
+        'improvements': [],
+        'new_tests': sorted(set(new_tests) - set(old_tests)),
+        'missing_tests': sorted(set(old_tests) - set(new_tests)),
+    }
+
+    def add(kind, name, old, new, phases=None):
+        entry = {'kind': kind, 'name': name, 'reference': old, 'current': new, 'delta': new - old}
+        if phases:
+            entry['phases'] = phases
+        if _regressed(old, new, threshold, min_seconds):
+            result['regressions'].append(entry)
+        elif _regressed(new, old, threshold, min_seconds):
+            result['improvements'].append(entry)
+
+    for nodeid in sorted(set(old_tests) & set(new_tests)):
+        old, new = old_tests[nodeid], new_tests[nodeid]
+        if 'duration' not in old or 'duration' not in new:
+            continue
+        phases = {phase: (old.get(phase), new.get(phase)) for phase in PHASES}
+        add('test', nodeid, old['duration'], new['duration'], phases)
+    for name in sorted(set(old_fixtures) & set(new_fixtures)):
+        add('fixture', name, old_fixtures[name], new_fixtures[name])
+    for key in ('regressions', 'improvements'):
+        result[key].sort(key=lambda entry: abs(entry['delta']), reverse=True)
+    return result
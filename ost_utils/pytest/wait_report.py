@@ -0,0 +1,133 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""Report of the waits recorded by pollutil.STATS during a session.
+
+waits.json has every wait (test, call site, predicate, probes, duration,
+outcome, swallowed exceptions), their aggregation per call site and per
+test. waits.html shows the same per test aggregation as a flame-style
+chart: the session on the first row, below it the tests and below each test
+its call sites, every box as wide as the time waited in it, so that the
+waits worth optimising stand out.
+"""
+
+import html
+import json
+import os
+
+from ost_utils.ovirtlib import pollutil
+
+JSON_FILE = 'waits.json'
+HTML_FILE = 'waits.html'
+ROW_HEIGHT = 24
+
+_HTML = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>OST waits</title>
+<style>
+body {{ font-family: sans-serif; font-size: 12px; margin: 16px; }}
+.chart {{ position: relative; height: {height}px; }}
+.box {{ position: absolute; height: {box_height}px; overflow: hidden; white-space: nowrap;
+        box-sizing: border-box; border: 1px solid #fff; padding: 4px; }}
+.session {{ background: #8fb3d9; }}
+.test {{ background: #f2c46d; }}
+.site {{ background: #e8956b; }}
+.site.failed {{ background: #d9534f; color: #fff; }}
+table {{ border-collapse: collapse; margin-top: 24px; }}
+td, th {{ border: 1px solid #ccc; padding: 2px 6px; text-align: left; }}
+</style>
+</head>
+<body>
+<h3>{title}</h3>
+<div class="chart">
+{boxes}
+</div>
+<table>
+<tr><th>call site</th><th>predicate</th><th>waits</th><th>failures</th><th>probes</th>
+<th>total</th><th>max</th><th>swallowed exceptions</th></tr>
+{rows}
+</table>
+</body>
+</html>
+'''
+
+
+def _box(css_class, left, width, row, label, title):
+    return (
+        f'<div class="box {css_class}" style="left: {left:.4f}%; width: {width:.4f}%; top: {row * ROW_HEIGHT}px" '
+        f'title="{html.escape(title)}">{html.escape(label)}</div>'
+    )
+
+
+def _flame_boxes(by_test, total):
+    boxes = [_box('session', 0, 100, 0, f'all waits {total:.0f}s', f'all waits: {total:.1f}s')]
+    left = 0.0
+    for test in by_test:
+        width = 100 * test['total_time'] / total
+        name = test['test'] or '<outside of tests>'
+        boxes.append(_box('test', left, width, 1, name, f"{name}: {test['total_time']:.1f}s"))
+        site_left = left
+        for site in test['call_sites']:
+            site_width = 100 * site['total_time'] / total
+            label = f"{site['name']} {site['call_site']}"
+            title = (
+                f"{label}: {site['waits']} waits, {site['failures']} failures, {site['probes']} probes, "
+                f"{site['total_time']:.1f}s total, {site['max_time']:.1f}s max"
+            )
+            if site['exceptions']:
+                title += ', swallowed ' + ', '.join(
+                    f'{count} {name}' for name, count in sorted(site['exceptions'].items())
+                )
+            boxes.append(_box('site failed' if site['failures'] else 'site', site_left, site_width, 2, label, title))
+            site_left += site_width
+        left += width
+    return boxes
+
+
+def _summary_rows(summary):
+    rows = []
+    for stats in summary:
+        exceptions = ', '.join(f'{count} {name}' for name, count in sorted(stats['exceptions'].items()))
+        cells = (
+            stats['call_site'],
+            stats['name'],
+            stats['waits'],
+            stats['failures'],
+            stats['probes'],
+            f"{stats['total_time']:.1f}s",
+            f"{stats['max_time']:.1f}s",
+            exceptions,
+        )
+        rows.append('<tr>' + ''.join(f'<td>{html.escape(str(cell))}</td>' for cell in cells) + '</tr>')
+    return rows
+
+
+def write(target_dir, stats=None):
+    """Writes waits.json and waits.html to target_dir, returns their paths"""
+    stats = stats or pollutil.STATS
+    summary = stats.summary()
+    by_test = stats.by_test()
+    os.makedirs(target_dir, exist_ok=True)
+
+    json_path = os.path.join(target_dir, JSON_FILE)
+    with open(json_path, 'w', encoding='utf-8') as json_file:
+        json.dump({'call_sites': summary, 'tests': by_test, 'waits': stats.records()}, json_file, indent=2)
+
+    total = sum(test['total_time'] for test in by_test)
+    html_path = os.path.join(target_dir, HTML_FILE)
+    with open(html_path, 'w', encoding='utf-8') as html_file:
+        html_file.write(
+            _HTML.format(
+                title=html.escape(f'{sum(stats["waits"] for stats in summary)} waits, {total:.0f}s in total'),
+                height=3 * ROW_HEIGHT,
+                box_height=ROW_HEIGHT - 2,
+                boxes='\n'.join(_flame_boxes(by_test, total) if total else []),
+                rows='\n'.join(_summary_rows(summary)),
+            )
+        )
+    return json_path, html_path
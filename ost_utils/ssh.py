@@ -3,11 +3,15 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 #
 import array
+import atexit
+import codecs
 import fcntl
+import functools
 import select
 import socket
 import sys
 import termios
+import threading
 import time
 import uuid
 import logging
@@ -19,6 +23,14 @@ from ost_utils import utils
 
 SSH_TIMEOUT_DEFAULT = 100
 SSH_TRIES_DEFAULT = 20
+SSH_IDLE_TIMEOUT_DEFAULT = 300
+SSH_KEEPALIVE_INTERVAL = 30
+# below the MaxSessions of 10 of a default sshd_config
+SSH_MAX_CHANNELS_DEFAULT = 8
+SSH_CHANNEL_TRIES_DEFAULT = 3
+DRAIN_CHUNK_SIZE = 256 * 1024
+DRAIN_SELECT_TIMEOUT = 0.2
+PTY_RESIZE_INTERVAL = 1
 LOGGER = logging.getLogger(__name__)
 logging.getLogger('paramiko.transport').setLevel(logging.WARNING)
 
@@ -35,7 +47,7 @@ def ssh(
     password='vagrant',
 ):
     host_name = host_name or ip_addr
-    client = get_ssh_client(
+    channel = CONNECTION_POOL.open_session(
         ip_addr=ip_addr,
         host_name=host_name,
         ssh_tries=tries,
@@ -43,8 +55,6 @@ def ssh(
         username=username,
         password=password,
     )
-    transport = client.get_transport()
-    channel = transport.open_session()
     joined_command = ' '.join(command)
     command_id = _gen_ssh_command_id()
     LOGGER.debug(
@@ -54,14 +64,14 @@ def ssh(
         joined_command,
         data is not None and (f' < "{data}"') or '',
     )
-    channel.exec_command(joined_command)
-    if data is not None:
-        channel.send(data)
-    channel.shutdown_write()
-    return_code, out, err = drain_ssh_channel(channel, **(show_output and {} or {'stdout': None, 'stderr': None}))
-    channel.close()
-    transport.close()
-    client.close()
+    try:
+        channel.exec_command(joined_command)
+        if data is not None:
+            channel.send(data)
+        channel.shutdown_write()
+        return_code, out, err = drain_ssh_channel(channel, **(show_output and {} or {'stdout': None, 'stderr': None}))
+    finally:
+        channel.close()
 
     LOGGER.debug(
         'Command %s on %s returned with %d',
@@ -87,47 +97,57 @@ def ssh(
     return command_status.CommandStatus(out, err, return_code)
 
 
-def drain_ssh_channel(chan, stdin=None, stdout=sys.stdout, stderr=sys.stderr):
+def drain_ssh_channel(
+    chan,
+    stdin=None,
+    stdout=sys.stdout,
+    stderr=sys.stderr,
+    on_stdout=None,
+    on_stderr=None,
+    collect_output=True,
+):
+    """Streams the output of a channel until the remote command finishes.
+
+    Args:
+        chan(paramiko.Channel): Channel with a running command
+        stdin(file): Optional stream to forward to the remote command
+        stdout(file): Optional stream to echo the remote stdout to
+        stderr(file): Optional stream to echo the remote stderr to
+        on_stdout(callable): Called with every chunk of stdout as it arrives,
+            e.g. the write method of a spool file
+        on_stderr(callable): Called with every chunk of stderr as it arrives
+        collect_output(bool): Whether to keep the whole output in memory, set
+            to False when it's consumed by the callbacks only
+
+    Returns:
+        tuple: (exit status, stdout bytes, stderr bytes). The output is empty
+            if `collect_output` is False.
+    """
     chan.settimeout(0)
-    out_queue = []
-    out_all = []
-    err_queue = []
-    err_all = []
+    out_all = bytearray()
+    err_all = bytearray()
+    out_writer = _StreamWriter(stdout)
+    err_writer = _StreamWriter(stderr)
 
-    try:
-        stdout_is_tty = stdout.isatty()
-        tty_w = tty_h = -1
-    except AttributeError:
-        stdout_is_tty = False
-
-    done = False
-    while not done:
-        if stdout_is_tty:
-            arr = array.array('h', range(4))
-            if not fcntl.ioctl(stdout.fileno(), termios.TIOCGWINSZ, arr):
-                if tty_h != arr[0] or tty_w != arr[1]:
-                    tty_h, tty_w = arr[:2]
-                    chan.resize_pty(width=tty_w, height=tty_h)
-
-        read_streams = []
-        if not chan.closed:
-            read_streams.append(chan)
-
-            if stdin and not stdin.closed:
-                read_streams.append(stdin)
-
-        write_streams = []
-        if stdout and out_queue:
-            write_streams.append(stdout)
-        if stderr and err_queue:
-            write_streams.append(stderr)
-
-        read, write, _ = select.select(
-            read_streams,
-            write_streams,
-            [],
-            0.1,
-        )
+    pty_resizer = _PtyResizer(chan, stdout)
+
+    def handle(chunk, buffer, writer, callback):
+        if collect_output:
+            buffer += chunk
+        writer.write(chunk)
+        if callback is not None:
+            callback(chunk)
+
+    while True:
+        pty_resizer.resize_if_needed()
+
+        read_streams = [chan]
+        if stdin and not stdin.closed and not chan.closed:
+            read_streams.append(stdin)
+
+        # the channel becomes readable on stdout data and on close only,
+        # stderr is picked up at the latest when select times out
+        read, _, _ = select.select(read_streams, [], [], DRAIN_SELECT_TIMEOUT)
 
         if stdin in read:
             chunk = utils.read_nonblocking(stdin)
@@ -137,39 +157,74 @@ def drain_ssh_channel(chan, stdin=None, stdout=sys.stdout, stderr=sys.stderr):
                 chan.shutdown_write()
 
         try:
-            if chan.recv_ready():
-                chunk = chan.recv(1024)
-                if stdout:
-                    out_queue.append(chunk)
-                out_all.append(chunk)
-
-            if chan.recv_stderr_ready():
-                chunk = chan.recv_stderr(1024)
-                if stderr:
-                    err_queue.append(chunk)
-                err_all.append(chunk)
+            while chan.recv_ready():
+                handle(chan.recv(DRAIN_CHUNK_SIZE), out_all, out_writer, on_stdout)
+            while chan.recv_stderr_ready():
+                handle(chan.recv_stderr(DRAIN_CHUNK_SIZE), err_all, err_writer, on_stderr)
         except socket.error:
             pass
 
-        if stdout in write:
-            out = out_queue.pop(0)
-            try:
-                stdout.write(out)
-            except TypeError:
-                stdout.write(out.decode('utf-8'))
-            stdout.flush()
-        if stderr in write:
-            err = err_queue.pop(0)
-            try:
-                stderr.write(err)
-            except TypeError:
-                stderr.write(err.decode('utf-8'))
-            stderr.flush()
+        if chan.closed and not chan.recv_ready() and not chan.recv_stderr_ready():
+            break
 
-        if chan.closed and not out_queue and not err_queue:
-            done = True
+    out_writer.flush()
+    err_writer.flush()
+    return (chan.exit_status, bytes(out_all), bytes(err_all))
 
-    return (chan.exit_status, b''.join(out_all), b''.join(err_all))
+
+class _StreamWriter:
+    """Echoes raw output chunks to a binary or a text stream"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def write(self, chunk):
+        if self._stream is None:
+            return
+        try:
+            self._stream.write(chunk)
+        except TypeError:
+            # text stream - a multibyte character may be split between chunks
+            self._stream.write(self._decoder.decode(chunk))
+        self._stream.flush()
+
+    def flush(self):
+        if self._stream is None:
+            return
+        tail = self._decoder.decode(b'', final=True)
+        if tail:
+            self._stream.write(tail)
+        self._stream.flush()
+
+
+class _PtyResizer:
+    """Propagates the size of the local terminal to the remote pty.
+
+    The terminal size is queried at most once per PTY_RESIZE_INTERVAL
+    instead of on every read.
+    """
+
+    def __init__(self, chan, stdout):
+        self._chan = chan
+        self._stdout = stdout
+        self._size = None
+        self._next_check = 0
+        try:
+            self._enabled = stdout.isatty()
+        except AttributeError:
+            self._enabled = False
+
+    def resize_if_needed(self):
+        if not self._enabled or time.monotonic() < self._next_check:
+            return
+        self._next_check = time.monotonic() + PTY_RESIZE_INTERVAL
+        arr = array.array('h', range(4))
+        if not fcntl.ioctl(self._stdout.fileno(), termios.TIOCGWINSZ, arr):
+            size = tuple(arr[:2])
+            if size != self._size:
+                self._size = size
+                self._chan.resize_pty(width=size[1], height=size[0])
 
 
 def _gen_ssh_command_id():
@@ -251,3 +306,195 @@ def get_ssh_client(
 
 class OSTSSHTimeoutException(Exception):
     pass
+
+
+class _PooledClient:
+    def __init__(self, client, max_channels):
+        self.client = client
+        self.last_used = time.monotonic()
+        # channels opened on the transport and not closed yet
+        self.channels = 0
+        # lowered when the server refuses a channel before reaching it
+        self.max_channels = max_channels
+        # taken out of the pool, closed once its last channel is
+        self.retired = False
+
+
+class _PooledChannel:
+    """A channel on a pooled connection, it tells the pool when it's closed
+    so that the connection isn't closed while it runs a command"""
+
+    def __init__(self, channel, release):
+        self._channel = channel
+        self._release = release
+
+    def __getattr__(self, name):
+        return getattr(self._channel, name)
+
+    def close(self):
+        self._channel.close()
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+class SSHConnectionPool:
+    """Keeps authenticated ssh connections alive between commands.
+
+    Connections are keyed by (ip, username, key) and every command gets its
+    own channel on a shared transport, so commands issued in loops don't
+    pay for the TCP, key exchange and authentication handshakes each time.
+    sshd allows MaxSessions (10 by default) channels per connection, so a
+    connection gets at most `max_channels` of them and commands beyond that
+    open another connection to the same host. A channel the server refuses
+    anyway only marks its connection as full.
+
+    Connections that had no open channel for longer than `idle_timeout`
+    are closed. Dead ones are replaced transparently, and closed once
+    their channels are.
+    """
+
+    def __init__(
+        self,
+        idle_timeout=SSH_IDLE_TIMEOUT_DEFAULT,
+        max_channels=SSH_MAX_CHANNELS_DEFAULT,
+        channel_tries=SSH_CHANNEL_TRIES_DEFAULT,
+    ):
+        self._idle_timeout = idle_timeout
+        self._max_channels = max_channels
+        self._channel_tries = channel_tries
+        self._lock = threading.Lock()
+        # key -> _PooledClients of the host
+        self._clients = {}
+
+    def open_session(
+        self,
+        ip_addr,
+        ssh_key=None,
+        host_name=None,
+        ssh_tries=None,
+        username='root',
+        password='123456',
+    ):
+        key = self._key(ip_addr, ssh_key, username)
+        connect_args = (ip_addr, ssh_key, host_name, ssh_tries, username, password)
+        for attempt in range(1, self._channel_tries + 1):
+            pooled = self._get(key, *connect_args)
+            try:
+                channel = pooled.client.get_transport().open_session()
+            except paramiko.ChannelException as err:
+                # the connection is fine, it has as many channels as the
+                # server allows
+                LOGGER.debug('ssh connection to %s refused channel %d: %s', host_name or ip_addr, pooled.channels, err)
+                self._release(pooled, full=True)
+                error = err
+            except (paramiko.ssh_exception.SSHException, socket.error, EOFError) as err:
+                LOGGER.debug('Stale ssh connection to %s, reconnecting: %s', host_name or ip_addr, err)
+                self._release(pooled, dead=True)
+                error = err
+            except BaseException:
+                self._release(pooled)
+                raise
+            else:
+                return _PooledChannel(channel, functools.partial(self._release, pooled))
+            if attempt < self._channel_tries:
+                time.sleep(attempt - 1)
+        raise error
+
+    def close_all(self):
+        with self._lock:
+            for clients in self._clients.values():
+                for pooled in clients:
+                    pooled.client.close()
+            self._clients.clear()
+
+    def _release(self, pooled, full=False, dead=False):
+        """Returns a channel counted by _get, the one that was opened or
+        that failed to open"""
+        with self._lock:
+            pooled.channels -= 1
+            pooled.last_used = time.monotonic()
+            if full:
+                pooled.max_channels = max(1, pooled.channels)
+            if dead:
+                self._retire(pooled)
+            if pooled.retired and pooled.channels == 0:
+                pooled.client.close()
+
+    def _retire(self, pooled):
+        """Takes the connection out of the pool, it's closed right away
+        only if none of its channels is open"""
+        for key, clients in list(self._clients.items()):
+            if pooled in clients:
+                clients.remove(pooled)
+                if not clients:
+                    del self._clients[key]
+        pooled.retired = True
+        if pooled.channels == 0:
+            pooled.client.close()
+
+    def _get(self, key, ip_addr, ssh_key, host_name, ssh_tries, username, password):
+        """A pooled connection of the key with room for another channel, the
+        channel counted as open on it"""
+        with self._lock:
+            self._evict_idle()
+            pooled = self._free(key, host_name or ip_addr)
+            if pooled is not None:
+                pooled.channels += 1
+                return pooled
+
+        # connect outside of the lock, so that a slow host doesn't block
+        # commands to the other ones
+        client = get_ssh_client(
+            ip_addr=ip_addr,
+            ssh_key=ssh_key,
+            host_name=host_name,
+            ssh_tries=ssh_tries,
+            username=username,
+            password=password,
+        )
+        client.get_transport().set_keepalive(SSH_KEEPALIVE_INTERVAL)
+
+        with self._lock:
+            pooled = self._free(key, host_name or ip_addr)
+            if pooled is not None:
+                # another thread connected meanwhile, don't keep more
+                # connections than needed
+                client.close()
+            else:
+                pooled = _PooledClient(client, self._max_channels)
+                self._clients.setdefault(key, []).append(pooled)
+            pooled.channels += 1
+            return pooled
+
+    def _free(self, key, host_name):
+        for pooled in list(self._clients.get(key, ())):
+            if not self._is_healthy(pooled.client):
+                LOGGER.debug('Dropping dead ssh connection to %s', host_name)
+                self._retire(pooled)
+            elif pooled.channels < pooled.max_channels:
+                return pooled
+        return None
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        for key, clients in list(self._clients.items()):
+            for pooled in list(clients):
+                if pooled.channels == 0 and now - pooled.last_used > self._idle_timeout:
+                    LOGGER.debug('Closing idle ssh connection to %s', key[0])
+                    self._retire(pooled)
+
+    @staticmethod
+    def _is_healthy(client):
+        transport = client.get_transport()
+        return transport is not None and transport.is_active() and transport.is_authenticated()
+
+    @staticmethod
+    def _key(ip_addr, ssh_key, username):
+        if isinstance(ssh_key, list):
+            ssh_key = tuple(ssh_key)
+        return (ip_addr, username, ssh_key)
+
+
+CONNECTION_POOL = SSHConnectionPool()
+atexit.register(CONNECTION_POOL.close_all)
@@ -4,13 +4,13 @@
 #
 #
 
-from functools import cache
-
 import ovirtsdk4
 from ovirtsdk4 import types
 
+from ost_utils import entity_index
+from ost_utils.ovirtlib import pollutil
+
 
-@cache
 def get_nics_service(engine, vm_name):
     vm_service = get_vm_service(engine, vm_name)
     nics_service = vm_service.nics_service()
@@ -23,23 +23,22 @@ def get_network_fiter_parameters_service(engine, vm_name):
     return nics_service.nic_service(id=nic.id).network_filter_parameters_service()
 
 
-@cache
 def get_vm_service(engine, vm_name):
-    vms_service = engine.vms_service()
-    vm = vms_service.list(search=f'name={vm_name}')[0]
-    if vm is None:
-        return None
-    return vms_service.vm_service(vm.id)
+    return entity_index.index(engine).service('vms', vm_name)
+
+
+def get_vm_services(engine, vm_names):
+    return entity_index.index(engine).services('vms', vm_names)
 
 
-@cache
 def get_disk_service(engine, disk_name):
-    disks_service = engine.disks_service()
-    disk = disks_service.list(search=f'name={disk_name}')[0]
-    return disks_service.disk_service(disk.id)
+    return entity_index.index(engine).service('disks', disk_name)
+
+
+def get_disk_services(engine, disk_names):
+    return entity_index.index(engine).services('disks', disk_names)
 
 
-@cache
 def get_disk_attachments_service(engine, vm_name):
     vm_service = get_vm_service(engine, vm_name)
     if vm_service is None:
@@ -47,27 +46,16 @@ def get_disk_attachments_service(engine, vm_name):
     return vm_service.disk_attachments_service()
 
 
-@cache
 def get_template_service(engine, template_name):
-    templates_service = engine.templates_service()
-    template = templates_service.list(search=f'name={template_name}')[0]
-    if template is None:
-        return None
-    return templates_service.template_service(template.id)
+    return entity_index.index(engine).service('templates', template_name)
 
 
-@cache
 def get_pool_service(engine, pool_name):
-    vm_pools_service = engine.vm_pools_service()
-    pool = vm_pools_service.list(search=f'name={pool_name}')[0]
-    return vm_pools_service.pool_service(pool.id)
+    return entity_index.index(engine).service('vm_pools', pool_name)
 
 
-@cache
 def get_storage_domain_service(engine, sd_name):
-    storage_domains_service = engine.storage_domains_service()
-    sd = storage_domains_service.list(search=f'name={sd_name}')[0]
-    return storage_domains_service.storage_domain_service(sd.id)
+    return entity_index.index(engine).service('storage_domains', sd_name)
 
 
 def get_storage_domain_vm_service_by_name(sd_service, vm_name):
@@ -111,21 +99,14 @@ def hosts_in_cluster_v4(root, cluster_name):
     return sorted(hosts, key=lambda host: host.name)
 
 
-@cache
 def data_center_service(root, name):
-    data_centers = root.data_centers_service()
-    dc = data_centers.list(search=f'name={name}')[0]
-    return data_centers.data_center_service(dc.id)
+    return entity_index.index(root).service('data_centers', name)
 
 
-@cache
 def get_cluster_service(engine, cluster_name):
-    clusters_service = engine.clusters_service()
-    cluster = clusters_service.list(search=f'name={cluster_name}')[0]
-    return clusters_service.cluster_service(cluster.id)
+    return entity_index.index(engine).service('clusters', cluster_name)
 
 
-@cache
 def get_vm_snapshots_service(engine, vm_name):
     vm_service = get_vm_service(engine, vm_name)
     if vm_service is None:
@@ -152,11 +133,8 @@ def quote_search_string(s):
     return '"' + s + '"'
 
 
-@cache
 def get_vnic_profiles_service(engine, network_name):
-    networks_service = engine.networks_service()
-    net = networks_service.list(search=f'name={network_name}')[0]
-    return networks_service.network_service(net.id).vnic_profiles_service()
+    return entity_index.index(engine).service('networks', network_name).vnic_profiles_service()
 
 
 def all_jobs_finished(engine, correlation_id):
@@ -167,6 +145,11 @@ def all_jobs_finished(engine, correlation_id):
     return all(job.status != types.JobStatus.STARTED for job in jobs)
 
 
+def all_jobs_finished_wakeup(engine, correlation_id):
+    # probes all_jobs_finished again as soon as the jobs log an event
+    return pollutil.EngineEventsWakeup(engine, correlation_id=correlation_id)
+
+
 def get_first_active_host_by_name(engine):
     hosts = engine.hosts_service().list(search='status=up')
     return sorted(hosts, key=lambda host: host.name)[0]
@@ -0,0 +1,120 @@
+#
+# Copyright oVirt Authors
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+#
+
+"""SSHConnectionPool against fake clients, whose transports refuse channels
+beyond the MaxSessions of the fake server or fail like a dead connection."""
+
+import time
+
+import paramiko
+import pytest
+
+from ost_utils import ssh
+
+
+class FakeChannel:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeTransport:
+    def __init__(self, max_sessions):
+        self.max_sessions = max_sessions
+        self.channels = []
+        self.dead = False
+
+    def open_session(self):
+        if self.dead:
+            raise paramiko.SSHException('connection reset')
+        if len([channel for channel in self.channels if not channel.closed]) >= self.max_sessions:
+            raise paramiko.ChannelException(2, 'Connect failed')
+        channel = FakeChannel()
+        self.channels.append(channel)
+        return channel
+
+    def set_keepalive(self, interval):
+        pass
+
+    def is_active(self):
+        return not self.dead
+
+    def is_authenticated(self):
+        return True
+
+
+class FakeClient:
+    def __init__(self, max_sessions):
+        self.transport = FakeTransport(max_sessions)
+        self.closed = False
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    """The clients the pool connected, to a server with MaxSessions 3"""
+    connected = []
+
+    def connect(**kwargs):
+        connected.append(FakeClient(max_sessions=3))
+        return connected[-1]
+
+    monkeypatch.setattr(ssh, 'get_ssh_client', connect)
+    return connected
+
+
+def test_channels_beyond_max_channels_open_another_connection(clients):
+    pool = ssh.SSHConnectionPool(max_channels=2)
+    channels = [pool.open_session('192.0.2.1') for _ in range(5)]
+    assert [len(client.transport.channels) for client in clients] == [2, 2, 1]
+    for channel in channels:
+        channel.close()
+    pool.open_session('192.0.2.1')
+    assert len(clients) == 3
+
+
+def test_refused_channel_keeps_connection_and_its_channels(clients):
+    pool = ssh.SSHConnectionPool(max_channels=10)
+    channels = [pool.open_session('192.0.2.1') for _ in range(4)]
+    assert len(clients) == 2
+    assert not clients[0].closed
+    assert not any(channel.closed for channel in channels[:3])
+    # the first connection is known to be full now
+    pool.open_session('192.0.2.1')
+    assert [len(client.transport.channels) for client in clients] == [3, 2]
+
+
+def test_dead_connection_is_closed_after_its_last_channel(clients):
+    pool = ssh.SSHConnectionPool()
+    running = pool.open_session('192.0.2.1')
+    clients[0].transport.dead = True
+    clients[0].transport.is_active = lambda: True
+    channel = pool.open_session('192.0.2.1')
+    assert len(clients) == 2
+    assert not clients[0].closed
+    running.close()
+    assert clients[0].closed
+    channel.close()
+    assert not clients[1].closed
+
+
+def test_idle_eviction_spares_connections_with_open_channels(clients):
+    pool = ssh.SSHConnectionPool(idle_timeout=0.1)
+    running = pool.open_session('192.0.2.1')
+    time.sleep(0.2)
+    pool.open_session('192.0.2.2').close()
+    assert not clients[0].closed
+    running.close()
+    time.sleep(0.2)
+    pool.open_session('192.0.2.2')
+    assert clients[0].closed
@@ -4,12 +4,11 @@
 #
 #
 
+import concurrent.futures
 import fcntl
 import functools
 import logging
 import os
-import queue
-import sys
 import threading
 import time
 
@@ -42,18 +41,6 @@ class EggTimer:
         return self.running_time > self.timeout
 
 
-def _ret_via_queue(func, queue):
-    try:
-        queue.put({'return': func()})
-    except Exception:
-        LOGGER.debug(
-            'Error while running thread %s',
-            threading.current_thread().name,
-            exc_info=True,
-        )
-        queue.put({'exception': sys.exc_info()})
-
-
 def func_vector(target, args_sequence):
     return [functools.partial(target, *args) for args in args_sequence]
 
@@ -62,74 +49,276 @@ class TimeoutException(Exception):
     pass
 
 
+# Size of the worker pool shared by all TaskGroups. The tasks are mostly
+# waiting on ansible, ssh or the engine, the bound only keeps a large fan-out
+# from starting an unbounded number of threads.
+PARALLEL_WORKERS = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker = threading.local()
+
+
+def _shared_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=PARALLEL_WORKERS, thread_name_prefix='ost-parallel'
+            )
+        return _executor
+
+
+def _task_name(target):
+    if isinstance(target, functools.partial):
+        args = ', '.join([repr(arg) for arg in target.args] + [f'{k}={v!r}' for k, v in target.keywords.items()])
+        return f'{_task_name(target.func)}({args})'
+    return getattr(target, '__qualname__', None) or repr(target)
+
+
+class TaskSpan:
+    """When a task of a TaskGroup ran, in wall clock time, and how it ended"""
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+        self.end = None
+        self.error = None
+        self.cancelled = False
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    @property
+    def status(self):
+        if self.cancelled:
+            return 'cancelled'
+        if self.end is not None:
+            return 'failed' if self.error else 'finished'
+        return 'running' if self.start is not None else 'pending'
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'start': self.start,
+            'end': self.end,
+            'duration': self.duration,
+            'status': self.status,
+            'error': self.error,
+        }
+
+
+class _Task:
+    def __init__(self, index, target, name):
+        self.index = index
+        self.target = target
+        self.span = TaskSpan(name)
+        self.future = None
+        self.started = None
+
+    def __call__(self):
+        thread = threading.current_thread()
+        thread_name = thread.name
+        thread.name = self.span.name
+        nested = getattr(_worker, 'active', False)
+        _worker.active = True
+        self.started = time.monotonic()
+        self.span.start = time.time()
+        try:
+            return self.target()
+        except BaseException as e:
+            LOGGER.debug('Error while running task %s', self.span.name, exc_info=True)
+            self.span.error = repr(e)
+            raise
+        finally:
+            self.span.end = time.time()
+            _worker.active = nested
+            thread.name = thread_name
+
+
+def _run_in_daemon_thread(task):
+    future = concurrent.futures.Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(task())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=task.span.name, daemon=True).start()
+    return future
+
+
+class TaskGroup:
+    """Runs callables concurrently on a shared, bounded pool of threads.
+
+        group = TaskGroup([functools.partial(f, x) for x in xs], timeout=600)
+        group.start()
+        for index, result in group.as_completed():
+            ...  # results as they come
+        # or
+        results = group.join()  # results in the order of the targets
+
+    timeout limits the run time of each task, counted from the moment it
+    actually starts running. With fail_fast, the first task that fails or
+    times out cancels the tasks that haven't started yet and its exception,
+    or TimeoutException, is raised. Without it, join() waits for all the
+    tasks and then raises the exception of the first failed one. Python
+    threads can't be interrupted, so tasks that are already running are
+    left to finish in the background. Groups with a timeout run on their
+    own threads, so that tasks that never finish don't take workers of the
+    shared pool away from the other groups.
+
+    Each task gets a TaskSpan in 'spans' with its start and end time and
+    error, if any. With daemon, the tasks run on their own daemon threads
+    instead of the pool, so that ones that never finish don't keep the
+    interpreter from exiting.
+    """
+
+    def __init__(self, targets, timeout=None, fail_fast=True, daemon=False, names=None):
+        names = names or [_task_name(target) for target in targets]
+        self._tasks = [_Task(i, target, name) for i, (target, name) in enumerate(zip(targets, names))]
+        self.timeout = timeout
+        self.fail_fast = fail_fast
+        self.daemon = daemon
+        self._own_executor = None
+
+    @property
+    def spans(self):
+        return [task.span for task in self._tasks]
+
+    def start(self):
+        if self.daemon:
+            submit = _run_in_daemon_thread
+        elif self.timeout is not None or getattr(_worker, 'active', False):
+            # with a timeout the tasks may be left running, and started from
+            # a task running on the shared pool, it could be waiting for a
+            # free worker of its own pool forever
+            self._own_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(PARALLEL_WORKERS, max(len(self._tasks), 1)), thread_name_prefix='ost-parallel-nested'
+            )
+            submit = self._own_executor.submit
+        else:
+            submit = _shared_executor().submit
+        for task in self._tasks:
+            task.future = submit(task)
+        if self._own_executor is not None:
+            self._own_executor.shutdown(wait=False)
+        return self
+
+    def cancel(self):
+        """Cancels the tasks that haven't started yet"""
+        for task in self._tasks:
+            if task.future is not None and task.future.cancel():
+                task.span.cancelled = True
+
+    def as_completed(self, timeout=None, raise_exceptions=True):
+        """Yields (index, result) of the tasks as they finish.
+
+        timeout limits the whole iteration. Failed tasks raise their
+        exception with raise_exceptions, without it their result is the
+        exception instance.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        pending = {task.future: task for task in self._tasks}
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending,
+                timeout=self._wait_time(pending.values(), deadline),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in sorted(done, key=lambda future: pending[future].index):
+                task = pending.pop(future)
+                if future.cancelled():
+                    continue
+                error = future.exception()
+                if error is None:
+                    yield task.index, future.result()
+                elif raise_exceptions:
+                    if self.fail_fast:
+                        self.cancel()
+                    raise error
+                else:
+                    yield task.index, error
+            expired = self._expired(pending.values(), deadline)
+            if expired:
+                LOGGER.debug(f"Timed out waiting for {', '.join(task.span.name for task in expired)}")
+                if self.fail_fast:
+                    self.cancel()
+                raise TimeoutException(f"Timed out waiting for {', '.join(task.span.name for task in expired)}")
+
+    def join(self, raise_exceptions=True, timeout=None):
+        """Returns the results in the order of the targets, the exceptions
+        of failed tasks in their places without raise_exceptions"""
+        results = [None] * len(self._tasks)
+        for index, result in self.as_completed(timeout, raise_exceptions and self.fail_fast):
+            results[index] = result
+        failed = [span.name for span in self.spans if span.error is not None]
+        if failed:
+            LOGGER.debug(f"{len(failed)} out of {len(self._tasks)} tasks raised exceptions: {failed}")
+            if raise_exceptions and not self.fail_fast:
+                raise next(result for result, span in zip(results, self.spans) if span.error is not None)
+        return results
+
+    def _wait_time(self, tasks, deadline):
+        now = time.monotonic()
+        limits = [deadline] if deadline is not None else []
+        if self.timeout is not None:
+            for task in tasks:
+                if task.started is None:
+                    # not picked up by a worker yet, check again soon
+                    limits.append(now + 1)
+                else:
+                    limits.append(task.started + self.timeout)
+        return max(0, min(limits) - now) if limits else None
+
+    def _expired(self, tasks, deadline):
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            return [task for task in tasks if not task.future.done()]
+        if self.timeout is None:
+            return []
+        return [
+            task
+            for task in tasks
+            if task.started is not None and now >= task.started + self.timeout and not task.future.done()
+        ]
+
+
 class VectorThread:
+    """Runs targets concurrently, kept for the existing callers of its
+    start_all/join_all interface. See TaskGroup."""
+
     def __init__(self, targets, daemon=False):
         self.targets = targets
-        self.queues = [queue.Queue()] * len(targets)
-        self.thread_handles = []
         self.results = []
-        self.daemon = daemon
+        self._group = TaskGroup(targets, fail_fast=False, daemon=daemon)
+
+    @property
+    def spans(self):
+        return self._group.spans
 
     def start_all(self):
-        for target, q in zip(self.targets, self.queues):
-            t = threading.Thread(target=_ret_via_queue, args=(target, q), daemon=self.daemon)
-            self.thread_handles.append(t)
-            t.start()
+        self._group.start()
 
     def join_all(self, raise_exceptions=True, timeout=None):
         if self.results:
             return self.results
-
-        self._join_threads(timeout)
-        self._gather_results()
-        self._handle_exceptions(raise_exceptions)
-
-        return [result.get('return', None) for result in self.results]
-
-    def _join_threads(self, timeout):
-        timer = EggTimer(timeout)
-        # never time out if timeout is None
-        if timeout is None:
-            timer.elapsed = lambda: False
-
-        loop_timeout = timeout
-        raise_timeout = False
-        with timer:
-            for t in self.thread_handles:
-                t.join(timeout=loop_timeout)
-                # if we've reached a timeout let's give the rest of the threads
-                # a chance to join immediately
-                if timer.elapsed():
-                    LOGGER.debug("Reached timeout waiting on a thread. Trying to join remaining ones.")
-                    loop_timeout = 0
-                    raise_timeout = True
-                else:
-                    if loop_timeout is not None:
-                        loop_timeout -= timer.running_time
-
-        if raise_timeout:
-            raise TimeoutException()
-
-    def _gather_results(self):
-        for q in self.queues:
-            self.results.append(q.get(block=False))
-
-    def _handle_exceptions(self, raise_exceptions):
-        exceptions = [result['exception'] for result in self.results if 'exception' in result]
-
-        if exceptions:
-            LOGGER.debug(f"{len(exceptions)} out of {len(self.targets)} threads raised exceptions:")
-            for exc in exceptions:
-                LOGGER.debug(f"{exc}")
-            if raise_exceptions:
-                exc_info = exceptions[0]
-                raise exc_info[1].with_traceback(exc_info[2])
+        results = self._group.join(raise_exceptions=False, timeout=timeout)
+        errors = [result for result, span in zip(results, self.spans) if span.error is not None]
+        if errors and raise_exceptions:
+            raise errors[0]
+        self.results = [None if span.error is not None else result for result, span in zip(results, self.spans)]
+        return self.results
 
 
-def invoke_different_funcs_in_parallel(*funcs):
-    vt = VectorThread(funcs)
-    vt.start_all()
-    return vt.join_all()
+def invoke_different_funcs_in_parallel(*funcs, timeout=None, fail_fast=False):
+    return TaskGroup(funcs, timeout=timeout, fail_fast=fail_fast).start().join()
 
 
 def read_nonblocking(file_descriptor):
@@ -4,23 +4,120 @@
 #
 #
 
+"""Serial consoles of VMs through the ovirt-vmconsole proxy of the engine.
+
+The output of the console is read without blocking, with selectors, into
+a buffer that prompts are searched in as it grows. Every wait has its own
+deadline, no signals are involved, so consoles can be used from any thread
+and several at the same time. A VmSerialConsole keeps a connection per
+thread.
+"""
+
+import codecs
 import contextlib
 import ipaddress
 import logging
 import os
 import pty
-import signal
+import re
+import selectors
 import subprocess
+import threading
 import time
 
 
 LOGGER = logging.getLogger(__name__)
 
-
-class VmSerialConsole(object):  # pylint: disable=too-many-instance-attributes
+READ_SIZE = 4096
+# how far back from the new output a match can start, longer than any prompt
+MATCH_LOOKBEHIND = 256
+CONNECT_TIMEOUT = 180
+LOGIN_TIMEOUT = 180
+COMMAND_TIMEOUT = 120
+# how long to wait for the console to answer before poking it again
+WAKEUP_INTERVAL = 5
+
+
+class ConsoleTimeoutError(BlockingIOError):
+    pass
+
+
+class ConsoleReader:
+    """Buffered, non-blocking reader of the output of a console that can
+    wait for regular expressions to show up in it"""
+
+    def __init__(self, fd):
+        self._fd = fd
+        os.set_blocking(fd, False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(fd, selectors.EVENT_READ)
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self._buffer = ''
+        self._searched = 0
+        self.eof = False
+
+    def _fill(self, timeout):
+        """Reads what's available within timeout, returns whether anything was"""
+        if self.eof or not self._selector.select(max(timeout, 0)):
+            return False
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return False
+        if not data:
+            self.eof = True
+            return False
+        self._buffer += self._decoder.decode(data).replace('\r', '')
+        return True
+
+    def expect(self, patterns, timeout):
+        """Waits for the first of the patterns, regular expressions, to show
+        up in the output.
+
+        Returns the index of the pattern and the output up to the end of its
+        match, which is consumed. Raises ConsoleTimeoutError if none shows up
+        within timeout and EOFError if the console is closed first.
+        """
+        compiled = [re.compile(pattern) for pattern in patterns]
+        deadline = time.monotonic() + timeout
+        while True:
+            matches = [(match.start(), i, match) for i, match in self._search(compiled) if match]
+            if matches:
+                _, index, match = min(matches, key=lambda found: found[:2])
+                output = self._buffer[: match.end()]
+                self._buffer = self._buffer[match.end() :]
+                self._searched = 0
+                return index, output
+            self._searched = len(self._buffer)
+            remaining = deadline - time.monotonic()
+            if self.eof:
+                raise EOFError(f'console closed waiting for {patterns}, read so far: [{self._buffer!r}]')
+            if remaining <= 0:
+                raise ConsoleTimeoutError(f'timed out waiting for {patterns}, read so far: [{self._buffer!r}]')
+            self._fill(remaining)
+
+    def _search(self, compiled):
+        start = max(0, self._searched - MATCH_LOOKBEHIND)
+        return [(i, pattern.search(self._buffer, start)) for i, pattern in enumerate(compiled)]
+
+    def close(self):
+        self._selector.close()
+
+
+class _Connection:
+    def __init__(self, process, writer, reader):
+        self.process = process
+        self.writer = writer
+        self.reader = reader
+        self.logged_in = False
+
+
+class VmSerialConsole(object):
 
     USER_PROMPT = '$ '
     ROOT_PROMPT = '# '
+    LOGIN_PROMPT = 'login: '
+    PASSWORD_PROMPT = 'Password: '
 
     def __init__(
         self,
@@ -34,105 +131,117 @@ class VmSerialConsole(object):  # pylint: disable=too-many-instance-attributes
         self._proxy_ip = vmconsole_proxy_ip
         self._user = vm_user
         self._passwd = vm_password
-        self._reader = None
-        self._writer = None
         self._prompt = bash_prompt
-        self._connected = False
-        self._logged_in = False
-        self._read_alarm = BlockingIOAlarm('timed out waiting for read', 120)
+        self._local = threading.local()
+
+    @property
+    def _connection(self):
+        return getattr(self._local, 'connection', None)
 
     @contextlib.contextmanager
     def connect(self, vm_id):
-        if not self._connected:
-            with self._connect(vm_id):
-                if not self._logged_in:
-                    with self._login():
-                        yield self
-        elif not self._logged_in:
+        if self._connection is not None:
+            yield self
+            return
+        with self._connect(vm_id):
             with self._login():
                 yield self
-        else:
-            yield self
 
     @contextlib.contextmanager
     def _connect(self, vm_id):
+        master, slave = pty.openpty()
+        LOGGER.debug('vmconsole: opened pty')
+        args = [
+            'ssh',
+            '-t',
+            '-o',
+            'StrictHostKeyChecking=no',
+            '-o',
+            'UserKnownHostsFile=/dev/null',
+            '-o',
+            f'ConnectTimeout={CONNECT_TIMEOUT}',
+            '-i',
+            f'{self._private_key_path}',
+            '-p',
+            '2222',
+            f'ovirt-vmconsole@{self._proxy_ip}',
+            'connect',
+            f'--vm-id={vm_id}',
+        ]
         try:
-            alarm = BlockingIOAlarm('timed out waiting to connect', 180)
-            signal.signal(signal.SIGALRM, alarm.handle)
-            signal.alarm(alarm.seconds)
-            master, slave = pty.openpty()
-            LOGGER.debug('vmconsole: opened pty')
-            args = [
-                'ssh',
-                '-t',
-                '-o',
-                'StrictHostKeyChecking=no',
-                '-o',
-                'UserKnownHostsFile=/dev/null',
-                '-i',
-                f'{self._private_key_path}',
-                '-p',
-                '2222',
-                f'ovirt-vmconsole@{self._proxy_ip}',
-                'connect',
-                f'--vm-id={vm_id}',
-            ]
-            self._reader = subprocess.Popen(
+            process = subprocess.Popen(
                 args,
                 stdin=slave,
                 stdout=subprocess.PIPE,
                 bufsize=0,
             )
-            signal.alarm(0)  # cancel
-            LOGGER.debug(f'vmconsole: opened reader with args {args}')
-            self._writer = os.fdopen(master, 'w')
-            LOGGER.debug('vmconsole: opened writer')
-            self._connected = True
+        except BaseException:
+            os.close(master)
+            raise
+        finally:
+            os.close(slave)
+        LOGGER.debug(f'vmconsole: opened reader with args {args}')
+        self._local.connection = _Connection(process, os.fdopen(master, 'w'), ConsoleReader(process.stdout.fileno()))
+        try:
             yield
         finally:
             self._disconnect()
-            signal.signal(signal.SIGALRM, signal.SIG_DFL)
 
     def _disconnect(self):
         LOGGER.debug('vmconsole: disconnecting...')
-        self._reader.terminate()
-        self._writer.close()
-        self._connected = False
+        connection = self._connection
+        self._local.connection = None
+        connection.process.terminate()
+        try:
+            connection.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            connection.process.kill()
+            connection.process.wait()
+        connection.reader.close()
+        connection.process.stdout.close()
+        connection.writer.close()
         LOGGER.debug('vmconsole: disconnected')
 
     @contextlib.contextmanager
     def _login(self):
         try:
-            signal.signal(signal.SIGALRM, self._read_alarm.handle)
-            time.sleep(30)
-            self._pre_login()
             LOGGER.debug('vmconsole: logging in')
-            self._read_until_prompt('login: ')
-            self._write(f'{self._user}\n')
-            self._read_until_prompt('Password: ')
-            self._write(f'{self._passwd}\n')
-            self._read_until_bash_prompt()
-            self._logged_in = True
+            if self._wait_for_login_prompt():
+                self._write(f'{self._user}\n')
+                self._read_until_prompt(self.PASSWORD_PROMPT)
+                self._write(f'{self._passwd}\n')
+                self._read_until_bash_prompt(LOGIN_TIMEOUT)
+            self._connection.logged_in = True
             yield
         finally:
             self._logout()
-            signal.signal(signal.SIGALRM, signal.SIG_DFL)
 
-    def _pre_login(self):
-        # a single `write('\n')` might be enough but it might prove flaky
-        for i in range(15):
-            LOGGER.debug(f'vmconsole: pre login {i}')
+    def _wait_for_login_prompt(self):
+        """Pokes the console until it shows the login prompt, returns False
+        if it shows the shell prompt instead, i.e. is still logged in"""
+        deadline = time.monotonic() + LOGIN_TIMEOUT
+        prompts = (re.escape(self.LOGIN_PROMPT), re.escape(self._prompt))
+        while True:
             self._write('\n')
-            byte = self._read()
-            if byte in (b'\n', b'\r') or len(byte.strip()) != 0:
-                break
-            time.sleep(10)
+            remaining = deadline - time.monotonic()
+            try:
+                index, _ = self._connection.reader.expect(prompts, min(WAKEUP_INTERVAL, max(remaining, 0)))
+                return index == 0
+            except ConsoleTimeoutError:
+                if time.monotonic() >= deadline:
+                    raise
+                LOGGER.debug('vmconsole: no login prompt yet')
 
     def _logout(self):
+        if self._connection is None or not self._connection.logged_in:
+            return
         LOGGER.debug('vmconsole: logging out')
-        self._write('exit\n')
-        self._read_until_prompt('login: ')
-        self._logged_in = False
+        self._connection.logged_in = False
+        try:
+            self._write('exit\n')
+            self._read_until_prompt(self.LOGIN_PROMPT)
+        except (ConsoleTimeoutError, EOFError, OSError) as e:
+            LOGGER.debug(f'vmconsole: logging out failed: {e}')
 
     def add_static_ip(self, vm_id, ip, iface):
         ips = self.shell(vm_id, (Shell.ip_address_add(ip, iface), Shell.get_ips(iface)))
@@ -160,40 +269,28 @@ class VmSerialConsole(object):  # pylint: disable=too-many-instance-attributes
         try:
             with self.connect(vm_id) as console:
                 logged_in = console.logged_in
-        except BlockingIOError as e:
+        except (BlockingIOError, EOFError) as e:
             LOGGER.debug(f'vmconsole: could not log in: {e.args[0]}')
             logged_in = False
         return logged_in
 
     @property
     def logged_in(self):
-        return self._logged_in
+        return self._connection is not None and self._connection.logged_in
 
-    def _read_until_bash_prompt(self):
-        return self._read_until_prompt(self._prompt)
+    def _read_until_bash_prompt(self, timeout=COMMAND_TIMEOUT):
+        return self._read_until_prompt(self._prompt, timeout)
 
-    def _read_until_prompt(self, prompt):
+    def _read_until_prompt(self, prompt, timeout=COMMAND_TIMEOUT):
         LOGGER.debug(f'vmconsole: reading until [{prompt}]...')
-        time.sleep(5)
-        _bytes = b''
-        try:
-            encoded_prompt = prompt.encode()
-            while not _bytes.endswith(encoded_prompt):
-                _bytes += self._read()
-        finally:
-            LOGGER.debug(f'vmconsole: _read_until_prompt: read so far: [{repr(_bytes)}]')
-        return _bytes.decode(errors='ignore').replace('\r', '')
-
-    def _read(self):
-        signal.alarm(self._read_alarm.seconds)
-        byte = self._reader.stdout.read(1)
-        signal.alarm(0)  # cancel
-        return byte
+        _, output = self._connection.reader.expect((re.escape(prompt),), timeout)
+        LOGGER.debug(f'vmconsole: _read_until_prompt: read: [{output!r}]')
+        return output
 
     def _write(self, entry):
         LOGGER.debug(f'vmconsole: writing [{entry}]')
-        self._writer.write(entry)
-        self._writer.flush()
+        self._connection.writer.write(entry)
+        self._connection.writer.flush()
 
 
 class CirrosSerialConsole(VmSerialConsole):
@@ -228,16 +325,3 @@ class Shell(object):
             (ip for ip in ips if ipaddress.ip_address(ip).version == int(ip_version)),
             None,
         )
-
-
-class BlockingIOAlarm:
-    def __init__(self, msg, seconds):
-        self._error = BlockingIOError(msg)
-        self._seconds = seconds
-
-    def handle(self, sig, frame):
-        raise self._error
-
-    @property
-    def seconds(self):
-        return self._seconds